@@ -0,0 +1,155 @@
+"""Бенчмарк диспетчеризации callback: цепочка lambda-фильтров против CallbackTable.
+
+Запуск: python -m benchmarks.callback_dispatch
+"""
+import asyncio
+import time
+import timeit
+from datetime import datetime
+from typing import Tuple
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Update
+
+from src.utils.callbacks import CallbackTable
+
+# Фильтры в порядке прежних роутеров (navigation, user_public, purchase, payments)
+LEGACY_FILTERS = [
+    [
+        lambda c: c.data == "nav:main",
+        lambda c: c.data.startswith("nav:back:"),
+    ],
+    [
+        lambda c: c.data == "user:connect",
+        lambda c: c.data == "user:buy",
+        lambda c: c.data == "user:trial",
+        lambda c: c.data == "user:my_access",
+        lambda c: c.data == "user:settings",
+        lambda c: c.data == "user:change_language",
+        lambda c: c.data.startswith("lang:"),
+        lambda c: c.data == "auto_renewal:toggle",
+        lambda c: c.data == "user:referral",
+        lambda c: c.data == "user:resume",
+        lambda c: c.data == "user:renew",
+        lambda c: c.data == "user:support",
+    ],
+    [lambda c: c.data.startswith("purchase:")],
+    [lambda c: c.data.startswith("yookassa:check:")],
+]
+
+EXACT = [
+    "nav:main", "user:connect", "user:buy", "user:trial", "user:my_access",
+    "user:settings", "user:change_language", "auto_renewal:toggle",
+    "user:referral", "user:resume", "user:renew", "user:support",
+]
+PREFIXES = ["nav:back", "lang", "purchase", "yookassa:check"]
+
+# Смесь callback_data, близкая к реальному трафику
+SAMPLE = [
+    "user:connect", "purchase:3", "purchase:3:method:yookassa",
+    "purchase:3:method:yookassa:sbp", "user:my_access", "user:settings",
+    "lang:en", "nav:main", "user:support", "yookassa:check:2d4f",
+]
+
+
+async def _noop(*args, **kwargs):
+    """Пустой обработчик."""
+
+
+def build_legacy() -> Dispatcher:
+    """Диспетчер с цепочкой lambda-фильтров."""
+    dp = Dispatcher()
+    for filters in LEGACY_FILTERS:
+        router = Router()
+        for callback_filter in filters:
+            router.callback_query.register(_noop, callback_filter)
+        dp.include_router(router)
+    return dp
+
+
+def build_table() -> Tuple[Dispatcher, CallbackTable]:
+    """Диспетчер с CallbackTable."""
+    dp = Dispatcher()
+    router = Router()
+    table = CallbackTable(router)
+    for data in EXACT:
+        table.exact(data)(_noop)
+    for prefix in PREFIXES:
+        table.prefix(prefix)(_noop)
+    dp.include_router(router)
+    return dp, table
+
+
+class _Event:
+    """Минимальный объект с полем data для lambda-фильтров."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: str):
+        self.data = data
+
+
+def _legacy_match(data: str):
+    """Найти первый подходящий фильтр (как делала цепочка роутеров)."""
+    event = _Event(data)
+    for filters in LEGACY_FILTERS:
+        for callback_filter in filters:
+            if callback_filter(event):
+                return callback_filter
+    return None
+
+
+def _make_update(update_id: int, data: str) -> Update:
+    """Синтетический апдейт с callback_query."""
+    now = int(datetime.now().timestamp())
+    return Update(
+        update_id=update_id,
+        callback_query={
+            "id": str(update_id),
+            "chat_instance": "bench",
+            "from": {"id": 1000 + update_id % 50, "is_bot": False, "first_name": "u"},
+            "data": data,
+            "message": {
+                "message_id": 1,
+                "date": now,
+                "chat": {"id": 1, "type": "private"},
+                "text": "bench",
+            },
+        },
+    )
+
+
+async def _feed(dp: Dispatcher, bot: Bot, updates) -> float:
+    """Прогнать апдейты через диспетчер, вернуть время."""
+    started = time.perf_counter()
+    for update in updates:
+        await dp.feed_update(bot, update)
+    return time.perf_counter() - started
+
+
+def main(number: int = 20_000, updates_count: int = 5_000):
+    """Сравнить стоимость сопоставления и полной диспетчеризации."""
+    legacy_dp = build_legacy()
+    table_dp, table = build_table()
+
+    legacy_time = timeit.timeit(
+        lambda: [_legacy_match(data) for data in SAMPLE], number=number
+    )
+    table_time = timeit.timeit(
+        lambda: [table.resolve(data) for data in SAMPLE], number=number
+    )
+    matches = number * len(SAMPLE)
+    print(f"match legacy: {legacy_time / matches * 1e9:.0f} ns/callback")
+    print(f"match table:  {table_time / matches * 1e9:.0f} ns/callback")
+
+    bot = Bot("123456:bench")
+    updates = [_make_update(i, SAMPLE[i % len(SAMPLE)]) for i in range(updates_count)]
+    legacy_feed = asyncio.run(_feed(legacy_dp, bot, updates))
+    table_feed = asyncio.run(_feed(table_dp, bot, updates))
+    print(f"dispatch legacy: {updates_count / legacy_feed:.0f} updates/s")
+    print(f"dispatch table:  {updates_count / table_feed:.0f} updates/s")
+    print(f"speedup: {legacy_feed / table_feed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
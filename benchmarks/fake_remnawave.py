@@ -0,0 +1,878 @@
+"""Локальная замена Remnawave API для тестов и бенчмарков.
+
+Запуск: python -m benchmarks.fake_remnawave --port 3010 \\
+    --latency 0.05 --jitter 0.02 --error-rate 0.01 --throttle-rps 200
+
+Затем в .env бота: API_BASE_URL=http://127.0.0.1:3010
+
+Состояние (пользователи, подписки, ноды, хосты, HWID, токены, шаблоны,
+сниппеты, профили конфигурации, провайдеры и биллинг) хранится в памяти
+процесса. Статистика трафика генерируется случайно. Задержка, доля ошибок 5xx и лимит запросов (429) задаются
+параметрами и меняются на лету через ``POST /_fake/config``; счетчики
+запросов доступны на ``GET /_fake/stats``. Генератор случайных чисел
+инициализируется ``--seed``, поэтому прогоны воспроизводимы.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+from src.services.api_client import endpoint_label
+
+
+def _now() -> str:
+    """Текущее время в ISO формате (UTC)."""
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _shift(expire_at: str, days: int) -> str:
+    """Сдвинуть дату истечения на days дней (от текущего момента, если она в прошлом)."""
+    expire_dt = datetime.fromisoformat(expire_at.replace("Z", "+00:00"))
+    if expire_dt.tzinfo is None:
+        expire_dt = expire_dt.replace(tzinfo=timezone.utc)
+    return (max(expire_dt, datetime.now(timezone.utc)) + timedelta(days=days)).isoformat()
+
+
+def _ok(data: Any, status: int = 200) -> web.Response:
+    """Ответ в конверте Remnawave."""
+    return web.json_response({"response": data}, status=status)
+
+
+def _not_found(what: str) -> web.Response:
+    return web.json_response({"message": f"{what} not found"}, status=404)
+
+
+class FakeRemnawave:
+    """Состояние фейковой панели и внедрение задержек/ошибок."""
+
+    BULK_USER_ACTIONS = {
+        "delete", "revoke", "reset-traffic", "extend", "extend-all",
+        "update-status", "delete-by-status", "reset-traffic-all",
+    }
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rps: float = 0.0,
+        token: str = "",
+        public_url: str = "https://sub.example.com",
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rps = throttle_rps
+        self.token = token
+        self.public_url = public_url.rstrip("/")
+        self.random = random.Random(seed)
+
+        self.users: Dict[str, Dict] = {}
+        self.by_short_uuid: Dict[str, str] = {}
+        self.nodes: Dict[str, Dict] = {}
+        self.hosts: Dict[str, Dict] = {}
+        self.hwid: Dict[str, List[Dict]] = {}
+        self.tokens: Dict[str, Dict] = {}
+        self.templates: Dict[str, Dict] = {}
+        self.snippets: Dict[str, Dict] = {}
+        self.config_profiles: Dict[str, Dict] = {}
+        self.providers: Dict[str, Dict] = {}
+        self.billing_history: Dict[str, Dict] = {}
+        self.billing_nodes: Dict[str, Dict] = {}
+
+        self._tokens = throttle_rps
+        self._tokens_updated = time.monotonic()
+        self.requests: Counter = Counter()
+        self.injected: Counter = Counter()
+
+    # Внедрение сбоев
+
+    def _take_token(self) -> bool:
+        """Глобальный token bucket на throttle_rps запросов в секунду."""
+        if self.throttle_rps <= 0:
+            return True
+        now = time.monotonic()
+        self._tokens = min(
+            self.throttle_rps, self._tokens + (now - self._tokens_updated) * self.throttle_rps
+        )
+        self._tokens_updated = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler):
+        """Авторизация, лимит, задержка и случайные ошибки для /api/*."""
+        if not request.path.startswith("/api/"):
+            return await handler(request)
+
+        self.requests[f"{request.method} {endpoint_label(request.path)}"] += 1
+        if self.token and request.headers.get("Authorization") != f"Bearer {self.token}":
+            self.injected["401"] += 1
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        if not self._take_token():
+            self.injected["429"] += 1
+            return web.json_response(
+                {"message": "Too many requests"}, status=429, headers={"Retry-After": "1"}
+            )
+
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate and self.random.random() < self.error_rate:
+            status = self.random.choice((500, 502, 503))
+            self.injected[str(status)] += 1
+            return web.json_response({"message": "Injected failure"}, status=status)
+        return await handler(request)
+
+    # Данные
+
+    def add_user(
+        self,
+        username: str,
+        expire_at: str,
+        telegram_id: Optional[int] = None,
+        **fields,
+    ) -> Dict:
+        """Создать пользователя с одной подпиской."""
+        user_uuid = str(uuid.uuid4())
+        short_uuid = uuid.uuid4().hex[:16]
+        user = {
+            "uuid": user_uuid,
+            "username": username,
+            "telegram_id": telegram_id,
+            "status": "ACTIVE",
+            "expire_at": expire_at,
+            "used_traffic_bytes": 0,
+            "traffic_limit_bytes": 0,
+            "created_at": _now(),
+            "subscriptions": [{"short_uuid": short_uuid}],
+            **fields,
+        }
+        self.users[user_uuid] = user
+        self.by_short_uuid[short_uuid] = user_uuid
+        return user
+
+    def seed_users(self, count: int, first_telegram_id: int = 100000):
+        """Заполнить панель пользователями с разными сроками подписки."""
+        now = datetime.now(timezone.utc)
+        for i in range(count):
+            expire = now + timedelta(days=self.random.randint(-10, 60), hours=i % 24)
+            self.add_user(f"user_{first_telegram_id + i}", expire.isoformat(), first_telegram_id + i)
+
+    def seed_infra(self, nodes: int = 3, hosts: int = 3):
+        """Создать ноды и хосты."""
+        for i in range(nodes):
+            node_uuid = str(uuid.uuid4())
+            self.nodes[node_uuid] = {
+                "uuid": node_uuid,
+                "name": f"node-{i + 1}",
+                "address": f"10.0.0.{i + 1}",
+                "is_disabled": False,
+                "is_connected": True,
+                "users_online": 0,
+                "traffic_used_bytes": 0,
+            }
+        for i in range(hosts):
+            host_uuid = str(uuid.uuid4())
+            self.hosts[host_uuid] = {
+                "uuid": host_uuid,
+                "remark": f"host-{i + 1}",
+                "address": f"h{i + 1}.example.com",
+                "port": 443,
+                "is_disabled": False,
+            }
+
+    def seed_resources(self, count: int = 3):
+        """Создать токены, шаблоны, сниппеты, профили, провайдеров и биллинг.
+
+        Биллинг нод ссылается на уже созданные ноды (seed_infra).
+        """
+        now = datetime.now(timezone.utc)
+        for i in range(count):
+            self.add_token(f"token-{i + 1}")
+            self.add_template(f"template-{i + 1}", ("XRAY_JSON", "MIHOMO", "SINGBOX")[i % 3])
+            name = f"snippet-{i + 1}"
+            self.snippets[name] = {"name": name, "snippet": [{"remark": name}]}
+            profile_uuid = str(uuid.uuid4())
+            self.config_profiles[profile_uuid] = {
+                "uuid": profile_uuid,
+                "name": f"profile-{i + 1}",
+                "config": {"inbounds": [], "outbounds": []},
+            }
+            provider = self.add_provider(f"provider-{i + 1}")
+            self.add_billing_record(
+                provider["uuid"], 10.0 * (i + 1), (now - timedelta(days=30 * i)).isoformat()
+            )
+        providers = list(self.providers)
+        for i, node_uuid in enumerate(self.nodes):
+            if providers:
+                self.add_billing_node(
+                    providers[i % len(providers)], node_uuid,
+                    (now + timedelta(days=i + 1)).isoformat(),
+                )
+
+    def add_token(self, name: str) -> Dict:
+        token_uuid = str(uuid.uuid4())
+        token = {
+            "uuid": token_uuid,
+            "name": name,
+            "token": uuid.uuid4().hex,
+            "created_at": _now(),
+        }
+        self.tokens[token_uuid] = token
+        return token
+
+    def add_template(self, name: str, template_type: str) -> Dict:
+        template_uuid = str(uuid.uuid4())
+        template = {
+            "uuid": template_uuid,
+            "name": name,
+            "type": template_type,
+            "template": {},
+            "view_position": len(self.templates),
+        }
+        self.templates[template_uuid] = template
+        return template
+
+    def add_provider(self, name: str, favicon_link: str = "", login_url: str = "") -> Dict:
+        provider_uuid = str(uuid.uuid4())
+        provider = {
+            "uuid": provider_uuid,
+            "name": name,
+            "favicon_link": favicon_link,
+            "login_url": login_url,
+        }
+        self.providers[provider_uuid] = provider
+        return provider
+
+    def add_billing_record(self, provider_uuid: str, amount: float, billed_at: str) -> Dict:
+        record_uuid = str(uuid.uuid4())
+        record = {
+            "uuid": record_uuid,
+            "provider_uuid": provider_uuid,
+            "amount": amount,
+            "billed_at": billed_at,
+        }
+        self.billing_history[record_uuid] = record
+        return record
+
+    def add_billing_node(self, provider_uuid: str, node_uuid: str, next_billing_at: str) -> Dict:
+        record_uuid = str(uuid.uuid4())
+        record = {
+            "uuid": record_uuid,
+            "provider_uuid": provider_uuid,
+            "node_uuid": node_uuid,
+            "next_billing_at": next_billing_at,
+        }
+        self.billing_nodes[record_uuid] = record
+        return record
+
+    def _get_user(self, request: web.Request) -> Optional[Dict]:
+        return self.users.get(request.match_info["uuid"])
+
+    # Пользователи
+
+    async def list_users(self, request: web.Request) -> web.Response:
+        query = request.query
+        if "username" in query or "telegram_id" in query:
+            for user in self.users.values():
+                if "username" in query and user["username"] == query["username"]:
+                    return _ok(user)
+                if "telegram_id" in query and str(user["telegram_id"]) == query["telegram_id"]:
+                    return _ok(user)
+            return _not_found("User")
+
+        start = int(query.get("start", 0))
+        size = int(query.get("size", 100))
+        users = list(self.users.values())
+        return _ok({"users": users[start:start + size], "total": len(users)})
+
+    async def create_user(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        if any(u["username"] == data.get("username") for u in self.users.values()):
+            return web.json_response({"message": "User already exists"}, status=400)
+        user = self.add_user(
+            data.pop("username"), data.pop("expire_at"), data.pop("telegram_id", None), **data
+        )
+        return _ok(user, status=201)
+
+    async def get_user(self, request: web.Request) -> web.Response:
+        user = self._get_user(request)
+        return _ok(user) if user else _not_found("User")
+
+    async def update_user(self, request: web.Request) -> web.Response:
+        user = self._get_user(request)
+        if not user:
+            return _not_found("User")
+        user.update(await request.json())
+        return _ok(user)
+
+    async def user_action(self, request: web.Request) -> web.Response:
+        user = self._get_user(request)
+        if not user:
+            return _not_found("User")
+        action = request.match_info["action"]
+        if action == "enable":
+            user["status"] = "ACTIVE"
+        elif action == "disable":
+            user["status"] = "DISABLED"
+        elif action == "reset-traffic":
+            user["used_traffic_bytes"] = 0
+        elif action == "revoke":
+            self._revoke(user)
+        else:
+            return _not_found("Action")
+        return _ok(user)
+
+    def _revoke(self, user: Dict):
+        """Выдать новую ссылку подписки."""
+        for subscription in user["subscriptions"]:
+            self.by_short_uuid.pop(subscription["short_uuid"], None)
+        short_uuid = uuid.uuid4().hex[:16]
+        user["subscriptions"] = [{"short_uuid": short_uuid}]
+        self.by_short_uuid[short_uuid] = user["uuid"]
+
+    async def bulk_users(self, request: web.Request) -> web.Response:
+        action = request.match_info["action"]
+        if action not in self.BULK_USER_ACTIONS:
+            return _not_found("Action")
+        data = await request.json() if request.can_read_body else {}
+        if action in ("extend-all", "reset-traffic-all"):
+            targets = list(self.users.values())
+        elif action == "delete-by-status":
+            targets = [u for u in self.users.values() if u["status"] == data.get("status")]
+        else:
+            targets = [self.users[u] for u in data.get("uuids", []) if u in self.users]
+
+        for user in targets:
+            if action in ("delete", "delete-by-status"):
+                del self.users[user["uuid"]]
+                for subscription in user["subscriptions"]:
+                    self.by_short_uuid.pop(subscription["short_uuid"], None)
+            elif action == "revoke":
+                self._revoke(user)
+            elif action in ("reset-traffic", "reset-traffic-all"):
+                user["used_traffic_bytes"] = 0
+            elif action in ("extend", "extend-all"):
+                user["expire_at"] = _shift(user["expire_at"], int(data.get("days", 0)))
+            elif action == "update-status":
+                user["status"] = data.get("status", user["status"])
+        return _ok({"affected_rows": len(targets)})
+
+    async def subscription_info(self, request: web.Request) -> web.Response:
+        short_uuid = request.match_info["short_uuid"]
+        user = self.users.get(self.by_short_uuid.get(short_uuid, ""))
+        if not user:
+            return _not_found("Subscription")
+        return _ok({
+            "is_found": True,
+            "link": f"{self.public_url}/{short_uuid}",
+            "user": {
+                "short_uuid": short_uuid,
+                "username": user["username"],
+                "expires_at": user["expire_at"],
+                "user_status": user["status"],
+                "traffic_used_bytes": user["used_traffic_bytes"],
+            },
+        })
+
+    # Статистика пользователей
+
+    async def user_accessible_nodes(self, request: web.Request) -> web.Response:
+        if not self._get_user(request):
+            return _not_found("User")
+        return _ok([
+            {"uuid": node["uuid"], "name": node.get("name"), "address": node.get("address")}
+            for node in self.nodes.values()
+            if not node["is_disabled"]
+        ])
+
+    async def user_traffic_stats(self, request: web.Request) -> web.Response:
+        if not self._get_user(request):
+            return _not_found("User")
+        limit = int(request.query.get("top_nodes_limit", 10))
+        top_nodes = [
+            {"uuid": node["uuid"], "name": node.get("name"), "total_bytes": self.random.randint(0, 10**10)}
+            for node in list(self.nodes.values())[:limit]
+        ]
+        return _ok({
+            "total_bytes": sum(node["total_bytes"] for node in top_nodes),
+            "top_nodes": top_nodes,
+        })
+
+    async def user_traffic_stats_legacy(self, request: web.Request) -> web.Response:
+        if not self._get_user(request):
+            return _not_found("User")
+        return _ok([
+            {"node_uuid": node["uuid"], "node_name": node.get("name"), "total_bytes": self.random.randint(0, 10**10)}
+            for node in self.nodes.values()
+        ])
+
+    async def user_subscription_history(self, request: web.Request) -> web.Response:
+        user = self._get_user(request)
+        if not user:
+            return _not_found("User")
+        return _ok([
+            {"request_at": user["created_at"], "request_ip": "127.0.0.1", "user_agent": "fake"}
+        ])
+
+    # HWID
+
+    async def user_hwid_devices(self, request: web.Request) -> web.Response:
+        user_uuid = request.match_info["uuid"]
+        if user_uuid not in self.users:
+            return _not_found("User")
+        if request.method == "GET":
+            return _ok(self.hwid.get(user_uuid, []))
+        if request.method == "POST":
+            data = await request.json()
+            device = {"hwid": data["hwid"], "user_uuid": user_uuid, "created_at": _now()}
+            self.hwid.setdefault(user_uuid, []).append(device)
+            return _ok(device, status=201)
+        hwid = request.match_info.get("hwid")
+        devices = self.hwid.get(user_uuid, [])
+        self.hwid[user_uuid] = [d for d in devices if hwid and d["hwid"] != hwid]
+        return _ok({"deleted": len(devices) - len(self.hwid[user_uuid])})
+
+    async def all_hwid_devices(self, request: web.Request) -> web.Response:
+        devices = [d for items in self.hwid.values() for d in items]
+        start = int(request.query.get("start", 0))
+        size = int(request.query.get("size", 100))
+        return _ok({"devices": devices[start:start + size], "total": len(devices)})
+
+    async def hwid_stats(self, request: web.Request) -> web.Response:
+        total = sum(len(items) for items in self.hwid.values())
+        return _ok({
+            "total_unique_devices": total,
+            "total_users_with_devices": sum(1 for items in self.hwid.values() if items),
+        })
+
+    async def hwid_top_users(self, request: web.Request) -> web.Response:
+        limit = int(request.query.get("limit", 10))
+        top = sorted(self.hwid.items(), key=lambda item: len(item[1]), reverse=True)[:limit]
+        return _ok([{"user_uuid": user_uuid, "devices": len(items)} for user_uuid, items in top])
+
+    # Ноды и хосты
+
+    async def list_nodes(self, request: web.Request) -> web.Response:
+        return _ok(list(self.nodes.values()))
+
+    async def create_node(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        node = {"uuid": str(uuid.uuid4()), "is_disabled": False, "is_connected": True, **data}
+        self.nodes[node["uuid"]] = node
+        return _ok(node, status=201)
+
+    async def node(self, request: web.Request) -> web.Response:
+        node_uuid = request.match_info["uuid"]
+        node = self.nodes.get(node_uuid)
+        if not node:
+            return _not_found("Node")
+        if request.method == "PATCH":
+            node.update(await request.json())
+        elif request.method == "DELETE":
+            del self.nodes[node_uuid]
+        return _ok(node)
+
+    async def node_action(self, request: web.Request) -> web.Response:
+        node = self.nodes.get(request.match_info["uuid"])
+        if not node:
+            return _not_found("Node")
+        action = request.match_info["action"]
+        if action in ("enable", "disable"):
+            node["is_disabled"] = action == "disable"
+        elif action == "reset-traffic":
+            node["traffic_used_bytes"] = 0
+        return _ok(node)
+
+    async def nodes_realtime_usage(self, request: web.Request) -> web.Response:
+        return _ok([
+            {
+                "node_uuid": node["uuid"],
+                "node_name": node.get("name"),
+                "download_speed_bps": self.random.randint(0, 10**8),
+                "upload_speed_bps": self.random.randint(0, 10**7),
+            }
+            for node in self.nodes.values()
+        ])
+
+    async def nodes_usage_range(self, request: web.Request) -> web.Response:
+        limit = int(request.query.get("top_nodes_limit", 10))
+        return _ok({
+            "top_nodes": [
+                {"uuid": node["uuid"], "name": node.get("name"), "total_bytes": node.get("traffic_used_bytes", 0)}
+                for node in list(self.nodes.values())[:limit]
+            ],
+        })
+
+    async def node_users_usage(self, request: web.Request) -> web.Response:
+        if request.match_info["uuid"] not in self.nodes:
+            return _not_found("Node")
+        limit = int(request.query.get("top_users_limit", 10))
+        top = sorted(self.users.values(), key=lambda u: u["used_traffic_bytes"], reverse=True)[:limit]
+        return _ok({
+            "top_users": [
+                {"uuid": user["uuid"], "username": user["username"], "total_bytes": user["used_traffic_bytes"]}
+                for user in top
+            ],
+        })
+
+    async def bulk_nodes_profile(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        affected = 0
+        for node_uuid in data.get("node_uuids", []):
+            node = self.nodes.get(node_uuid)
+            if node:
+                node["config_profile_uuid"] = data.get("profile_uuid")
+                node["inbound_uuids"] = data.get("inbound_uuids", [])
+                affected += 1
+        return _ok({"affected_rows": affected})
+
+    async def list_hosts(self, request: web.Request) -> web.Response:
+        return _ok(list(self.hosts.values()))
+
+    async def create_host(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        host = {"uuid": str(uuid.uuid4()), "is_disabled": False, **data}
+        self.hosts[host["uuid"]] = host
+        return _ok(host, status=201)
+
+    async def host(self, request: web.Request) -> web.Response:
+        host = self.hosts.get(request.match_info["uuid"])
+        if not host:
+            return _not_found("Host")
+        if request.method == "PATCH":
+            host.update(await request.json())
+        return _ok(host)
+
+    async def hosts_action(self, request: web.Request) -> web.Response:
+        action = request.match_info["action"]
+        data = await request.json()
+        targets = [self.hosts[u] for u in data.get("uuids", []) if u in self.hosts]
+        for host in targets:
+            if action == "delete":
+                del self.hosts[host["uuid"]]
+            else:
+                host["is_disabled"] = action == "disable"
+        return _ok({"affected_rows": len(targets)})
+
+    # Токены, шаблоны, сниппеты, профили
+
+    async def list_tokens(self, request: web.Request) -> web.Response:
+        return _ok(list(self.tokens.values()))
+
+    async def create_token(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        return _ok(self.add_token(data["name"]), status=201)
+
+    async def delete_token(self, request: web.Request) -> web.Response:
+        token = self.tokens.pop(request.match_info["uuid"], None)
+        return _ok(token) if token else _not_found("Token")
+
+    async def list_templates(self, request: web.Request) -> web.Response:
+        return _ok(sorted(self.templates.values(), key=lambda t: t["view_position"]))
+
+    async def create_template(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        return _ok(self.add_template(data["name"], data["type"]), status=201)
+
+    async def template(self, request: web.Request) -> web.Response:
+        template_uuid = request.match_info["uuid"]
+        template = self.templates.get(template_uuid)
+        if not template:
+            return _not_found("Template")
+        if request.method == "PATCH":
+            template.update(await request.json())
+        elif request.method == "DELETE":
+            del self.templates[template_uuid]
+        return _ok(template)
+
+    async def reorder_templates(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        for position, template_uuid in enumerate(data.get("uuids_in_order", [])):
+            if template_uuid in self.templates:
+                self.templates[template_uuid]["view_position"] = position
+        return _ok(sorted(self.templates.values(), key=lambda t: t["view_position"]))
+
+    async def list_snippets(self, request: web.Request) -> web.Response:
+        return _ok(list(self.snippets.values()))
+
+    async def create_snippet(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        if data["name"] in self.snippets:
+            return web.json_response({"message": "Snippet already exists"}, status=400)
+        snippet = self.snippets[data["name"]] = {"name": data["name"], "snippet": data["snippet"]}
+        return _ok(snippet, status=201)
+
+    async def snippet(self, request: web.Request) -> web.Response:
+        name = request.match_info["name"]
+        snippet = self.snippets.get(name)
+        if not snippet:
+            return _not_found("Snippet")
+        if request.method == "PATCH":
+            snippet["snippet"] = (await request.json())["snippet"]
+        elif request.method == "DELETE":
+            del self.snippets[name]
+        return _ok(snippet)
+
+    async def list_config_profiles(self, request: web.Request) -> web.Response:
+        return _ok(list(self.config_profiles.values()))
+
+    async def config_profile_computed(self, request: web.Request) -> web.Response:
+        profile = self.config_profiles.get(request.match_info["uuid"])
+        if not profile:
+            return _not_found("Config profile")
+        return _ok({**profile, "snippets": list(self.snippets)})
+
+    # Провайдеры и биллинг
+
+    def _with_names(self, record: Dict) -> Dict:
+        """Запись биллинга с именами провайдера и ноды, как в ответах панели."""
+        provider = self.providers.get(record["provider_uuid"]) or {}
+        result = {**record, "provider_name": provider.get("name")}
+        if "node_uuid" in record:
+            result["node_name"] = (self.nodes.get(record["node_uuid"]) or {}).get("name")
+        return result
+
+    async def list_providers(self, request: web.Request) -> web.Response:
+        return _ok(list(self.providers.values()))
+
+    async def create_provider(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        provider = self.add_provider(
+            data["name"], data.get("favicon_link", ""), data.get("login_url", "")
+        )
+        return _ok(provider, status=201)
+
+    async def provider(self, request: web.Request) -> web.Response:
+        provider_uuid = request.match_info["uuid"]
+        provider = self.providers.get(provider_uuid)
+        if not provider:
+            return _not_found("Provider")
+        if request.method == "PATCH":
+            provider.update(await request.json())
+        elif request.method == "DELETE":
+            del self.providers[provider_uuid]
+        return _ok(provider)
+
+    async def list_billing_history(self, request: web.Request) -> web.Response:
+        return _ok([self._with_names(record) for record in self.billing_history.values()])
+
+    async def create_billing_record(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        if data["provider_uuid"] not in self.providers:
+            return _not_found("Provider")
+        record = self.add_billing_record(data["provider_uuid"], data["amount"], data["billed_at"])
+        return _ok(self._with_names(record), status=201)
+
+    async def delete_billing_record(self, request: web.Request) -> web.Response:
+        record = self.billing_history.pop(request.match_info["uuid"], None)
+        return _ok(record) if record else _not_found("Billing record")
+
+    async def list_billing_nodes(self, request: web.Request) -> web.Response:
+        return _ok([self._with_names(record) for record in self.billing_nodes.values()])
+
+    async def create_billing_node(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        if data["provider_uuid"] not in self.providers:
+            return _not_found("Provider")
+        if data["node_uuid"] not in self.nodes:
+            return _not_found("Node")
+        record = self.add_billing_node(
+            data["provider_uuid"], data["node_uuid"], data["next_billing_at"]
+        )
+        return _ok(self._with_names(record), status=201)
+
+    async def update_billing_nodes(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        targets = [self.billing_nodes[u] for u in data.get("uuids", []) if u in self.billing_nodes]
+        for record in targets:
+            record["next_billing_at"] = data["next_billing_at"]
+        return _ok({"affected_rows": len(targets)})
+
+    async def delete_billing_node(self, request: web.Request) -> web.Response:
+        record = self.billing_nodes.pop(request.match_info["uuid"], None)
+        return _ok(record) if record else _not_found("Billing node")
+
+    # Система
+
+    async def health(self, request: web.Request) -> web.Response:
+        return _ok({"status": "ok", "fake": True})
+
+    async def stats(self, request: web.Request) -> web.Response:
+        statuses = Counter(user["status"] for user in self.users.values())
+        return _ok({
+            "users": {"total_users": len(self.users), "status_counts": dict(statuses)},
+            "nodes": {"total_online": sum(1 for n in self.nodes.values() if not n["is_disabled"])},
+        })
+
+    async def bandwidth(self, request: web.Request) -> web.Response:
+        used = sum(user["used_traffic_bytes"] for user in self.users.values())
+        return _ok({"bandwidth_last_two_days": {"current": used, "previous": 0}})
+
+    async def encrypt_happ_link(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        return _ok({"encrypted_link": f"happ://crypt/{data['link_to_encrypt'].encode().hex()}"})
+
+    async def squads(self, request: web.Request) -> web.Response:
+        return _ok([])
+
+    # Управление фейком
+
+    async def fake_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "users": len(self.users),
+            "requests": dict(self.requests.most_common()),
+            "injected": dict(self.injected),
+        })
+
+    async def fake_config(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        for name in ("latency", "jitter", "error_rate", "throttle_rps"):
+            if name in data:
+                setattr(self, name, float(data[name]))
+        if data.get("reset_stats"):
+            self.requests.clear()
+            self.injected.clear()
+        return web.json_response({
+            name: getattr(self, name) for name in ("latency", "jitter", "error_rate", "throttle_rps")
+        })
+
+    def create_app(self) -> web.Application:
+        """aiohttp приложение с маршрутами Remnawave API."""
+        app = web.Application(middlewares=[self.middleware])
+        app.add_routes([
+            web.get("/api/users", self.list_users),
+            web.post("/api/users", self.create_user),
+            web.post("/api/users/bulk/{action}", self.bulk_users),
+            web.get("/api/users/{uuid}", self.get_user),
+            web.patch("/api/users/{uuid}", self.update_user),
+            web.post("/api/users/{uuid}/actions/{action}", self.user_action),
+            web.get("/api/users/{uuid}/hwid-devices", self.user_hwid_devices),
+            web.post("/api/users/{uuid}/hwid-devices", self.user_hwid_devices),
+            web.delete("/api/users/{uuid}/hwid-devices", self.user_hwid_devices),
+            web.delete("/api/users/{uuid}/hwid-devices/{hwid}", self.user_hwid_devices),
+            web.get("/api/users/{uuid}/accessible-nodes", self.user_accessible_nodes),
+            web.get("/api/users/{uuid}/traffic-stats", self.user_traffic_stats),
+            web.get("/api/users/{uuid}/traffic-stats-legacy", self.user_traffic_stats_legacy),
+            web.get("/api/users/{uuid}/subscription-request-history", self.user_subscription_history),
+            web.get("/api/sub/{short_uuid}/info", self.subscription_info),
+            web.get("/api/hwid/devices", self.all_hwid_devices),
+            web.get("/api/hwid/devices/stats", self.hwid_stats),
+            web.get("/api/hwid/devices/top-users", self.hwid_top_users),
+            web.get("/api/nodes", self.list_nodes),
+            web.post("/api/nodes", self.create_node),
+            web.get("/api/nodes/realtime-usage", self.nodes_realtime_usage),
+            web.get("/api/nodes/usage-range", self.nodes_usage_range),
+            web.post("/api/nodes/bulk/profile-modification", self.bulk_nodes_profile),
+            web.get("/api/nodes/{uuid}", self.node),
+            web.patch("/api/nodes/{uuid}", self.node),
+            web.delete("/api/nodes/{uuid}", self.node),
+            web.post("/api/nodes/{uuid}/actions/{action}", self.node_action),
+            web.get("/api/nodes/{uuid}/users-usage", self.node_users_usage),
+            web.get("/api/hosts", self.list_hosts),
+            web.post("/api/hosts", self.create_host),
+            web.post("/api/hosts/actions/{action}", self.hosts_action),
+            web.post("/api/hosts/bulk/{action}", self.hosts_action),
+            web.get("/api/hosts/{uuid}", self.host),
+            web.patch("/api/hosts/{uuid}", self.host),
+            web.get("/api/tokens", self.list_tokens),
+            web.post("/api/tokens", self.create_token),
+            web.delete("/api/tokens/{uuid}", self.delete_token),
+            web.get("/api/templates", self.list_templates),
+            web.post("/api/templates", self.create_template),
+            web.post("/api/templates/reorder", self.reorder_templates),
+            web.get("/api/templates/{uuid}", self.template),
+            web.patch("/api/templates/{uuid}", self.template),
+            web.delete("/api/templates/{uuid}", self.template),
+            web.get("/api/snippets", self.list_snippets),
+            web.post("/api/snippets", self.create_snippet),
+            web.patch("/api/snippets/{name}", self.snippet),
+            web.delete("/api/snippets/{name}", self.snippet),
+            web.get("/api/config-profiles", self.list_config_profiles),
+            web.get("/api/config-profiles/{uuid}/computed", self.config_profile_computed),
+            web.get("/api/infra/providers", self.list_providers),
+            web.post("/api/infra/providers", self.create_provider),
+            web.get("/api/infra/providers/{uuid}", self.provider),
+            web.patch("/api/infra/providers/{uuid}", self.provider),
+            web.delete("/api/infra/providers/{uuid}", self.provider),
+            web.get("/api/infra/billing/history", self.list_billing_history),
+            web.post("/api/infra/billing/history", self.create_billing_record),
+            web.delete("/api/infra/billing/history/{uuid}", self.delete_billing_record),
+            web.get("/api/infra/billing/nodes", self.list_billing_nodes),
+            web.post("/api/infra/billing/nodes", self.create_billing_node),
+            web.patch("/api/infra/billing/nodes", self.update_billing_nodes),
+            web.delete("/api/infra/billing/nodes/{uuid}", self.delete_billing_node),
+            web.get("/api/system/health", self.health),
+            web.get("/api/system/stats", self.stats),
+            web.get("/api/system/bandwidth", self.bandwidth),
+            web.post("/api/system/encrypt-happ-crypto-link", self.encrypt_happ_link),
+            web.get("/api/squads/internal", self.squads),
+            web.get("/api/squads/external", self.squads),
+            web.get("/_fake/stats", self.fake_stats),
+            web.post("/_fake/config", self.fake_config),
+        ])
+        return app
+
+
+async def start_fake_remnawave(
+    fake: FakeRemnawave, host: str = "127.0.0.1", port: int = 0
+) -> web.AppRunner:
+    """Запустить фейк в текущем event loop; адрес - в runner.addresses."""
+    runner = web.AppRunner(fake.create_app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+async def serve(args: argparse.Namespace):
+    """Запустить сервер до прерывания."""
+    fake = FakeRemnawave(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rps=args.throttle_rps,
+        token=args.token,
+        seed=args.seed,
+    )
+    fake.seed_users(args.users)
+    fake.seed_infra()
+    fake.seed_resources()
+    runner = await start_fake_remnawave(fake, args.host, args.port)
+    print(f"Fake Remnawave on http://{args.host}:{args.port} ({len(fake.users)} users)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    """Точка входа."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3010)
+    parser.add_argument("--latency", type=float, default=0.0, help="базовая задержка, с")
+    parser.add_argument("--jitter", type=float, default=0.0, help="случайная добавка к задержке, с")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов 5xx (0..1)")
+    parser.add_argument("--throttle-rps", type=float, default=0.0, help="лимит запросов в секунду (0 - без лимита)")
+    parser.add_argument("--token", default="", help="ожидаемый Bearer токен (пусто - не проверять)")
+    parser.add_argument("--users", type=int, default=0, help="сколько пользователей создать заранее")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""Локальная замена Telegram Bot API для сквозных бенчмарков.
+
+Запуск: python -m benchmarks.fake_telegram --port 8081 \\
+    --latency 0.03 --flood-rate 0.001 --chat-rate 1
+
+Затем в .env бота: TELEGRAM_API_URL=http://127.0.0.1:8081
+
+Вызовы записываются (метод, параметры, время), ответы строятся так же,
+как у Bot API: сообщения с растущими message_id, True для
+answerCallbackQuery/deleteMessage, ссылка для createInvoiceLink, ошибка
+"message is not modified" для повторного edit с тем же содержимым.
+Настраиваются задержка, доля ответов 429 и лимит сообщений в секунду на
+чат (как у Telegram). Для запуска без HTTP есть ``RecordingSession`` -
+сессия aiogram, которая отдает запросы тому же ``FakeBotApi`` в процессе.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod
+from aiohttp import web
+
+# Методы, которые отправляют новое сообщение
+SEND_METHODS = {
+    "sendMessage", "sendPhoto", "sendDocument", "sendVideo", "sendAnimation",
+    "sendAudio", "sendVoice", "sendSticker", "sendInvoice", "sendLocation",
+    "copyMessage", "forwardMessage",
+}
+EDIT_METHODS = {"editMessageText", "editMessageCaption", "editMessageReplyMarkup", "editMessageMedia"}
+
+# Параметры, которые aiogram передает строкой JSON
+_JSON_PARAMS = {"reply_markup", "entities", "caption_entities", "prices", "photo", "link_preview_options"}
+
+
+class RecordedCall(NamedTuple):
+    """Записанный вызов Bot API."""
+
+    method: str
+    params: Dict[str, Any]
+    at: float
+
+
+class FakeBotApi:
+    """Ответы Bot API, запись вызовов и внедрение задержек/flood wait."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        flood_rate: float = 0.0,
+        chat_rate: float = 0.0,
+        retry_after: int = 1,
+        max_recorded: int = 100000,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.flood_rate = flood_rate
+        self.chat_rate = chat_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+
+        self.calls: Deque[RecordedCall] = deque(maxlen=max_recorded)
+        self.counts: Counter = Counter()
+        self.floods = 0
+        self.pending_updates: Deque[Dict] = deque()
+
+        self._message_ids: Dict[int, int] = {}
+        self._contents: Dict[Tuple[int, int], Tuple[Any, Any]] = {}
+        self._chat_sent: Dict[int, Tuple[float, float]] = {}
+        self._invoices = 0
+
+    # Внедрение сбоев
+
+    def _chat_allowed(self, chat_id: int) -> bool:
+        """Token bucket на chat_rate сообщений в секунду для чата.
+
+        Емкость не меньше одного сообщения: при chat_rate < 1 токены копятся
+        дробно, и чат может писать раз в 1/chat_rate секунд.
+        """
+        if self.chat_rate <= 0:
+            return True
+        capacity = max(1.0, self.chat_rate)
+        now = time.monotonic()
+        tokens, updated = self._chat_sent.get(chat_id, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * self.chat_rate)
+        if tokens < 1:
+            self._chat_sent[chat_id] = (tokens, now)
+            return False
+        self._chat_sent[chat_id] = (tokens - 1, now)
+        return True
+
+    def _flood(self, method: str) -> Tuple[int, Dict]:
+        self.floods += 1
+        self.counts[f"{method}:429"] += 1
+        return 429, {
+            "ok": False,
+            "error_code": 429,
+            "description": f"Too Many Requests: retry after {self.retry_after}",
+            "parameters": {"retry_after": self.retry_after},
+        }
+
+    @staticmethod
+    def _error(code: int, description: str) -> Tuple[int, Dict]:
+        return code, {"ok": False, "error_code": code, "description": description}
+
+    # Ответы
+
+    def _message(self, chat_id: int, message_id: Optional[int], params: Dict) -> Dict:
+        """Объект Message для ответа на send/edit."""
+        if message_id is None:
+            message_id = self._message_ids.get(chat_id, 0) + 1
+            self._message_ids[chat_id] = message_id
+        message: Dict[str, Any] = {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "supergroup"},
+            "from": {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_bot"},
+        }
+        if params.get("text"):
+            message["text"] = params["text"]
+        if params.get("caption"):
+            message["caption"] = params["caption"]
+        if isinstance(params.get("reply_markup"), dict) and "inline_keyboard" in params["reply_markup"]:
+            message["reply_markup"] = params["reply_markup"]
+        return message
+
+    async def call(self, method: str, params: Dict[str, Any]) -> Tuple[int, Dict]:
+        """Обработать вызов: (HTTP статус, тело ответа)."""
+        self.calls.append(RecordedCall(method, params, time.time()))
+        self.counts[method] += 1
+
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if method == "getUpdates":
+            return 200, {"ok": True, "result": await self._get_updates(params)}
+
+        chat_id = params.get("chat_id")
+        if isinstance(chat_id, str) and chat_id.lstrip("-").isdigit():
+            chat_id = int(chat_id)
+        if method in SEND_METHODS or method in EDIT_METHODS:
+            if self.flood_rate and self.random.random() < self.flood_rate:
+                return self._flood(method)
+            if chat_id is not None and not self._chat_allowed(chat_id):
+                return self._flood(method)
+
+        if method in SEND_METHODS:
+            message = self._message(chat_id, None, params)
+            self._contents[(chat_id, message["message_id"])] = (
+                params.get("text") or params.get("caption"), params.get("reply_markup")
+            )
+            return 200, {"ok": True, "result": message}
+
+        if method in EDIT_METHODS:
+            if params.get("inline_message_id"):
+                return 200, {"ok": True, "result": True}
+            key = (chat_id, int(params["message_id"]))
+            old_text, old_markup = self._contents.get(key, (None, None))
+            text = old_text if method == "editMessageReplyMarkup" else (
+                params.get("text") or params.get("caption")
+            )
+            markup = params.get("reply_markup")
+            if (text, markup) == (old_text, old_markup):
+                return self._error(
+                    400,
+                    "Bad Request: message is not modified: specified new message content "
+                    "and reply markup are exactly the same as a current content and reply "
+                    "markup of the message",
+                )
+            self._contents[key] = (text, markup)
+            return 200, {"ok": True, "result": self._message(chat_id, key[1], {**params, "text": text})}
+
+        return 200, {"ok": True, "result": self._simple_result(method, params)}
+
+    def _simple_result(self, method: str, params: Dict[str, Any]) -> Any:
+        """Ответ методов, не связанных с сообщениями."""
+        if method == "getMe":
+            return {
+                "id": 1,
+                "is_bot": True,
+                "first_name": "Fake",
+                "username": "fake_bot",
+                "can_join_groups": True,
+                "can_read_all_group_messages": False,
+                "supports_inline_queries": False,
+            }
+        if method == "createInvoiceLink":
+            self._invoices += 1
+            return f"https://t.me/$fake_invoice_{self._invoices}"
+        if method == "getWebhookInfo":
+            return {"url": "", "has_custom_certificate": False, "pending_update_count": 0}
+        if method == "getChat":
+            return {"id": int(params.get("chat_id", 0)), "type": "private"}
+        # answerCallbackQuery, deleteMessage(s), answerPreCheckoutQuery, setWebhook...
+        return True
+
+    async def _get_updates(self, params: Dict[str, Any]) -> List[Dict]:
+        """Отдать накопленные апдейты (long polling до 1 секунды)."""
+        if not self.pending_updates:
+            await asyncio.sleep(min(float(params.get("timeout") or 0), 1.0))
+        limit = int(params.get("limit") or 100)
+        return [self.pending_updates.popleft() for _ in range(min(limit, len(self.pending_updates)))]
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики вызовов по методам."""
+        return {"calls": dict(self.counts.most_common()), "floods": self.floods}
+
+    # HTTP
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """POST /bot<token>/<method> в формате Bot API."""
+        if request.content_type == "application/json":
+            params = await request.json()
+        else:
+            params = {}
+            for key, value in (await request.post()).items():
+                if key in _JSON_PARAMS and isinstance(value, str):
+                    try:
+                        value = json.loads(value)
+                    except ValueError:
+                        pass
+                params[key] = value
+        status, payload = await self.call(request.match_info["method"], params)
+        return web.json_response(payload, status=status)
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+    async def handle_updates(self, request: web.Request) -> web.Response:
+        """Поставить апдейты в очередь getUpdates (объект или список)."""
+        data = await request.json()
+        updates = data if isinstance(data, list) else [data]
+        self.pending_updates.extend(updates)
+        return web.json_response({"queued": len(updates)})
+
+    def create_app(self) -> web.Application:
+        """aiohttp приложение Bot API."""
+        app = web.Application(client_max_size=50 * 1024 * 1024)
+        app.add_routes([
+            web.post("/bot{token}/{method}", self.handle),
+            web.get("/bot{token}/{method}", self.handle),
+            web.get("/_fake/stats", self.handle_stats),
+            web.post("/_fake/updates", self.handle_updates),
+        ])
+        return app
+
+
+class RecordingSession(BaseSession):
+    """Сессия aiogram, отправляющая запросы в FakeBotApi без сети.
+
+    Параметры сериализуются так же, как в AiohttpSession, а ответ проходит
+    обычную проверку ``check_response``, поэтому исключения (flood wait,
+    "message is not modified") совпадают с настоящими.
+    """
+
+    def __init__(self, api: Optional[FakeBotApi] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.fake = api or FakeBotApi()
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: Optional[int] = None):
+        params: Dict[str, Any] = {}
+        for key, value in method.model_dump(warnings=False).items():
+            value = self.prepare_value(value, bot=bot, files={})
+            if not value:
+                continue
+            if key in _JSON_PARAMS and isinstance(value, str):
+                value = json.loads(value)
+            params[key] = value
+        status, payload = await self.fake.call(method.__api_method__, params)
+        response = self.check_response(
+            bot=bot, method=method, status_code=status, content=json.dumps(payload)
+        )
+        return response.result
+
+    async def stream_content(self, url: str, headers=None, timeout: int = 30, chunk_size: int = 65536, raise_for_status: bool = True):
+        yield b""
+
+    async def close(self):
+        pass
+
+
+async def start_fake_telegram(
+    api: FakeBotApi, host: str = "127.0.0.1", port: int = 0
+) -> web.AppRunner:
+    """Запустить фейк в текущем event loop."""
+    runner = web.AppRunner(api.create_app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+async def serve(args: argparse.Namespace):
+    """Запустить сервер до прерывания."""
+    api = FakeBotApi(
+        latency=args.latency,
+        jitter=args.jitter,
+        flood_rate=args.flood_rate,
+        chat_rate=args.chat_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    runner = await start_fake_telegram(api, args.host, args.port)
+    print(f"Fake Bot API on http://{args.host}:{args.port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    """Точка входа."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="базовая задержка, с")
+    parser.add_argument("--jitter", type=float, default=0.0, help="случайная добавка к задержке, с")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="доля ответов 429 на send/edit (0..1)")
+    parser.add_argument("--chat-rate", type=float, default=0.0, help="сообщений в секунду на чат (0 - без лимита)")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry_after в ответах 429, с")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Микро-бенчмарк поиска переводов и отчет о недостающих ключах.
+
+Запуск: python -m benchmarks.i18n_lookup
+"""
+import json
+import timeit
+from pathlib import Path
+from typing import Any, Dict
+
+from src.utils.i18n import JsonI18n
+
+LOCALES_PATH = Path(__file__).parent.parent / "locales"
+
+# Ключи, которые запрашиваются при отрисовке user_settings и main_menu_keyboard
+KEYS = [
+    "user.settings",
+    "common.yes",
+    "common.no",
+    "user.change_language",
+    "user.toggle_auto_renewal",
+    "user.referral",
+    "nav.back",
+    "user_menu.connect",
+    "user_menu.my_access",
+    "user_menu.settings",
+    "user_menu.support",
+    "menu.section.users",
+    "missing.key.fallback",
+]
+
+
+def _nested_gettext(catalog: Dict[str, Any], message: str) -> str:
+    """Прежний поиск: разбор ключа и обход вложенных словарей."""
+    value = catalog
+    for key in message.split("."):
+        if isinstance(value, dict):
+            value = value.get(key)
+        else:
+            break
+    if value and isinstance(value, str):
+        return value
+    return message
+
+
+def main(number: int = 100_000):
+    """Сравнить стоимость поиска и вывести отчет."""
+    i18n = JsonI18n(path=str(LOCALES_PATH), default_locale="ru")
+    with open(LOCALES_PATH / "ru" / "messages.json", "r", encoding="utf-8") as f:
+        nested = json.load(f)
+    flat = i18n.locales["ru"]
+
+    nested_time = timeit.timeit(
+        lambda: [_nested_gettext(nested, key) for key in KEYS], number=number
+    )
+    flat_time = timeit.timeit(
+        lambda: [flat.gettext(key) for key in KEYS], number=number
+    )
+    lookups = number * len(KEYS)
+
+    print(f"Lookups: {lookups}")
+    print(f"nested: {nested_time / lookups * 1e9:.1f} ns/lookup")
+    print(f"flat:   {flat_time / lookups * 1e9:.1f} ns/lookup")
+    print(f"speedup: {nested_time / flat_time:.2f}x")
+
+    missing = i18n.missing_keys()
+    if not missing:
+        print("All locales have the same keys")
+    for locale, keys in missing.items():
+        print(f"Locale '{locale}' is missing {len(keys)} keys:")
+        for key in keys:
+            print(f"  - {key}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+"""Сквозной нагрузочный бенчмарк диспетчера на синтетическом трафике.
+
+Запуск: python -m benchmarks.load --users 2000 --concurrency 200 \\
+    --mix start=3,my_access=2,settings=2,purchase=1,trial=1
+
+Собирает тот же ``Dispatcher``, что и ``main()`` (все роутеры и
+middleware), бот работает через ``RecordingSession``, панель - через
+фейковый Remnawave в том же процессе, БД - временный файл SQLite.
+Каждый синтетический пользователь проходит свой сценарий шаг за шагом,
+одновременно активны не более ``--concurrency`` пользователей.
+Результат: апдейты в секунду, p50/p95/p99 по обработчикам и пиковый RSS.
+
+Ограничение частоты (THROTTLE_RATE) по умолчанию выключено, иначе
+сценарии без пауз упираются в лимит; ``--keep-throttling`` оставляет его.
+Оплата через YooKassa не участвует: она обращается к внешнему API.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.fake_remnawave import FakeRemnawave, start_fake_remnawave
+from benchmarks.fake_telegram import FakeBotApi, RecordingSession
+
+# Шаг сценария: (вид апдейта, данные)
+Step = Tuple[str, Optional[str]]
+
+SCENARIOS: Dict[str, List[Step]] = {
+    "start": [
+        ("message", "/start"),
+        ("callback", "user:connect"),
+        ("callback", "nav:main"),
+    ],
+    "my_access": [
+        ("message", "/start"),
+        ("callback", "user:my_access"),
+        ("callback", "nav:main"),
+    ],
+    "settings": [
+        ("message", "/start"),
+        ("callback", "user:settings"),
+        ("callback", "user:change_language"),
+        ("callback", "lang:en"),
+        ("callback", "auto_renewal:toggle"),
+        ("callback", "lang:ru"),
+        ("callback", "user:referral"),
+    ],
+    "trial": [
+        ("message", "/start"),
+        ("callback", "user:connect"),
+        ("callback", "user:trial"),
+        ("callback", "user:my_access"),
+    ],
+    "purchase": [
+        ("message", "/start"),
+        ("callback", "user:buy"),
+        ("callback", "purchase:1"),
+        ("callback", "purchase:1:method:stars"),
+        ("pre_checkout", None),
+        ("successful_payment", None),
+        ("callback", "user:my_access"),
+    ],
+}
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Разобрать --mix вида name=weight,name=weight."""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(
+                f"unknown scenario {name!r}, expected one of {', '.join(SCENARIOS)}"
+            )
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """Перцентиль по отсортированному списку."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))
+    return sorted_values[index]
+
+
+def peak_rss_mb() -> float:
+    """Пиковый RSS процесса, МБ."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux возвращает килобайты, macOS - байты
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class LoadBotApi(FakeBotApi):
+    """FakeBotApi, запоминающий последний invoice каждого пользователя."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.invoices: Dict[int, Tuple[str, int]] = {}
+
+    def _simple_result(self, method: str, params: Dict[str, Any]) -> Any:
+        if method == "createInvoiceLink":
+            user_id = json.loads(params["payload"])["user_id"]
+            self.invoices[user_id] = (params["payload"], params["prices"][0]["amount"])
+        return super()._simple_result(method, params)
+
+
+class LatencyRecorder:
+    """Inner middleware: длительность каждого обработчика."""
+
+    def __init__(self, name_of: Callable[[dict], str]):
+        self.name_of = name_of
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    async def __call__(self, handler, event, data):
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            self.samples[self.name_of(data)].append(time.perf_counter() - started)
+
+
+class UpdateFactory:
+    """Синтетические апдейты Telegram."""
+
+    def __init__(self, api: LoadBotApi):
+        self.api = api
+        self.update_id = 0
+
+    def _user(self, user_id: int, language: str) -> Dict[str, Any]:
+        return {
+            "id": user_id,
+            "is_bot": False,
+            "first_name": f"User{user_id}",
+            "username": f"user{user_id}",
+            "language_code": language,
+        }
+
+    def _message_base(self, user_id: int, language: str) -> Dict[str, Any]:
+        return {
+            "message_id": self.update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": self._user(user_id, language),
+        }
+
+    def build(self, step: Step, user_id: int, language: str) -> Optional[Dict[str, Any]]:
+        """Апдейт для шага сценария (None, если шаг невозможен)."""
+        self.update_id += 1
+        kind, data = step
+        update: Dict[str, Any] = {"update_id": self.update_id}
+
+        if kind == "message":
+            update["message"] = {**self._message_base(user_id, language), "text": data}
+        elif kind == "callback":
+            # Callback приходит от последнего сообщения бота в чате
+            message_id = self.api._message_ids.get(user_id, 1)
+            update["callback_query"] = {
+                "id": str(self.update_id),
+                "chat_instance": str(user_id),
+                "from": self._user(user_id, language),
+                "data": data,
+                "message": {
+                    "message_id": message_id,
+                    "date": int(time.time()),
+                    "chat": {"id": user_id, "type": "private"},
+                    "from": {"id": 1, "is_bot": True, "first_name": "Fake"},
+                    "text": "menu",
+                },
+            }
+        else:
+            invoice = self.api.invoices.get(user_id)
+            if invoice is None:
+                return None
+            payload, amount = invoice
+            if kind == "pre_checkout":
+                update["pre_checkout_query"] = {
+                    "id": str(self.update_id),
+                    "from": self._user(user_id, language),
+                    "currency": "XTR",
+                    "total_amount": amount,
+                    "invoice_payload": payload,
+                }
+            else:
+                update["message"] = {
+                    **self._message_base(user_id, language),
+                    "successful_payment": {
+                        "currency": "XTR",
+                        "total_amount": amount,
+                        "invoice_payload": payload,
+                        "telegram_payment_charge_id": f"charge_{self.update_id}",
+                        "provider_payment_charge_id": f"provider_{self.update_id}",
+                    },
+                }
+        return update
+
+
+class Stack:
+    """Бот, диспетчер и фейки для прогона."""
+
+    def __init__(self, bot, dp, api: LoadBotApi, panel: FakeRemnawave, panel_runner, recorder: LatencyRecorder):
+        self.bot = bot
+        self.dp = dp
+        self.api = api
+        self.panel = panel
+        self.panel_runner = panel_runner
+        self.recorder = recorder
+
+    async def feed(self, raw: Dict[str, Any]):
+        """Передать сырой апдейт диспетчеру."""
+        from aiogram.types import Update
+
+        await self.dp.feed_update(self.bot, Update.model_validate(raw, context={"bot": self.bot}))
+
+    async def close(self):
+        await self.panel_runner.cleanup()
+        await self.bot.session.close()
+
+
+def prepare_environment(prefix: str = "remnabuy-load-"):
+    """Временная БД и заглушки обязательных настроек (до импорта src)."""
+    workdir = tempfile.mkdtemp(prefix=prefix)
+    os.environ["DB_PATH"] = os.path.join(workdir, "bot.db")
+    os.environ.setdefault("BOT_TOKEN", "123456:load-test")
+    os.environ.setdefault("API_BASE_URL", "http://127.0.0.1")
+    os.environ.setdefault("API_TOKEN", "load-test")
+    os.environ.setdefault("ADMINS", "1")
+    # Запись апдейтов во время прогона не нужна
+    os.environ["UPDATE_CAPTURE_ENABLED"] = "false"
+
+
+async def start_stack(
+    api_latency: float = 0.0,
+    tg_latency: float = 0.0,
+    keep_throttling: bool = False,
+    seed: Optional[int] = None,
+) -> Stack:
+    """Собрать диспетчер как в main() с фейковыми Remnawave и Bot API."""
+    # Импорт после настройки окружения: DB_PATH читается при импорте
+    from src.config import get_settings
+    from src.database import init_database
+    from src.main import create_bot, create_dispatcher
+    from src.utils.instrumentation import handler_name
+
+    panel = FakeRemnawave(latency=api_latency, seed=seed)
+    panel_runner = await start_fake_remnawave(panel)
+    host, port = panel_runner.addresses[0][:2]
+
+    settings = get_settings()
+    settings.API_BASE_URL = f"http://{host}:{port}"
+    if not keep_throttling:
+        settings.THROTTLE_RATE = 0
+
+    init_database()
+    api = LoadBotApi(latency=tg_latency, seed=seed)
+    bot = create_bot(RecordingSession(api))
+    dp = create_dispatcher()
+
+    recorder = LatencyRecorder(handler_name)
+    dp.message.middleware(recorder)
+    dp.callback_query.middleware(recorder)
+    dp.pre_checkout_query.middleware(recorder)
+    return Stack(bot, dp, api, panel, panel_runner, recorder)
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 в миллисекундах."""
+    samples = sorted(samples)
+    return {
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+    }
+
+
+def handler_report(recorder: LatencyRecorder) -> Dict[str, Dict[str, float]]:
+    """Число вызовов и перцентили по обработчикам."""
+    return {
+        name: {"count": len(samples), **latency_summary(samples)}
+        for name, samples in recorder.samples.items()
+    }
+
+
+def print_handlers(handlers: Dict[str, Dict[str, float]]):
+    """Таблица обработчиков, самые медленные сверху."""
+    print(f"{'handler':<32}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, row in sorted(handlers.items(), key=lambda item: -item[1]["p99_ms"]):
+        print(
+            f"{name:<32}{row['count']:>8}{row['p50_ms']:>10.2f}"
+            f"{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+        )
+
+
+async def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    """Прогнать сценарии и собрать статистику."""
+    stack = await start_stack(args.api_latency, args.tg_latency, args.keep_throttling, args.seed)
+    api = stack.api
+
+    rng = random.Random(args.seed)
+    names = list(args.mix)
+    weights = [args.mix[name] for name in names]
+    factory = UpdateFactory(api)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    update_latency: List[float] = []
+    errors: Counter = Counter()
+    scenarios: Counter = Counter()
+    skipped = 0
+
+    async def simulate(user_id: int, scenario: str, language: str):
+        nonlocal skipped
+        async with semaphore:
+            for step in SCENARIOS[scenario]:
+                raw = factory.build(step, user_id, language)
+                if raw is None:
+                    skipped += 1
+                    continue
+                started = time.perf_counter()
+                try:
+                    await stack.feed(raw)
+                except Exception as e:
+                    errors[type(e).__name__] += 1
+                update_latency.append(time.perf_counter() - started)
+                if args.think:
+                    await asyncio.sleep(rng.uniform(0, args.think))
+
+    tasks = []
+    for i in range(args.users):
+        scenario = rng.choices(names, weights)[0]
+        scenarios[scenario] += 1
+        language = "en" if rng.random() < 0.3 else "ru"
+        tasks.append(simulate(args.first_user_id + i, scenario, language))
+
+    started = time.perf_counter()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    await stack.close()
+
+    return {
+        "users": args.users,
+        "updates": len(update_latency),
+        "elapsed_s": elapsed,
+        "updates_per_s": len(update_latency) / elapsed if elapsed else 0.0,
+        **{f"update_{key}": value for key, value in latency_summary(update_latency).items()},
+        "handlers": handler_report(stack.recorder),
+        "scenarios": dict(scenarios),
+        "errors": dict(errors),
+        "skipped_steps": skipped,
+        "bot_api_calls": dict(api.counts.most_common()),
+        "panel_requests": sum(stack.panel.requests.values()),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def print_report(result: Dict[str, Any]):
+    """Вывести отчет."""
+    print(
+        f"{result['updates']} updates from {result['users']} users in "
+        f"{result['elapsed_s']:.2f}s: {result['updates_per_s']:.0f} updates/s"
+    )
+    print(
+        f"Update latency: p50 {result['update_p50_ms']:.2f} ms, "
+        f"p95 {result['update_p95_ms']:.2f} ms, p99 {result['update_p99_ms']:.2f} ms"
+    )
+    print(f"Peak RSS: {result['peak_rss_mb']:.1f} MB")
+    print(f"Scenarios: {result['scenarios']}")
+    print(f"Bot API calls: {result['bot_api_calls']}")
+    print(f"Panel requests: {result['panel_requests']}")
+    if result["errors"] or result["skipped_steps"]:
+        print(f"Errors: {result['errors']}, skipped steps: {result['skipped_steps']}")
+    print()
+    print_handlers(result["handlers"])
+
+
+def main():
+    """Точка входа."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100, help="одновременно активных пользователей")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("start=3,my_access=2,settings=2,purchase=1,trial=1"))
+    parser.add_argument("--think", type=float, default=0.0, help="максимальная пауза между шагами, с")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="задержка фейкового Remnawave, с")
+    parser.add_argument("--tg-latency", type=float, default=0.0, help="задержка фейкового Bot API, с")
+    parser.add_argument("--keep-throttling", action="store_true", help="не отключать THROTTLE_RATE")
+    parser.add_argument("--first-user-id", type=int, default=10_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_path", help="сохранить результат в JSON")
+    parser.add_argument("--log-level", default="ERROR", help="уровень логов бота во время прогона")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper())
+
+    prepare_environment()
+    result = asyncio.run(run_load(args))
+    print_report(result)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""Микро-бенчмарки форматтеров, i18n и клавиатур с базовой линией.
+
+Запуск:
+    python -m benchmarks.micro                          # замер
+    python -m benchmarks.micro --save baseline.json     # сохранить базовую линию
+    python -m benchmarks.micro --compare baseline.json  # сравнить с ней
+    python -m benchmarks.micro --filter escape          # только часть кейсов
+
+Каждый кейс замеряется как в timeit: число повторов подбирается так, чтобы
+один прогон шел не меньше 0.2 с, прогон повторяется ``--repeat`` раз (GC
+выключен), в отчет идет минимум - он меньше всего зависит от шума.
+Кейсы с пометкой ``reference`` - альтернативные реализации для сравнения
+(прежние или отвергнутые), они не входят в код бота.
+
+Между кейсами замеряется калибровочная нагрузка (чистый Python без
+кода бота). При сравнении времена базовой линии масштабируются на отношение
+калибровок, так что общее ускорение или замедление машины (частота CPU,
+соседи на VPS) не выглядит как регрессия; ``--no-normalize`` это отключает.
+Изменения больше ``--threshold`` процентов помечаются; с
+``--fail-on-regression`` код выхода 1, если что-то замедлилось.
+Базовую линию стоит снимать на той же машине, что и сравнение.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import timeit
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.load import prepare_environment
+
+# Символы, которые экранирует escape_markdown
+_MARKDOWN_CHARS = "_*[]()~`>#+-=|{}.!"
+_MARKDOWN_TABLE = str.maketrans({ch: "\\" + ch for ch in _MARKDOWN_CHARS})
+
+SAMPLE_TEXTS = {
+    "uuid": "3f2b1c9e-8a7d-4e6f-9b1a-2c3d4e5f6a7b",
+    "plain": "JohnDoe",
+    "cyrillic": "Иван Петров (тест) v2.0!",
+    "long": "node-1.example.com, " * 20,
+}
+
+
+def _escape_translate(text: str) -> str:
+    """Вариант escape_markdown через одну таблицу str.translate."""
+    if not text:
+        return ""
+    return str(text).translate(_MARKDOWN_TABLE)
+
+
+def _format_datetime_strftime(dt_str: str) -> str:
+    """Прежний format_datetime через strftime."""
+    try:
+        dt = datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
+        return dt.strftime("%Y-%m-%d %H:%M:%S")
+    except Exception:
+        return dt_str
+
+
+def _records(count: int) -> List[Dict[str, Any]]:
+    """Записи для build_*_list."""
+    return [
+        {
+            "name": f"item_{i}.example",
+            "uuid": f"3f2b1c9e-8a7d-4e6f-9b1a-{i:012d}",
+            "type": "XRAY_JSON",
+            "provider_name": f"Provider-{i % 7}",
+            "node_name": f"node-{i}",
+            "amount": 10.5 + i,
+            "billed_at": "2026-10-19T12:34:56.000Z",
+            "next_billing_at": "2026-11-19T12:34:56.000Z",
+        }
+        for i in range(count)
+    ]
+
+
+def build_cases() -> Dict[str, Callable[[], Any]]:
+    """Кейсы: имя -> функция без аргументов."""
+    from aiogram.utils.i18n import gettext as _
+
+    from src.keyboards import main_menu, user_public
+    from src.utils import formatters
+    from src.utils.i18n import get_i18n
+
+    i18n = get_i18n()
+    t = i18n.translator("ru")
+    catalog = i18n.locales["ru"]
+    user = {
+        "username": "user_100042",
+        "uuid": SAMPLE_TEXTS["uuid"],
+        "status": "ACTIVE",
+        "expire_at": "2026-10-19T12:34:56.000Z",
+        "telegram_id": 100042,
+    }
+    node = {"name": "node-1", "uuid": SAMPLE_TEXTS["uuid"], "address": "10.0.0.1", "status": "online"}
+    records = _records(100)
+    big = _records(1000)
+    big_offsets = formatters.list_page_offsets("tokens", big)
+    offsets = {kind: formatters.list_page_offsets(kind, records) for kind in formatters.LIST_FORMATS}
+
+    cases: Dict[str, Callable[[], Any]] = {}
+    for name, text in SAMPLE_TEXTS.items():
+        cases[f"escape_markdown[{name}]"] = lambda text=text: formatters.escape_markdown(text)
+        cases[f"escape_markdown[{name}] reference:translate"] = lambda text=text: _escape_translate(text)
+
+    for kind, kind_offsets in offsets.items():
+        cases[f"render_list_page[{kind},100]"] = (
+            lambda kind=kind, kind_offsets=kind_offsets:
+            formatters.render_list_page(kind, records, kind_offsets, 0, t)
+        )
+
+    cases.update({
+        "format_bytes[KB]": lambda: formatters.format_bytes(123_456),
+        "format_bytes[TB]": lambda: formatters.format_bytes(5 * 1024 ** 4),
+        "format_datetime": lambda: formatters.format_datetime("2026-10-19T12:34:56.123Z"),
+        "format_datetime reference:strftime": lambda: _format_datetime_strftime("2026-10-19T12:34:56.123Z"),
+        "format_datetime[invalid]": lambda: formatters.format_datetime("not a date"),
+        "format_uptime": lambda: formatters.format_uptime(1_234_567),
+        "build_user_summary": lambda: formatters.build_user_summary(user, t),
+        "build_node_summary": lambda: formatters.build_node_summary(node, t),
+        "list_page_offsets[1000]": lambda: formatters.list_page_offsets("tokens", big),
+        "render_list_page[1000]": lambda: formatters.render_list_page("tokens", big, big_offsets, 3, t),
+        "JsonTranslations.gettext[hit]": lambda: catalog.gettext("user.settings"),
+        "JsonTranslations.gettext[miss]": lambda: catalog.gettext("missing.key"),
+        "I18n.gettext[locale]": lambda: i18n.gettext("user.settings", locale="en"),
+        "translator()": lambda: t("user.settings"),
+        "aiogram _() in context": lambda: _("user.settings"),
+    })
+
+    keyboards = {
+        "main_menu_keyboard": (main_menu.main_menu_keyboard, main_menu._main_menu_keyboard, (1,), ("ru", False)),
+        "subscription_keyboard": (user_public.subscription_keyboard, user_public._subscription_keyboard, (), ("ru",)),
+        "payment_method_keyboard": (user_public.payment_method_keyboard, user_public._payment_method_keyboard, (3,), ("ru", 3, True)),
+        "yookassa_payment_keyboard": (user_public.yookassa_payment_keyboard, user_public._yookassa_payment_keyboard, (3,), ("ru", 3)),
+        "language_keyboard": (user_public.language_keyboard, user_public._language_keyboard, (), ("ru",)),
+        "settings_keyboard": (user_public.settings_keyboard, user_public._settings_keyboard, (), ("ru",)),
+        "referral_keyboard": (user_public.referral_keyboard, user_public._referral_keyboard, (), ("ru",)),
+        "renewal_keyboard": (user_public.renewal_keyboard, user_public._renewal_keyboard, (), ("ru",)),
+        "resume_keyboard": (user_public.resume_keyboard, user_public._resume_keyboard, (), ("ru",)),
+    }
+    for name, (factory, cached, args, build_args) in keyboards.items():
+        cases[f"{name}[cached]"] = lambda factory=factory, args=args: factory(*args)
+        # Сборка без кэша: исходная функция под lru_cache
+        cases[f"{name}[build]"] = lambda builder=cached.__wrapped__, args=build_args: builder(*args)
+    return cases
+
+
+def measure(func: Callable[[], Any], repeat: int, min_time: float = 0.2) -> Dict[str, float]:
+    """Время одного вызова, нс: минимум, медиана и разброс по повторам."""
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+    runs = [t / number * 1e9 for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "ns": min(runs),
+        "median_ns": statistics.median(runs),
+        "stdev_ns": statistics.stdev(runs) if len(runs) > 1 else 0.0,
+        "loops": number,
+    }
+
+
+def _calibration_workload():
+    """Калибровка: строки, словари и вызовы, как в форматтерах."""
+    parts = {}
+    for i in range(20):
+        parts[f"key.{i}"] = str(i).replace("1", "-")
+    return "\n".join(parts.values())
+
+
+def calibrate(repeat: int) -> float:
+    """Время калибровочной нагрузки, нс."""
+    return measure(_calibration_workload, repeat, min_time=0.05)["ns"]
+
+
+def run(cases: Dict[str, Callable[[], Any]], repeat: int) -> Tuple[Dict[str, Dict[str, float]], float]:
+    """Замерить все кейсы (с выводом по мере готовности); (результаты, калибровка).
+
+    Калибровка замеряется между кейсами, берется минимум - как и для кейсов,
+    это состояние машины с наименьшими помехами.
+    """
+    from src.utils.i18n import get_i18n
+
+    results = {}
+    calibration = calibrate(repeat)
+    with get_i18n().context():
+        for name, func in cases.items():
+            results[name] = measure(func, repeat)
+            row = results[name]
+            print(f"{name:<52}{_fmt(row['ns']):>12} ± {_fmt(row['stdev_ns'])}")
+            calibration = min(calibration, calibrate(repeat))
+    print(f"{'calibration':<52}{_fmt(calibration):>12}")
+    return results, calibration
+
+
+def _fmt(ns: float) -> str:
+    """Время в удобных единицах."""
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f} ms"
+    if ns >= 1e3:
+        return f"{ns / 1e3:.2f} us"
+    return f"{ns:.0f} ns"
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Any],
+    threshold: float,
+    scale: float = 1.0,
+) -> Tuple[List[str], List[str]]:
+    """Таблица сравнения с базовой линией; (замедлившиеся, ускорившиеся).
+
+    scale - множитель для времен базовой линии (отношение калибровок).
+    """
+    base = baseline["results"]
+    slower, faster = [], []
+    print()
+    print(
+        f"Baseline: {baseline['meta']['date']} ({baseline['meta']['python']}), "
+        f"machine speed factor {scale:.2f}"
+    )
+    print(f"{'case':<52}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, row in results.items():
+        if name not in base:
+            print(f"{name:<52}{'-':>12}{_fmt(row['ns']):>12}{'new':>10}")
+            continue
+        before = base[name]["ns"] * scale
+        change = (row["ns"] - before) / before * 100
+        mark = ""
+        if change > threshold:
+            mark = "  slower"
+            slower.append(name)
+        elif change < -threshold:
+            mark = "  faster"
+            faster.append(name)
+        print(f"{name:<52}{_fmt(before):>12}{_fmt(row['ns']):>12}{change:>+9.1f}%{mark}")
+    return slower, faster
+
+
+def main(argv: Optional[List[str]] = None):
+    """Точка входа."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", help="только кейсы, содержащие подстроку")
+    parser.add_argument("--save", help="сохранить результат как базовую линию (JSON)")
+    parser.add_argument("--compare", help="сравнить с базовой линией (JSON)")
+    parser.add_argument("--threshold", type=float, default=10.0, help="порог изменения, %%")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--no-normalize", action="store_true", help="не учитывать калибровку")
+    args = parser.parse_args(argv)
+
+    prepare_environment("remnabuy-micro-")
+    cases = build_cases()
+    if args.filter:
+        cases = {name: func for name, func in cases.items() if args.filter in name}
+
+    results, calibration = run(cases, args.repeat)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "repeat": args.repeat,
+                    "calibration_ns": calibration,
+                },
+                "results": results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        scale = 1.0
+        if not args.no_normalize and baseline["meta"].get("calibration_ns"):
+            scale = calibration / baseline["meta"]["calibration_ns"]
+        slower, faster = compare(results, baseline, args.threshold, scale)
+        print(f"\n{len(faster)} faster, {len(slower)} slower (threshold {args.threshold:.0f}%)")
+        if slower and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
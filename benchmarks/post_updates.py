@@ -0,0 +1,64 @@
+"""Отправка записанных апдейтов на вебхук бота.
+
+Запуск: python -m benchmarks.post_updates updates.jsonl \\
+    --url http://127.0.0.1:8080/webhook --secret <WEBHOOK_SECRET>
+
+Файл - JSONL (можно .gz), в каждой строке апдейт Telegram
+или объект {"update": {...}}.
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import time
+from typing import Any, Dict, Iterator
+
+import aiohttp
+
+
+def read_updates(path: str) -> Iterator[Dict[str, Any]]:
+    """Прочитать апдейты из JSONL файла."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            yield record.get("update", record)
+
+
+async def post_updates(path: str, url: str, secret: str, concurrency: int) -> None:
+    """Отправить апдейты с ограничением параллелизма."""
+    headers = {"X-Telegram-Bot-Api-Secret-Token": secret} if secret else {}
+    semaphore = asyncio.Semaphore(concurrency)
+    statuses: Dict[int, int] = {}
+
+    async with aiohttp.ClientSession(headers=headers) as session:
+        async def post(update: Dict[str, Any]):
+            async with semaphore:
+                async with session.post(url, json=update) as response:
+                    statuses[response.status] = statuses.get(response.status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(post(update) for update in read_updates(path)))
+        elapsed = time.perf_counter() - started
+
+    total = sum(statuses.values())
+    print(f"Posted {total} updates in {elapsed:.2f}s ({total / elapsed:.0f}/s)")
+    print(f"Statuses: {statuses}")
+
+
+def main():
+    """Точка входа."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path")
+    parser.add_argument("--url", default="http://127.0.0.1:8080/webhook")
+    parser.add_argument("--secret", default="")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    asyncio.run(post_updates(args.path, args.url, args.secret, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
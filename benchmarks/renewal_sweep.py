@@ -0,0 +1,294 @@
+"""Масштабный прогон проверки автопродления на синтетических подписчиках.
+
+Запуск: python -m benchmarks.renewal_sweep --users 100000 --api-latency 0.005
+
+Заполняет bot_users пользователями с автопродлением и UUID Remnawave, а
+фейковую панель (benchmarks/fake_remnawave.py) - соответствующими
+пользователями со сроками подписки: тарифы на 1/3/6/12 месяцев с
+равномерно распределенным остатком, часть подписок уже истекла; части
+пользователей напоминание уже отправлялось. Напоминания уходят в фейковый
+Bot API без сети (RecordingSession).
+
+Режимы (``--modes``), каждый на заново заполненной БД:
+  sequential - прежний проход: по запросу к панели на каждого пользователя,
+               по очереди, с записью в БД после каждого напоминания
+               (ошибки i18n и часовых поясов исправлены, чтобы оба режима
+               делали одинаковую работу);
+  bulk       - текущий check_expiring_subscriptions: фильтр недавно
+               уведомленных в SQL, постраничная выгрузка панели, пакетная
+               запись отметок.
+
+Отчет: время, запросы к панели, отправленные сообщения, пиковая память
+Python (tracemalloc, замедляет прогон; ``--no-tracemalloc`` для чистого
+времени) и расхождение получателей напоминаний между режимами. Пауза между
+напоминаниями (RENEWAL_SEND_RATE) по умолчанию отключена, ``--send-rate``
+включает ее.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set
+
+from benchmarks.fake_remnawave import FakeRemnawave, start_fake_remnawave
+from benchmarks.fake_telegram import FakeBotApi, RecordingSession
+from benchmarks.load import prepare_environment
+
+# Тарифы (дней) и их доли среди активных подписок
+PLANS = ((30, 0.6), (90, 0.25), (180, 0.1), (365, 0.05))
+LANGUAGES = (("ru", 0.7), ("en", 0.3))
+
+
+def _weighted(rng: random.Random, choices) -> Any:
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+def generate_population(
+    count: int, expired_share: float, notified_share: float, seed: int
+) -> List[Dict[str, Any]]:
+    """Синтетические подписчики: язык, срок подписки и время прошлого напоминания."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    local_now = datetime.now()
+    population = []
+    for i in range(count):
+        if rng.random() < expired_share:
+            expire = now - timedelta(seconds=rng.uniform(0, 60 * 86400))
+        else:
+            plan = _weighted(rng, PLANS)
+            expire = now + timedelta(seconds=rng.uniform(0, plan * 86400))
+        notified = None
+        if rng.random() < notified_share:
+            # Прошлый проход был от 0 до 48 часов назад
+            notified = (local_now - timedelta(seconds=rng.uniform(0, 48 * 3600))).isoformat()
+        population.append({
+            "telegram_id": 100000 + i,
+            "language": _weighted(rng, LANGUAGES),
+            "expire_at": expire.isoformat().replace("+00:00", "Z"),
+            "last_renewal_notification": notified,
+        })
+    return population
+
+
+def seed_panel(panel: FakeRemnawave, population: List[Dict[str, Any]], extra: int, seed: int):
+    """Пользователи панели для подписчиков (UUID пишется в запись) и лишние без бота."""
+    rng = random.Random(seed + 1)
+    for user in population:
+        created = panel.add_user(f"user_{user['telegram_id']}", user["expire_at"], user["telegram_id"])
+        user["remnawave_user_uuid"] = created["uuid"]
+    now = datetime.now(timezone.utc)
+    for i in range(extra):
+        expire = now + timedelta(days=rng.uniform(-60, 365))
+        panel.add_user(f"panel_only_{i}", expire.isoformat())
+
+
+def seed_database(population: List[Dict[str, Any]]):
+    """Заполнить bot_users заново."""
+    from src.database import get_db_connection
+
+    with get_db_connection() as conn:
+        conn.execute("DELETE FROM bot_users")
+        conn.executemany(
+            """INSERT INTO bot_users (telegram_id, username, language, remnawave_user_uuid,
+                                      auto_renewal, last_renewal_notification)
+               VALUES (?, ?, ?, ?, 1, ?)""",
+            [
+                (
+                    user["telegram_id"], f"user_{user['telegram_id']}", user["language"],
+                    user["remnawave_user_uuid"], user["last_renewal_notification"],
+                )
+                for user in population
+            ],
+        )
+
+
+async def sequential_sweep(bot) -> Dict[str, int]:
+    """Прежний проход по пользователям (для сравнения)."""
+    from src.database import BotUser
+    from src.services.api_client import RemnawaveApiClient
+    from src.services.renewal_service import classify_reminder, send_renewal_reminder
+
+    api_client = RemnawaveApiClient()
+    stats = {"candidates": 0, "reminders": 0, "sent": 0}
+    for user in BotUser.get_users_with_auto_renewal():
+        remnawave_uuid = user.get("remnawave_user_uuid")
+        if not remnawave_uuid:
+            continue
+        stats["candidates"] += 1
+        try:
+            remnawave_user = await api_client.get_user_by_uuid(remnawave_uuid)
+            expire_at = remnawave_user.get("expire_at")
+            if not expire_at:
+                continue
+
+            expire_dt = datetime.fromisoformat(expire_at.replace("Z", "+00:00"))
+            now = datetime.now(expire_dt.tzinfo) if expire_dt.tzinfo else datetime.now()
+            days_until_expiry = (expire_dt - now).days
+
+            last_notification = user.get("last_renewal_notification")
+            if last_notification:
+                last_notif_dt = datetime.fromisoformat(last_notification)
+                hours_since_notif = (datetime.now() - last_notif_dt).total_seconds() / 3600
+            else:
+                hours_since_notif = 999
+
+            kind = classify_reminder(days_until_expiry, hours_since_notif)
+            if kind is None:
+                continue
+            stats["reminders"] += 1
+            if await send_renewal_reminder(
+                bot, user["telegram_id"], days_until_expiry, kind, expire_at,
+                locale=user.get("language"),
+            ):
+                stats["sent"] += 1
+            BotUser.update_last_renewal_notification(user["telegram_id"])
+        except Exception:
+            continue
+    return stats
+
+
+async def run_mode(
+    mode: str, bot, api: FakeBotApi, panel: FakeRemnawave, population, trace_memory: bool
+) -> Dict[str, Any]:
+    """Один прогон режима на заново заполненной БД."""
+    from src.services.renewal_service import check_expiring_subscriptions
+
+    seed_database(population)
+    api.calls.clear()
+    api.counts.clear()
+    panel_before = dict(panel.requests)
+
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    if mode == "sequential":
+        stats = await sequential_sweep(bot)
+    else:
+        stats = await check_expiring_subscriptions(bot)
+    elapsed = time.perf_counter() - started
+    peak_mb = None
+    if trace_memory:
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+
+    panel_requests = {
+        label: count - panel_before.get(label, 0)
+        for label, count in panel.requests.items()
+        if count - panel_before.get(label, 0)
+    }
+    recipients: Set[int] = {
+        call.params["chat_id"] for call in api.calls if call.method == "sendMessage"
+    }
+    return {
+        "mode": mode,
+        "elapsed_s": elapsed,
+        **stats,
+        "panel_requests": sum(panel_requests.values()),
+        "panel_endpoints": panel_requests,
+        "messages": api.counts["sendMessage"],
+        "peak_memory_mb": peak_mb,
+        "recipients": sorted(recipients),
+    }
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Заполнить данные и прогнать выбранные режимы."""
+    # Импорт после настройки окружения: DB_PATH читается при импорте
+    from src.config import get_settings
+    from src.database import init_database
+    from src.main import create_bot
+
+    panel = FakeRemnawave(latency=args.api_latency, seed=args.seed)
+    population = generate_population(
+        args.users, args.expired_share, args.notified_share, args.seed
+    )
+    seed_panel(panel, population, int(args.users * args.panel_extra), args.seed)
+    runner = await start_fake_remnawave(panel)
+    host, port = runner.addresses[0][:2]
+
+    settings = get_settings()
+    settings.API_BASE_URL = f"http://{host}:{port}"
+    settings.RENEWAL_SEND_RATE = args.send_rate
+    settings.RENEWAL_CONCURRENCY = args.concurrency
+    settings.RENEWAL_PAGE_SIZE = args.page_size
+    init_database()
+
+    api = FakeBotApi(latency=args.tg_latency, max_recorded=args.users + 1, seed=args.seed)
+    bot = create_bot(RecordingSession(api))
+    results = []
+    try:
+        for mode in args.modes.split(","):
+            result = await run_mode(mode, bot, api, panel, population, not args.no_tracemalloc)
+            print_result(result)
+            results.append(result)
+    finally:
+        await bot.session.close()
+        await runner.cleanup()
+    return results
+
+
+def print_result(result: Dict[str, Any]):
+    """Вывести результат режима."""
+    memory = (
+        f", peak Python memory {result['peak_memory_mb']:.1f} MB"
+        if result["peak_memory_mb"] is not None else ""
+    )
+    print(
+        f"{result['mode']:<11} {result['elapsed_s']:8.2f}s, "
+        f"{result['candidates']} users checked, {result['panel_requests']} panel requests, "
+        f"{result['messages']} messages ({result['reminders']} reminders){memory}"
+    )
+    print(f"{'':<12}panel endpoints: {result['panel_endpoints']}")
+
+
+def main():
+    """Точка входа."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100000, help="подписчиков с автопродлением")
+    parser.add_argument("--modes", default="sequential,bulk", help="режимы через запятую")
+    parser.add_argument("--expired-share", type=float, default=0.15, help="доля истекших подписок")
+    parser.add_argument("--notified-share", type=float, default=0.3, help="доля получавших напоминание за 48 ч")
+    parser.add_argument("--panel-extra", type=float, default=0.2, help="пользователей панели без бота, доля")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="задержка фейкового Remnawave, с")
+    parser.add_argument("--tg-latency", type=float, default=0.0, help="задержка фейкового Bot API, с")
+    parser.add_argument("--send-rate", type=float, default=0.0, help="RENEWAL_SEND_RATE (0 - без пауз)")
+    parser.add_argument("--concurrency", type=int, default=10, help="RENEWAL_CONCURRENCY")
+    parser.add_argument("--page-size", type=int, default=500, help="RENEWAL_PAGE_SIZE")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="не замерять память (чистое время)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_path", help="сохранить результат в JSON")
+    parser.add_argument("--log-level", default="ERROR", help="уровень логов бота во время прогона")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper())
+    prepare_environment("remnabuy-renewal-")
+    results = asyncio.run(run(args))
+
+    if len(results) > 1:
+        base = results[0]
+        for result in results[1:]:
+            # Расхождение возможно только для пользователей, чей срок пересек
+            # границу суток (или 12/24 ч с прошлого напоминания) между прогонами
+            differ = len(set(result["recipients"]) ^ set(base["recipients"]))
+            print(
+                f"{result['mode']} vs {base['mode']}: "
+                f"{base['elapsed_s'] / result['elapsed_s']:.1f}x faster, "
+                f"{base['panel_requests']} -> {result['panel_requests']} panel requests, "
+                f"reminder recipients differ by {differ} "
+                f"(thresholds crossed during {base['elapsed_s']:.0f}s between runs)"
+            )
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(
+                [{k: v for k, v in r.items() if k != "recipients"} for r in results],
+                f, ensure_ascii=False, indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
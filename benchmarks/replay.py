@@ -0,0 +1,207 @@
+"""Воспроизведение записанных апдейтов на локальном диспетчере.
+
+Запуск: python -m benchmarks.replay data/captures --speed 10 \\
+    --since 2026-10-12T19:00 --until 2026-10-12T20:00
+
+Читает файлы записи ``UPDATE_CAPTURE_*`` (gzip JSONL с полями ts и update;
+директория - все updates-*.jsonl.gz в ней) и подает апдейты в диспетчер,
+собранный как в ``main()``, с фейковыми Remnawave и Bot API
+(см. benchmarks/load.py). ``--speed 1`` сохраняет исходные интервалы,
+``--speed 10`` - в 10 раз быстрее, ``--speed 0`` - без пауз. Апдейты одного
+пользователя обрабатываются по порядку, как в боте.
+
+Отчет: пропускная способность, задержки апдейтов и обработчиков и
+отставание от расписания (насколько апдейты начали обрабатываться позже
+положенного при заданной скорости).
+
+Для воспроизведения через вебхук работающего бота есть
+benchmarks/post_updates.py (он читает те же файлы).
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from benchmarks.load import (
+    latency_summary,
+    handler_report,
+    peak_rss_mb,
+    prepare_environment,
+    print_handlers,
+    start_stack,
+)
+
+
+def capture_files(paths: List[str]) -> List[Path]:
+    """Файлы записи: файлы как есть, директории - updates-*.jsonl.gz по имени."""
+    files: List[Path] = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(path.glob("updates-*.jsonl.gz")))
+        else:
+            files.append(path)
+    return files
+
+
+def read_records(path: Path) -> Iterator[Dict[str, Any]]:
+    """Записи {"ts", "update"} (строки без ts - апдейты без времени)."""
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if "update" not in record:
+                record = {"ts": None, "update": record}
+            yield record
+
+
+def parse_time(value: str) -> float:
+    """ISO дата/время (локальное время) -> unix timestamp."""
+    return datetime.fromisoformat(value).timestamp()
+
+
+def load_records(
+    paths: List[str], since: Optional[float], until: Optional[float], limit: Optional[int]
+) -> List[Dict[str, Any]]:
+    """Записи в окне времени, отсортированные по ts."""
+    records = []
+    for path in capture_files(paths):
+        for record in read_records(path):
+            ts = record.get("ts")
+            if ts is not None and ((since and ts < since) or (until and ts >= until)):
+                continue
+            records.append(record)
+    records.sort(key=lambda r: r.get("ts") or 0)
+    return records[:limit] if limit else records
+
+
+async def replay(args: argparse.Namespace) -> Dict[str, Any]:
+    """Воспроизвести записи и собрать статистику."""
+    from src.workers import UserSerializer, extract_user_id
+
+    records = load_records(
+        args.paths,
+        parse_time(args.since) if args.since else None,
+        parse_time(args.until) if args.until else None,
+        args.limit,
+    )
+    if not records:
+        raise SystemExit("No updates to replay")
+
+    stack = await start_stack(args.api_latency, args.tg_latency, args.keep_throttling, args.seed)
+    serializer = UserSerializer()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    update_latency: List[float] = []
+    schedule_lag: List[float] = []
+    errors: Counter = Counter()
+    types: Counter = Counter()
+
+    async def process(raw: Dict[str, Any], due: float):
+        async with semaphore:
+            started = time.perf_counter()
+            schedule_lag.append(max(0.0, started - due))
+            try:
+                await stack.feed(raw)
+            except Exception as e:
+                errors[type(e).__name__] += 1
+            update_latency.append(time.perf_counter() - started)
+
+    first_ts = next((r["ts"] for r in records if r.get("ts") is not None), None)
+    tasks = []
+    started = time.perf_counter()
+    for record in records:
+        raw = record["update"]
+        types[next((key for key in raw if key != "update_id"), "unknown")] += 1
+        due = started
+        if args.speed > 0 and first_ts is not None and record.get("ts") is not None:
+            due = started + (record["ts"] - first_ts) / args.speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        user_id = extract_user_id(raw)
+        tasks.append(asyncio.create_task(
+            serializer.run(user_id, lambda raw=raw, due=due: process(raw, due))
+        ))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    await stack.close()
+
+    span = (records[-1].get("ts") or 0) - (first_ts or 0)
+    return {
+        "updates": len(records),
+        "users": len({extract_user_id(r["update"]) for r in records}),
+        "captured_span_s": span,
+        "elapsed_s": elapsed,
+        "updates_per_s": len(records) / elapsed if elapsed else 0.0,
+        **{f"update_{key}": value for key, value in latency_summary(update_latency).items()},
+        **{f"lag_{key}": value for key, value in latency_summary(schedule_lag).items()},
+        "types": dict(types),
+        "errors": dict(errors),
+        "handlers": handler_report(stack.recorder),
+        "bot_api_calls": dict(stack.api.counts.most_common()),
+        "panel_requests": sum(stack.panel.requests.values()),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def print_report(result: Dict[str, Any], speed: float):
+    """Вывести отчет."""
+    print(
+        f"Replayed {result['updates']} updates from {result['users']} users "
+        f"({result['captured_span_s']:.0f}s captured) in {result['elapsed_s']:.2f}s "
+        f"at speed {speed or 'max'}: {result['updates_per_s']:.0f} updates/s"
+    )
+    print(
+        f"Update latency: p50 {result['update_p50_ms']:.2f} ms, "
+        f"p95 {result['update_p95_ms']:.2f} ms, p99 {result['update_p99_ms']:.2f} ms"
+    )
+    print(
+        f"Schedule lag: p50 {result['lag_p50_ms']:.2f} ms, "
+        f"p95 {result['lag_p95_ms']:.2f} ms, p99 {result['lag_p99_ms']:.2f} ms"
+    )
+    print(f"Peak RSS: {result['peak_rss_mb']:.1f} MB")
+    print(f"Update types: {result['types']}")
+    print(f"Bot API calls: {result['bot_api_calls']}")
+    print(f"Panel requests: {result['panel_requests']}")
+    if result["errors"]:
+        print(f"Errors: {result['errors']}")
+    print()
+    print_handlers(result["handlers"])
+
+
+def main():
+    """Точка входа."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="файлы записи или директория UPDATE_CAPTURE_DIR")
+    parser.add_argument("--speed", type=float, default=1.0, help="множитель скорости (0 - без пауз)")
+    parser.add_argument("--since", help="начало окна, ISO (например 2026-10-12T19:00)")
+    parser.add_argument("--until", help="конец окна, ISO")
+    parser.add_argument("--limit", type=int, help="не больше N апдейтов")
+    parser.add_argument("--concurrency", type=int, default=100, help="одновременно обрабатываемых апдейтов")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="задержка фейкового Remnawave, с")
+    parser.add_argument("--tg-latency", type=float, default=0.0, help="задержка фейкового Bot API, с")
+    parser.add_argument("--keep-throttling", action="store_true", help="не отключать THROTTLE_RATE")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_path", help="сохранить результат в JSON")
+    parser.add_argument("--log-level", default="ERROR", help="уровень логов бота во время прогона")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper())
+    prepare_environment("remnabuy-replay-")
+    result = asyncio.run(replay(args))
+    print_report(result, args.speed)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -22,6 +22,7 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = Field(default="INFO")
     NOTIFICATIONS_CHAT_ID: Optional[int] = None
     NOTIFICATIONS_TOPIC_ID: Optional[int] = None
+    TELEGRAM_API_URL: Optional[str] = None  # Свой Bot API сервер (например, фейк для бенчмарков)
 
     # Telegram Stars цены
     SUBSCRIPTION_STARS_1MONTH: int = Field(default=100)
@@ -43,6 +44,70 @@ class Settings(BaseSettings):
     DEFAULT_EXTERNAL_SQUAD_UUID: Optional[str] = None
     DEFAULT_INTERNAL_SQUADS: str = Field(default="[]")  # JSON или CSV
 
+    # Проверка автопродления (раз в 6 часов)
+    RENEWAL_PAGE_SIZE: int = Field(default=500)  # Пользователей панели на страницу выгрузки
+    RENEWAL_CONCURRENCY: int = Field(default=10)  # Одновременных запросов к панели
+    RENEWAL_SEND_RATE: float = Field(default=25.0)  # Напоминаний в секунду (0 - без пауз)
+
+    # Экран «Мой доступ»: показывается из локальной копии, панель проверяется в фоне
+    ACCESS_REVALIDATE_AFTER: int = Field(default=60)  # Секунды, пока копия считается свежей
+    ACCESS_FETCH_TIMEOUT: float = Field(default=10.0)  # Ожидание панели, секунды
+
+    # Режим работы: polling или webhook
+    BOT_MODE: str = Field(default="polling")
+    WEBHOOK_URL: Optional[str] = None  # Публичный адрес, например https://bot.example.com
+    WEBHOOK_PATH: str = Field(default="/webhook")
+    WEBHOOK_SECRET: Optional[str] = None  # Если пусто - генерируется при старте
+    WEBHOOK_WORKERS: int = Field(default=16)  # Одновременно обрабатываемых апдейтов
+    YOOKASSA_WEBHOOK_PATH: str = Field(default="/yookassa/webhook")
+    WEB_SERVER_ENABLED: bool = Field(default=False)  # HTTP сервер в режиме polling
+    WEB_SERVER_HOST: str = Field(default="0.0.0.0")
+    WEB_SERVER_PORT: int = Field(default=8080)
+    SHUTDOWN_TIMEOUT: float = Field(default=30.0)
+
+    # Производительность
+    LANGUAGE_CACHE_SIZE: int = Field(default=10000)
+    RENDER_CACHE_SIZE: int = Field(default=20000)  # Запомненных экранов сообщений
+    WORKERS: int = Field(default=1)  # Процессов-обработчиков (1 - без разделения)
+    WORKER_CONCURRENCY: int = Field(default=16)  # Одновременных апдейтов на воркер
+
+    # Состояние диалогов: memory или sqlite
+    STATE_BACKEND: str = Field(default="memory")
+    STATE_TTL_SECONDS: int = Field(default=3600)
+    STATE_MAX_ENTRIES: int = Field(default=50000)  # Лимит записей в памяти (LRU)
+
+    # Ограничение частоты запросов (токенов в секунду, 0 - отключено)
+    THROTTLE_RATE: float = Field(default=1.0)
+    THROTTLE_BURST: float = Field(default=10.0)
+    THROTTLE_EXPENSIVE_COST: float = Field(default=4.0)  # Стоимость запросов к панели/YooKassa
+    CALLBACK_ACK_DEADLINE: float = Field(default=1.0)  # Ответ на callback, если обработчик медлит
+
+    # Метрики Prometheus (локальный HTTP сервер /metrics)
+    METRICS_ENABLED: bool = Field(default=False)
+    METRICS_HOST: str = Field(default="127.0.0.1")
+    METRICS_PORT: int = Field(default=9090)  # Воркер N слушает METRICS_PORT + N + 1
+
+    # Трассировка апдейтов: медленные апдейты пишутся в лог деревом span
+    TRACING_ENABLED: bool = Field(default=True)
+    SLOW_UPDATE_THRESHOLD: float = Field(default=2.0)  # Секунды
+
+    # Профилирование запросов SQLite (статистика в /dbstats)
+    DB_PROFILING: bool = Field(default=False)
+    DB_SLOW_QUERY_MS: float = Field(default=50.0)  # Медленные запросы пишутся в лог с планом
+
+    # Мониторинг задержек event loop
+    LOOP_MONITOR_ENABLED: bool = Field(default=False)
+    LOOP_MONITOR_INTERVAL: float = Field(default=0.5)  # Период замера, секунды
+    LOOP_LAG_THRESHOLD: float = Field(default=0.1)  # Порог блокировки для лога со стеком
+    LOOP_DEBUG: bool = Field(default=False)  # Отладочный режим asyncio (дороже)
+
+    # Запись апдейтов для воспроизведения (benchmarks/replay.py)
+    UPDATE_CAPTURE_ENABLED: bool = Field(default=False)
+    UPDATE_CAPTURE_DIR: str = Field(default="data/captures")
+    UPDATE_CAPTURE_MAX_MB: float = Field(default=50.0)  # Размер файла до ротации
+    UPDATE_CAPTURE_FILES: int = Field(default=48)  # Сколько файлов хранить
+    UPDATE_CAPTURE_SALT: Optional[str] = None  # Соль псевдонимов ID (пусто - новая при каждом запуске)
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -1,16 +1,32 @@
 """База данных SQLite."""
 import os
 import sqlite3
+import time
+from collections import OrderedDict
 from contextlib import contextmanager
 from datetime import datetime
+from functools import wraps
 from pathlib import Path
 from typing import List, Optional, Tuple
 
 from src.config import get_settings
+from src.utils.db_profiler import ProfilingConnection
+from src.utils.metrics import Histogram
+from src.utils.tracing import span
+
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "SQLite model method duration",
+    ["model", "method"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
 
 # Путь к базе данных
 DB_PATH = os.getenv("DB_PATH", "data/bot_data.db")
 
+# Кэш языков пользователей (telegram_id -> язык, "" если не задан)
+_language_cache: "OrderedDict[int, str]" = OrderedDict()
+
 
 def _ensure_db_dir():
     """Убедиться, что директория для БД существует."""
@@ -22,7 +38,10 @@ def _ensure_db_dir():
 def get_db_connection():
     """Контекстный менеджер для работы с БД."""
     _ensure_db_dir()
-    conn = sqlite3.connect(DB_PATH)
+    if get_settings().DB_PROFILING:
+        conn = sqlite3.connect(DB_PATH, factory=ProfilingConnection)
+    else:
+        conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     try:
         yield conn
@@ -115,7 +134,77 @@ def init_database():
             )
         """)
 
+        # Таблица состояния диалогов (STATE_BACKEND=sqlite)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS conversation_state (
+                namespace TEXT NOT NULL,
+                key INTEGER NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+
+        # Таблица отложенного удаления сообщений
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS pending_deletions (
+                chat_id INTEGER NOT NULL,
+                message_id INTEGER NOT NULL,
+                due_at REAL NOT NULL,
+                PRIMARY KEY (chat_id, message_id)
+            )
+        """)
+
+        # Локальная копия данных подписки для экрана «Мой доступ»
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS subscription_cache (
+                telegram_id INTEGER PRIMARY KEY,
+                remnawave_user_uuid TEXT NOT NULL,
+                short_uuid TEXT,
+                expire_at TEXT,
+                subscription_link TEXT,
+                updated_at REAL NOT NULL,
+                FOREIGN KEY (telegram_id) REFERENCES bot_users(telegram_id)
+            )
+        """)
+
+    # Удалить истекшее состояние диалогов (STATE_BACKEND=sqlite)
+    ConversationState.purge_expired()
+
+
+def _timed(func, histogram, span_name: str):
+    """Обертка метода модели с замером времени и span."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            with span("db", query=span_name):
+                return func(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+    return wrapper
+
 
+def _instrumented(cls):
+    """Декоратор модели: время выполнения методов в DB_QUERY_DURATION."""
+    for name, attr in list(vars(cls).items()):
+        # cached_* не обращаются к БД
+        if isinstance(attr, staticmethod) and not name.startswith("cached_"):
+            histogram = DB_QUERY_DURATION.labels(cls.__name__, name)
+            wrapped = _timed(attr.__func__, histogram, f"{cls.__name__}.{name}")
+            setattr(cls, name, staticmethod(wrapped))
+    return cls
+
+
+def _remember_language(telegram_id: int, language: Optional[str]):
+    """Сохранить язык пользователя в кэше (LRU)."""
+    _language_cache[telegram_id] = language or ""
+    _language_cache.move_to_end(telegram_id)
+    while len(_language_cache) > get_settings().LANGUAGE_CACHE_SIZE:
+        _language_cache.popitem(last=False)
+
+
+@_instrumented
 class BotUser:
     """Модель пользователя бота."""
 
@@ -130,7 +219,9 @@ class BotUser:
             )
             row = cursor.fetchone()
             if row:
-                return dict(row)
+                user = dict(row)
+                _remember_language(telegram_id, user.get("language"))
+                return user
 
             cursor.execute(
                 """INSERT INTO bot_users (telegram_id, username, language)
@@ -141,7 +232,38 @@ class BotUser:
                 "SELECT * FROM bot_users WHERE telegram_id = ?",
                 (telegram_id,)
             )
-            return dict(cursor.fetchone())
+            user = dict(cursor.fetchone())
+            _remember_language(telegram_id, user.get("language"))
+            return user
+
+    @staticmethod
+    def get_language(telegram_id: int, username: Optional[str] = None) -> Optional[str]:
+        """Получить язык пользователя (из кэша или одним upsert в БД)."""
+        language = _language_cache.get(telegram_id)
+        if language is not None:
+            _language_cache.move_to_end(telegram_id)
+            return language or None
+
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """INSERT OR IGNORE INTO bot_users (telegram_id, username, language)
+                   VALUES (?, ?, ?)""",
+                (telegram_id, username, get_settings().DEFAULT_LOCALE)
+            )
+            cursor.execute(
+                "SELECT language FROM bot_users WHERE telegram_id = ?",
+                (telegram_id,)
+            )
+            language = cursor.fetchone()[0]
+
+        _remember_language(telegram_id, language)
+        return language
+
+    @staticmethod
+    def cached_language(telegram_id: int) -> Optional[str]:
+        """Получить язык пользователя только из кэша (без обращения к БД)."""
+        return _language_cache.get(telegram_id) or None
 
     @staticmethod
     def update_language(telegram_id: int, language: str):
@@ -151,6 +273,7 @@ class BotUser:
                 "UPDATE bot_users SET language = ? WHERE telegram_id = ?",
                 (language, telegram_id)
             )
+        _remember_language(telegram_id, language)
 
     @staticmethod
     def set_trial_used(telegram_id: int):
@@ -220,7 +343,34 @@ class BotUser:
             )
             return [dict(row) for row in cursor.fetchall()]
 
+    @staticmethod
+    def get_renewal_candidates(notified_before: str) -> List[dict]:
+        """Пользователи с автопродлением и UUID, без напоминаний после notified_before."""
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """SELECT telegram_id, language, remnawave_user_uuid, last_renewal_notification
+                   FROM bot_users
+                   WHERE auto_renewal = 1 AND remnawave_user_uuid IS NOT NULL
+                     AND (last_renewal_notification IS NULL
+                          OR last_renewal_notification < ?)""",
+                (notified_before,)
+            )
+            return [dict(row) for row in cursor.fetchall()]
 
+    @staticmethod
+    def update_last_renewal_notifications(telegram_ids: List[int]):
+        """Обновить время последнего напоминания для нескольких пользователей."""
+        now = datetime.now().isoformat()
+        with get_db_connection() as conn:
+            conn.executemany(
+                """UPDATE bot_users SET last_renewal_notification = ?
+                   WHERE telegram_id = ?""",
+                [(now, telegram_id) for telegram_id in telegram_ids]
+            )
+
+
+@_instrumented
 class PromoCode:
     """Модель промокода."""
 
@@ -301,6 +451,7 @@ class PromoCode:
             )
 
 
+@_instrumented
 class Referral:
     """Модель реферальной программы."""
 
@@ -370,6 +521,7 @@ class Referral:
             return row is not None and row[0] > 0
 
 
+@_instrumented
 class Payment:
     """Модель платежа."""
 
@@ -453,6 +605,26 @@ class Payment:
                     (status, completed_at, payment_id)
                 )
 
+    @staticmethod
+    def claim(payment_id: int) -> bool:
+        """Захватить ожидающий платеж для обработки (False - уже захвачен или завершен)."""
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE payments SET status = 'processing' WHERE id = ? AND status = 'pending'",
+                (payment_id,)
+            )
+            return cursor.rowcount == 1
+
+    @staticmethod
+    def release(payment_id: int):
+        """Вернуть захваченный платеж в ожидание (обработка не удалась)."""
+        with get_db_connection() as conn:
+            conn.execute(
+                "UPDATE payments SET status = 'pending' WHERE id = ? AND status = 'processing'",
+                (payment_id,)
+            )
+
     @staticmethod
     def get(payment_id: int) -> Optional[dict]:
         """Получить платеж по ID."""
@@ -465,3 +637,148 @@ class Payment:
             row = cursor.fetchone()
             return dict(row) if row else None
 
+
+@_instrumented
+class ConversationState:
+    """Модель состояния диалогов (ключ-значение с TTL)."""
+
+    @staticmethod
+    def get(namespace: str, key: int) -> Optional[str]:
+        """Получить значение, если оно не истекло."""
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT value FROM conversation_state "
+                "WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (namespace, key, time.time()),
+            )
+            row = cursor.fetchone()
+            return row["value"] if row else None
+
+    @staticmethod
+    def set(namespace: str, key: int, value: str, expires_at: float):
+        """Сохранить значение."""
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT OR REPLACE INTO conversation_state (namespace, key, value, expires_at) "
+                "VALUES (?, ?, ?, ?)",
+                (namespace, key, value, expires_at),
+            )
+
+    @staticmethod
+    def delete(namespace: str, key: int) -> Optional[str]:
+        """Удалить значение и вернуть его (если не истекло)."""
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT value, expires_at FROM conversation_state WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            )
+            row = cursor.fetchone()
+            if not row:
+                return None
+            cursor.execute(
+                "DELETE FROM conversation_state WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            )
+            return row["value"] if row["expires_at"] > time.time() else None
+
+    @staticmethod
+    def clear(namespace: str):
+        """Удалить все значения пространства имен."""
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM conversation_state WHERE namespace = ?", (namespace,))
+
+    @staticmethod
+    def purge_expired() -> int:
+        """Удалить истекшие значения."""
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM conversation_state WHERE expires_at <= ?", (time.time(),)
+            )
+            return cursor.rowcount
+
+
+@_instrumented
+class PendingDeletion:
+    """Модель отложенного удаления сообщений."""
+
+    @staticmethod
+    def add(chat_id: int, message_id: int, due_at: float):
+        """Запланировать удаление."""
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT OR REPLACE INTO pending_deletions (chat_id, message_id, due_at) "
+                "VALUES (?, ?, ?)",
+                (chat_id, message_id, due_at),
+            )
+
+    @staticmethod
+    def remove_many(items: List[Tuple[int, int]]):
+        """Удалить выполненные записи (chat_id, message_id)."""
+        if not items:
+            return
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "DELETE FROM pending_deletions WHERE chat_id = ? AND message_id = ?",
+                items,
+            )
+
+    @staticmethod
+    def get_all() -> List[Tuple[float, int, int]]:
+        """Все запланированные удаления (due_at, chat_id, message_id)."""
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT due_at, chat_id, message_id FROM pending_deletions")
+            return [tuple(row) for row in cursor.fetchall()]
+
+
+@_instrumented
+class SubscriptionCache:
+    """Модель локальной копии подписки (ссылка и срок из панели)."""
+
+    @staticmethod
+    def get(telegram_id: int) -> Optional[dict]:
+        """Сохраненные данные подписки пользователя."""
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT * FROM subscription_cache WHERE telegram_id = ?",
+                (telegram_id,)
+            )
+            row = cursor.fetchone()
+            return dict(row) if row else None
+
+    @staticmethod
+    def save(
+        telegram_id: int,
+        remnawave_user_uuid: str,
+        short_uuid: Optional[str],
+        expire_at: Optional[str],
+        subscription_link: Optional[str],
+    ):
+        """Сохранить данные подписки, полученные из панели."""
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """INSERT OR REPLACE INTO subscription_cache
+                   (telegram_id, remnawave_user_uuid, short_uuid, expire_at,
+                    subscription_link, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (telegram_id, remnawave_user_uuid, short_uuid, expire_at,
+                 subscription_link, time.time()),
+            )
+
+    @staticmethod
+    def delete(telegram_id: int):
+        """Удалить копию (пользователя нет в панели)."""
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM subscription_cache WHERE telegram_id = ?", (telegram_id,)
+            )
@@ -4,6 +4,7 @@ from aiogram.filters import Command
 from aiogram.types import Message
 from aiogram.utils.i18n import gettext as _
 
+from src.handlers.lists import send_list
 from src.utils.auth import is_admin
 
 router = Router()
@@ -11,10 +12,26 @@ router = Router()
 
 @router.message(Command("billing"))
 async def cmd_billing(message: Message):
-    """Команда /billing - информация о биллинге."""
+    """Команда /billing - история биллинга."""
     if not is_admin(message.from_user.id):
         return
 
-    # Упрощенная реализация - требует доработки
-    await message.answer("💰 Функция биллинга (требует доработки)")
+    await send_list(message, "billing_history")
 
+
+@router.message(Command("billing_nodes"))
+async def cmd_billing_nodes(message: Message):
+    """Команда /billing_nodes - биллинг нод."""
+    if not is_admin(message.from_user.id):
+        return
+
+    await send_list(message, "billing_nodes")
+
+
+@router.message(Command("providers"))
+async def cmd_providers(message: Message):
+    """Команда /providers - список провайдеров."""
+    if not is_admin(message.from_user.id):
+        return
+
+    await send_list(message, "providers")
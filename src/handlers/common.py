@@ -1,20 +1,21 @@
 """Общие утилиты для обработчиков."""
-import asyncio
+import logging
 from typing import Optional, Union
 
 from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import CallbackQuery, Message
 
+from src.services.deletion_scheduler import get_deletion_scheduler
 from src.utils.auth import is_admin
+from src.utils.render_cache import get_render_cache, markup_fingerprint, text_fingerprint
+
+logger = logging.getLogger(__name__)
 
 
 async def _cleanup_message(message: Message, delay: float = 2.0):
-    """Удалить сообщение с задержкой."""
-    await asyncio.sleep(delay)
-    try:
-        await message.delete()
-    except Exception:
-        pass
+    """Удалить сообщение с задержкой (через общий планировщик)."""
+    get_deletion_scheduler().schedule(message.chat.id, message.message_id, delay)
 
 
 async def _send_clean_message(
@@ -25,16 +26,9 @@ async def _send_clean_message(
 ):
     """Отправить или отредактировать сообщение."""
     if isinstance(target, CallbackQuery):
-        try:
-            await target.message.edit_text(
-                text=text, reply_markup=reply_markup, parse_mode=parse_mode
-            )
-        except Exception:
-            await target.message.answer(
-                text=text, reply_markup=reply_markup, parse_mode=parse_mode
-            )
+        await _edit_text_safe(target.message, text, reply_markup, parse_mode)
     else:
-        await target.answer(text=text, reply_markup=reply_markup, parse_mode=parse_mode)
+        await _send_new_message(target, text, reply_markup, parse_mode)
 
 
 def _not_admin(message: Message) -> bool:
@@ -64,19 +58,83 @@ def _clear_user_state(user_id: int, keep_search: bool = False, keep_subs: bool =
     PENDING_INPUT.pop(user_id, None)
 
 
+async def _send_new_message(
+    message: Message,
+    text: str,
+    reply_markup=None,
+    parse_mode: Optional[str] = "Markdown",
+) -> Message:
+    """Отправить новое сообщение в чат и запомнить его экран."""
+    sent = await message.bot.send_message(
+        chat_id=message.chat.id, text=text, reply_markup=reply_markup, parse_mode=parse_mode
+    )
+    get_render_cache().remember(
+        sent.chat.id,
+        sent.message_id,
+        text_fingerprint(text, parse_mode),
+        markup_fingerprint(reply_markup),
+    )
+    return sent
+
+
+def _is_not_modified(error: TelegramBadRequest) -> bool:
+    """Telegram отклонил правку, потому что содержимое не изменилось."""
+    return "message is not modified" in error.message
+
+
 async def _edit_text_safe(
     message: Message,
     text: str,
     reply_markup=None,
     parse_mode: Optional[str] = "Markdown",
 ):
-    """Безопасно отредактировать текст."""
+    """Безопасно отредактировать текст (одинаковые правки не отправляются)."""
+    cache = get_render_cache()
+    chat_id, message_id = message.chat.id, message.message_id
+    text_fp = text_fingerprint(text, parse_mode)
+    markup_fp = markup_fingerprint(reply_markup)
+    if cache.is_same(chat_id, message_id, text_fp, markup_fp):
+        return
+
     try:
         await message.edit_text(
             text=text, reply_markup=reply_markup, parse_mode=parse_mode
         )
+    except TelegramBadRequest as e:
+        if not _is_not_modified(e):
+            # Сообщение удалено, устарело или недоступно - отправляем новое
+            logger.debug(f"Edit failed, sending new message: {e}")
+            cache.forget(chat_id, message_id)
+            await _send_new_message(message, text, reply_markup, parse_mode)
+            return
     except Exception:
-        await message.answer(
-            text=text, reply_markup=reply_markup, parse_mode=parse_mode
-        )
+        cache.forget(chat_id, message_id)
+        await _send_new_message(message, text, reply_markup, parse_mode)
+        return
+    cache.remember(chat_id, message_id, text_fp, markup_fp)
+
+
+async def _edit_markup_safe(message: Message, reply_markup=None) -> bool:
+    """Безопасно заменить клавиатуру (False - сообщение недоступно)."""
+    cache = get_render_cache()
+    chat_id, message_id = message.chat.id, message.message_id
+    markup_fp = markup_fingerprint(reply_markup)
+    if cache.get(chat_id, message_id) is None and isinstance(message, Message):
+        # Экран неизвестен - клавиатуру можно сравнить с пришедшей в апдейте
+        cache.remember(chat_id, message_id, None, markup_fingerprint(message.reply_markup))
+    if cache.is_same(chat_id, message_id, None, markup_fp):
+        return True
 
+    try:
+        await message.edit_reply_markup(reply_markup=reply_markup)
+    except TelegramBadRequest as e:
+        if not _is_not_modified(e):
+            logger.debug(f"Markup edit failed: {e}")
+            cache.forget(chat_id, message_id)
+            return False
+    except Exception as e:
+        logger.debug(f"Markup edit failed: {e}")
+        cache.forget(chat_id, message_id)
+        return False
+    cache.remember(chat_id, message_id, None, markup_fp)
+    return True
@@ -0,0 +1,89 @@
+"""Постраничные списки ресурсов панели (админ)."""
+import logging
+from typing import Dict, Optional
+
+from aiogram import Router
+from aiogram.types import CallbackQuery, Message
+from aiogram.utils.i18n import gettext as _
+
+from src.handlers.common import _edit_text_safe, _send_new_message
+from src.handlers.state import LIST_RESULTS
+from src.keyboards.pagination import pagination_keyboard
+from src.services.api_client import RemnawaveApiClient
+from src.utils.auth import is_admin
+from src.utils.callbacks import CallbackArgs, CallbackTable
+from src.utils.formatters import LIST_FORMATS, list_page_offsets, render_list_page
+
+logger = logging.getLogger(__name__)
+router = Router()
+callbacks = CallbackTable(router)
+
+# Вид списка -> метод клиента Remnawave
+LIST_SOURCES = {
+    "tokens": RemnawaveApiClient.get_tokens,
+    "templates": RemnawaveApiClient.get_templates,
+    "snippets": RemnawaveApiClient.get_snippets,
+    "configs": RemnawaveApiClient.get_config_profiles,
+    "billing_history": RemnawaveApiClient.get_infra_billing_history,
+    "providers": RemnawaveApiClient.get_infra_providers,
+    "billing_nodes": RemnawaveApiClient.get_infra_billing_nodes,
+}
+
+
+async def _load(user_id: int, kind: str) -> Dict:
+    """Загрузить список из панели и запомнить его с границами страниц."""
+    records = await LIST_SOURCES[kind](RemnawaveApiClient()) or []
+    entry = {"records": records, "offsets": list_page_offsets(kind, records)}
+    results = LIST_RESULTS.get(user_id) or {}
+    results[kind] = entry
+    LIST_RESULTS[user_id] = results
+    return entry
+
+
+def _cached(user_id: int, kind: str) -> Optional[Dict]:
+    """Сохраненный список (None, если истек или загружен другим воркером)."""
+    return (LIST_RESULTS.get(user_id) or {}).get(kind)
+
+
+def _render(entry: Dict, kind: str, page: int):
+    """Текст и клавиатура страницы."""
+    pages = len(entry["offsets"])
+    page = min(max(page, 0), pages - 1)
+    text = render_list_page(kind, entry["records"], entry["offsets"], page, _)
+    return text, pagination_keyboard(kind, page, pages)
+
+
+async def send_list(message: Message, kind: str):
+    """Отправить первую страницу списка (для команд)."""
+    try:
+        entry = await _load(message.from_user.id, kind)
+    except Exception as e:
+        await message.answer(f"❌ Ошибка: {e}")
+        return
+    text, keyboard = _render(entry, kind, 0)
+    await _send_new_message(message, text, reply_markup=keyboard)
+
+
+@callbacks.prefix("page")
+async def list_page(callback: CallbackQuery, callback_args: CallbackArgs):
+    """Переключение страницы: рендерится только запрошенная страница."""
+    if not is_admin(callback.from_user.id):
+        await callback.answer()
+        return
+    if len(callback_args) < 2 or callback_args[0] not in LIST_FORMATS or not callback_args[1].isdigit():
+        await callback.answer()
+        return
+
+    kind, page = callback_args[0], int(callback_args[1])
+    refresh = callback_args[2:] == ("refresh",)
+    entry = None if refresh else _cached(callback.from_user.id, kind)
+    if entry is None:
+        try:
+            entry = await _load(callback.from_user.id, kind)
+        except Exception as e:
+            await callback.answer(f"❌ Ошибка: {e}"[:200], show_alert=True)
+            return
+
+    text, keyboard = _render(entry, kind, page)
+    await _edit_text_safe(callback.message, text, reply_markup=keyboard)
+    await callback.answer()
@@ -1,18 +1,21 @@
 """Обработка платежей."""
 import logging
 
-from aiogram import Router
-from aiogram.types import CallbackQuery, Message, PreCheckoutQuery, SuccessfulPayment
+from aiogram import F, Router
+from aiogram.types import CallbackQuery, Message, PreCheckoutQuery
 from aiogram.utils.i18n import gettext as _
 
 from src.database import Payment
+from src.handlers.common import _edit_text_safe
 from src.services.payment_service import (
     process_successful_payment,
     process_yookassa_payment,
 )
+from src.utils.callbacks import CallbackArgs, CallbackTable
 
 logger = logging.getLogger(__name__)
 router = Router()
+callbacks = CallbackTable(router)
 
 
 @router.pre_checkout_query()
@@ -40,7 +43,7 @@ async def pre_checkout_handler(query: PreCheckoutQuery):
         await query.answer(ok=False, error_message="Ошибка проверки платежа")
 
 
-@router.message(SuccessfulPayment)
+@router.message(F.successful_payment)
 async def successful_payment_handler(message: Message):
     """Обработка успешного платежа (Telegram Stars)."""
     t = _
@@ -66,11 +69,12 @@ async def successful_payment_handler(message: Message):
         await message.answer(t("payment.error"), parse_mode="Markdown")
 
 
-@router.callback_query(lambda c: c.data.startswith("yookassa:check:"))
-async def check_yookassa_payment(callback: CallbackQuery):
+# Ответ с результатом проверки важнее раннего подтверждения
+@callbacks.prefix("yookassa:check", ack=3.0)
+async def check_yookassa_payment(callback: CallbackQuery, callback_args: CallbackArgs):
     """Проверить статус платежа YooKassa."""
     t = _
-    payment_id = callback.data.replace("yookassa:check:", "")
+    payment_id = ":".join(callback_args)
 
     try:
         result = await process_yookassa_payment(payment_id, callback.bot)
@@ -83,7 +87,7 @@ async def check_yookassa_payment(callback: CallbackQuery):
         if subscription_link:
             text += f"\n\n🔗 {subscription_link}"
 
-        await callback.message.edit_text(text=text, parse_mode="Markdown")
+        await _edit_text_safe(callback.message, text)
         await callback.answer(t("payment.success_short"))
     except Exception as e:
         logger.exception(f"YooKassa payment processing error: {e}")
@@ -12,127 +12,148 @@ from src.keyboards.user_public import (
     subscription_keyboard,
     yookassa_payment_keyboard,
 )
+from src.handlers.common import _edit_text_safe
 from src.handlers.state import PENDING_INPUT
 from src.services.payment_service import (
     create_subscription_invoice,
     create_yookassa_payment,
 )
 from src.services.yookassa_service import generate_qr_code
+from src.utils.callbacks import CallbackArgs, CallbackTable
 
 logger = logging.getLogger(__name__)
 router = Router()
+callbacks = CallbackTable(router)
 
 
-@router.callback_query(lambda c: c.data.startswith("purchase:"))
-async def purchase_handler(callback: CallbackQuery):
-    """Обработка покупки."""
+async def _select_method(callback: CallbackQuery, months: int):
+    """Выбор способа оплаты."""
     t = _
-    data_parts = callback.data.split(":")
-
-    if len(data_parts) == 2:
-        # Выбор тарифа
-        months = int(data_parts[1])
-        text = t("purchase.select_method").format(months=months)
-        await callback.message.edit_text(
-            text=text,
-            reply_markup=payment_method_keyboard(months),
-            parse_mode="Markdown",
-        )
-        await callback.answer()
-
-    elif len(data_parts) == 4 and data_parts[2] == "method":
-        # Выбор способа оплаты
-        months = int(data_parts[1])
-        method = data_parts[3]
-
-        if method == "stars":
-            # Оплата через Telegram Stars
-            user_id = callback.from_user.id
-            invoice_link = await create_subscription_invoice(
-                callback.bot, user_id, months
-            )
+    text = t("purchase.select_method").format(months=months)
+    await _edit_text_safe(
+        callback.message, text, reply_markup=payment_method_keyboard(months)
+    )
+    await callback.answer()
+
+
+async def _pay_stars(callback: CallbackQuery, months: int):
+    """Оплата через Telegram Stars."""
+    t = _
+    user_id = callback.from_user.id
+    invoice_link = await create_subscription_invoice(callback.bot, user_id, months)
+
+    text = t("purchase.stars_payment").format(link=invoice_link)
+    await _edit_text_safe(callback.message, text)
+    await callback.answer()
+
+
+async def _yookassa_menu(callback: CallbackQuery, months: int):
+    """Меню выбора способа оплаты YooKassa."""
+    t = _
+    text = t("purchase.yookassa_select_method").format(months=months)
+    await _edit_text_safe(
+        callback.message, text, reply_markup=yookassa_payment_keyboard(months)
+    )
+    await callback.answer()
 
-            text = t("purchase.stars_payment").format(link=invoice_link)
-            await callback.message.edit_text(text=text, parse_mode="Markdown")
-            await callback.answer()
 
-        elif method == "yookassa":
-            # Меню выбора способа оплаты YooKassa
-            text = t("purchase.yookassa_select_method").format(months=months)
-            await callback.message.edit_text(
-                text=text,
-                reply_markup=yookassa_payment_keyboard(months),
+async def _pay_yookassa(callback: CallbackQuery, months: int, payment_method: str):
+    """Оплата через YooKassa (sbp или card)."""
+    t = _
+    user_id = callback.from_user.id
+    payment = await create_yookassa_payment(
+        callback.bot, user_id, months, payment_method=payment_method
+    )
+
+    if payment_method == "sbp":
+        # СБП - показать QR-код
+        qr_data = payment.get("confirmation", {}).get("confirmation_data", "")
+        if qr_data:
+            qr_image = generate_qr_code(qr_data)
+            await callback.message.answer_photo(
+                photo=BytesIO(qr_image),
+                caption=t("purchase.sbp_qr"),
                 parse_mode="Markdown",
             )
-            await callback.answer()
-
-    elif len(data_parts) == 5 and data_parts[2] == "method" and data_parts[3] == "yookassa":
-        # Выбор конкретного способа оплаты YooKassa
-        months = int(data_parts[1])
-        payment_method = data_parts[4]  # sbp или card
-
-        user_id = callback.from_user.id
-        payment = await create_yookassa_payment(
-            callback.bot, user_id, months, payment_method=payment_method
-        )
-
-        if payment_method == "sbp":
-            # СБП - показать QR-код
-            qr_data = payment.get("confirmation", {}).get("confirmation_data", "")
-            if qr_data:
-                qr_image = generate_qr_code(qr_data)
-                await callback.message.answer_photo(
-                    photo=BytesIO(qr_image),
-                    caption=t("purchase.sbp_qr"),
-                    parse_mode="Markdown",
-                )
-            else:
-                await callback.message.edit_text(
-                    t("purchase.error"), parse_mode="Markdown"
-                )
         else:
-            # Карта - показать ссылку
-            payment_url = payment.get("confirmation", {}).get("confirmation_url", "")
-            if payment_url:
-                text = t("purchase.card_payment").format(url=payment_url)
-                await callback.message.edit_text(text=text, parse_mode="Markdown")
-            else:
-                await callback.message.edit_text(
-                    t("purchase.error"), parse_mode="Markdown"
-                )
-
-        await callback.answer()
-
-    elif len(data_parts) == 3 and data_parts[2] == "promo":
-        # Ввод промокода
-        months = int(data_parts[1])
-        user_id = callback.from_user.id
-        PENDING_INPUT[user_id] = f"promo:{months}"
-
-        text = t("purchase.enter_promo")
-        await callback.message.edit_text(text=text, parse_mode="Markdown")
-        await callback.answer()
-
-    elif len(data_parts) == 4 and data_parts[2] == "promo" and data_parts[3].startswith("apply:"):
-        # Применить промокод
-        months = int(data_parts[1])
-        promo_code = data_parts[3].replace("apply:", "")
-
-        user_id = callback.from_user.id
-        can_use, error = PromoCode.can_use(promo_code, user_id)
-
-        if not can_use:
-            await callback.answer(error, show_alert=True)
-            return
-
-        # Создать платеж с промокодом
-        invoice_link = await create_subscription_invoice(
-            callback.bot, user_id, months, promo_code
-        )
-
-        text = t("purchase.stars_payment").format(link=invoice_link)
-        await callback.message.edit_text(text=text, parse_mode="Markdown")
-        await callback.answer()
+            await _edit_text_safe(callback.message, t("purchase.error"))
+    else:
+        # Карта - показать ссылку
+        payment_url = payment.get("confirmation", {}).get("confirmation_url", "")
+        if payment_url:
+            text = t("purchase.card_payment").format(url=payment_url)
+            await _edit_text_safe(callback.message, text)
+        else:
+            await _edit_text_safe(callback.message, t("purchase.error"))
+
+    await callback.answer()
+
+
+async def _pay_sbp(callback: CallbackQuery, months: int):
+    """Оплата через СБП."""
+    await _pay_yookassa(callback, months, "sbp")
+
+
+async def _pay_card(callback: CallbackQuery, months: int):
+    """Оплата картой."""
+    await _pay_yookassa(callback, months, "card")
+
+
+async def _enter_promo(callback: CallbackQuery, months: int):
+    """Ввод промокода."""
+    t = _
+    user_id = callback.from_user.id
+    PENDING_INPUT.set(user_id, f"promo:{months}")
+
+    text = t("purchase.enter_promo")
+    await _edit_text_safe(callback.message, text)
+    await callback.answer()
+
+
+async def _apply_promo(callback: CallbackQuery, months: int, promo_code: str):
+    """Применить промокод."""
+    t = _
+    user_id = callback.from_user.id
+    can_use, error = PromoCode.can_use(promo_code, user_id)
+
+    if not can_use:
+        await callback.answer(error, show_alert=True)
+        return
+
+    # Создать платеж с промокодом
+    invoice_link = await create_subscription_invoice(
+        callback.bot, user_id, months, promo_code
+    )
+
+    text = t("purchase.stars_payment").format(link=invoice_link)
+    await _edit_text_safe(callback.message, text)
+    await callback.answer()
+
+
+# Шаги покупки: сегменты после "purchase:<months>" -> обработчик
+PURCHASE_STEPS = {
+    (): _select_method,
+    ("method", "stars"): _pay_stars,
+    ("method", "yookassa"): _yookassa_menu,
+    ("method", "yookassa", "sbp"): _pay_sbp,
+    ("method", "yookassa", "card"): _pay_card,
+    ("promo",): _enter_promo,
+}
+
+
+@callbacks.prefix("purchase")
+async def purchase_handler(callback: CallbackQuery, callback_args: CallbackArgs):
+    """Обработка покупки."""
+    months = int(callback_args[0])
+    step = callback_args[1:]
+
+    if step[:2] == ("promo", "apply") and len(step) > 2:
+        await _apply_promo(callback, months, ":".join(step[2:]))
+        return
+
+    handler = PURCHASE_STEPS.get(step)
+    if handler is not None:
+        await handler(callback, months)
 
 
 @router.message(lambda m: m.text and not m.text.startswith("/"))
@@ -140,11 +161,8 @@ async def handle_promo_input(message: Message):
     """Обработка ввода промокода."""
     user_id = message.from_user.id
 
-    if user_id not in PENDING_INPUT:
-        return
-
-    pending = PENDING_INPUT[user_id]
-    if not pending.startswith("promo:"):
+    pending = PENDING_INPUT.get(user_id)
+    if not pending or not pending.startswith("promo:"):
         return
 
     months = int(pending.split(":")[1])
@@ -188,5 +206,5 @@ async def handle_promo_input(message: Message):
         parse_mode="Markdown",
     )
 
-    del PENDING_INPUT[user_id]
+    PENDING_INPUT.pop(user_id)
 
@@ -4,6 +4,7 @@ from aiogram.filters import Command
 from aiogram.types import Message
 from aiogram.utils.i18n import gettext as _
 
+from src.handlers.lists import send_list
 from src.utils.auth import is_admin
 
 router = Router()
@@ -15,6 +16,31 @@ async def cmd_tokens(message: Message):
     if not is_admin(message.from_user.id):
         return
 
-    # Упрощенная реализация - требует доработки
-    await message.answer("🔑 Функция управления токенами (требует доработки)")
+    await send_list(message, "tokens")
 
+
+@router.message(Command("templates"))
+async def cmd_templates(message: Message):
+    """Команда /templates - список шаблонов подписки."""
+    if not is_admin(message.from_user.id):
+        return
+
+    await send_list(message, "templates")
+
+
+@router.message(Command("snippets"))
+async def cmd_snippets(message: Message):
+    """Команда /snippets - список сниппетов."""
+    if not is_admin(message.from_user.id):
+        return
+
+    await send_list(message, "snippets")
+
+
+@router.message(Command("configs"))
+async def cmd_configs(message: Message):
+    """Команда /configs - список профилей конфигурации."""
+    if not is_admin(message.from_user.id):
+        return
+
+    await send_list(message, "configs")
@@ -1,20 +1,23 @@
 """Глобальное состояние."""
-from typing import Dict, Optional
+from src.utils.state_store import StateStore
 
 # Ожидаемый ввод от пользователей
-PENDING_INPUT: Dict[int, str] = {}
+PENDING_INPUT = StateStore("pending_input", ttl=15 * 60)
 
 # Последние сообщения бота в каждом чате
-LAST_BOT_MESSAGES: Dict[int, int] = {}
+LAST_BOT_MESSAGES = StateStore("last_bot_messages")
 
 # Контекст поиска пользователей
-USER_SEARCH_CONTEXT: Dict[int, Dict] = {}
+USER_SEARCH_CONTEXT = StateStore("user_search_context")
 
 # Целевое меню для возврата
-USER_DETAIL_BACK_TARGET: Dict[int, str] = {}
+USER_DETAIL_BACK_TARGET = StateStore("user_detail_back_target")
 
 # Текущая страница подписок
-SUBS_PAGE_BY_USER: Dict[int, int] = {}
+SUBS_PAGE_BY_USER = StateStore("subs_page_by_user")
+
+# Загруженные постраничные списки: вид -> записи и границы страниц
+LIST_RESULTS = StateStore("list_results", ttl=10 * 60)
 
 # Константы
 ADMIN_COMMAND_DELETE_DELAY = 2.0
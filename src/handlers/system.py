@@ -4,8 +4,10 @@ from aiogram.filters import Command
 from aiogram.types import CallbackQuery, Message
 from aiogram.utils.i18n import gettext as _
 
+from src.config import get_settings
 from src.services.api_client import RemnawaveApiClient
 from src.utils.auth import is_admin
+from src.utils.db_profiler import get_query_profiler
 
 router = Router()
 
@@ -51,3 +53,36 @@ async def cmd_bandwidth(message: Message):
     except Exception as e:
         await message.answer(f"❌ Ошибка: {e}")
 
+
+@router.message(Command("dbstats"))
+async def cmd_dbstats(message: Message):
+    """Команда /dbstats - самые дорогие запросы к БД."""
+    if not is_admin(message.from_user.id):
+        return
+
+    if not get_settings().DB_PROFILING:
+        await message.answer("ℹ️ Профилирование БД выключено (DB_PROFILING=true)")
+        return
+
+    profiler = get_query_profiler()
+    if message.text and "reset" in message.text.split()[1:]:
+        profiler.reset()
+        await message.answer("✅ Статистика запросов сброшена")
+        return
+
+    top = profiler.top(10)
+    if not top:
+        await message.answer("📊 Запросов пока нет")
+        return
+
+    lines = [f"📊 Топ запросов по времени (медленных: {profiler.slow_queries})"]
+    for i, stats in enumerate(top, 1):
+        scan = " ⚠️ SCAN" if stats.full_scan else ""
+        callers = ", ".join(sorted(c for c in stats.callers if c)) or "-"
+        lines.append(
+            f"\n{i}. {stats.total * 1000:.1f} ms, {stats.count} раз, "
+            f"avg {stats.total / stats.count * 1000:.2f} ms, max {stats.max * 1000:.1f} ms, "
+            f"строк {stats.rows}{scan}\n   {callers}\n   {stats.sql[:300]}"
+        )
+    # Без разметки: в тексте запросов есть символы Markdown
+    await message.answer("\n".join(lines)[:4000], parse_mode=None)
@@ -1,6 +1,9 @@
 """Публичные команды для пользователей."""
+import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
+from typing import Dict
 
 from aiogram import Router
 from aiogram.filters import Command
@@ -9,31 +12,37 @@ from aiogram.utils.i18n import gettext as _
 
 from src.config import get_settings
 from src.database import BotUser
+from src.handlers.common import _edit_text_safe
 from src.keyboards.main_menu import main_menu_keyboard
 from src.keyboards.user_public import (
     language_keyboard,
+    referral_keyboard,
     renewal_keyboard,
     resume_keyboard,
+    settings_keyboard,
     subscription_keyboard,
 )
+from src.services.access_service import cached_access, refresh_access, remember_access
 from src.services.api_client import RemnawaveApiClient
 from src.services.notification_service import notify_trial_activation
-from src.services.referral_service import grant_referral_bonus
-from src.utils.auth import is_admin
+from src.services.referral_service import get_referral_link, grant_referral_bonus
+from src.utils.callbacks import CallbackArgs, CallbackTable
+from src.utils.render_cache import get_render_cache, markup_fingerprint, text_fingerprint
+from src.utils.user_context import UserContext
 
 logger = logging.getLogger(__name__)
 router = Router()
+callbacks = CallbackTable(router)
+
+# Фоновые сверки экрана «Мой доступ» с панелью (telegram_id -> задача)
+_revalidations: Dict[int, asyncio.Task] = {}
 
 
 @router.message(Command("start"))
-async def cmd_start(message: Message):
+async def cmd_start(message: Message, user_ctx: UserContext):
     """Команда /start."""
     t = _
-    user_id = message.from_user.id
-    username = message.from_user.username
-
-    # Получить или создать пользователя
-    BotUser.get_or_create(user_id, username)
+    user_id = user_ctx.user_id
 
     # Проверить реферальную ссылку
     if message.text and len(message.text.split()) > 1:
@@ -46,7 +55,7 @@ async def cmd_start(message: Message):
             pass
 
     # Приветствие
-    if is_admin(user_id):
+    if user_ctx.is_admin:
         text = t("admin.welcome")
     else:
         text = t("user.welcome")
@@ -58,33 +67,29 @@ async def cmd_start(message: Message):
     )
 
 
-@router.callback_query(lambda c: c.data == "user:connect")
+@callbacks.exact("user:connect")
 async def user_connect(callback: CallbackQuery):
     """Меню подключения."""
     t = _
     text = t("user.connect_menu")
     from src.keyboards.user_public import subscription_keyboard
 
-    await callback.message.edit_text(
-        text=text,
-        reply_markup=subscription_keyboard(),
-        parse_mode="Markdown",
-    )
+    await _edit_text_safe(callback.message, text, reply_markup=subscription_keyboard())
     await callback.answer()
 
 
-@router.callback_query(lambda c: c.data == "user:buy")
+@callbacks.exact("user:buy")
 async def user_buy(callback: CallbackQuery):
     """Выбор тарифа."""
     await user_connect(callback)
 
 
-@router.callback_query(lambda c: c.data == "user:trial")
-async def user_trial(callback: CallbackQuery):
+@callbacks.exact("user:trial")
+async def user_trial(callback: CallbackQuery, user_ctx: UserContext):
     """Активация пробной подписки."""
     t = _
-    user_id = callback.from_user.id
-    user = BotUser.get_or_create(user_id)
+    user_id = user_ctx.user_id
+    user = user_ctx.db_user
 
     # Проверка, использован ли триал
     if user.get("trial_used"):
@@ -112,6 +117,7 @@ async def user_trial(callback: CallbackQuery):
         remnawave_uuid = remnawave_user["uuid"]
         BotUser.set_remnawave_uuid(user_id, remnawave_uuid)
         BotUser.set_trial_used(user_id)
+        user_ctx.refresh()
 
         # Получить ссылку на подписку
         subscriptions = remnawave_user.get("subscriptions", [])
@@ -121,6 +127,7 @@ async def user_trial(callback: CallbackQuery):
             if short_uuid:
                 sub_info = await api_client.get_subscription_info(short_uuid)
                 subscription_link = sub_info.get("link")
+        remember_access(user_id, remnawave_uuid, remnawave_user, subscription_link)
 
         # Начислить реферальный бонус
         await grant_referral_bonus(callback.bot, user_id)
@@ -138,67 +145,99 @@ async def user_trial(callback: CallbackQuery):
         else:
             text = t("trial.success_no_link").format(days=settings.TRIAL_DAYS)
 
-        await callback.message.edit_text(text=text, parse_mode="Markdown")
+        await _edit_text_safe(callback.message, text)
     except Exception as e:
         logger.exception(f"Trial activation error: {e}")
-        await callback.message.edit_text(
-            t("trial.error"), parse_mode="Markdown"
-        )
+        await _edit_text_safe(callback.message, t("trial.error"))
 
 
-@router.callback_query(lambda c: c.data == "user:my_access")
-async def user_my_access(callback: CallbackQuery):
-    """Информация о текущей подписке."""
+def _access_text(access: Dict) -> str:
+    """Текст экрана «Мой доступ»."""
     t = _
-    user_id = callback.from_user.id
-    user = BotUser.get_or_create(user_id)
-    remnawave_uuid = user.get("remnawave_user_uuid")
+    text = t("user.subscription_info").format(expire_at=access["expire_at"])
+    if access.get("subscription_link"):
+        text += f"\n\n🔗 {access['subscription_link']}"
+    return text
 
-    if not remnawave_uuid:
-        await callback.message.edit_text(
-            t("user.no_subscription"), parse_mode="Markdown"
-        )
-        await callback.answer()
+
+async def _revalidate_access(
+    message: Message, user_id: int, remnawave_uuid: str, cached: Dict, shown_text: str
+):
+    """Сверить показанную копию с панелью и обновить экран, если данные изменились."""
+    try:
+        access = await refresh_access(user_id, remnawave_uuid, cached)
+    except Exception as e:
+        logger.warning(f"⚠️ My access: panel check failed, cached data kept: {e!r}")
         return
 
+    text = _access_text(access)
+    if text == shown_text:
+        return
+    # Пользователь мог уйти с экрана, пока шла проверка
+    cache = get_render_cache()
+    chat_id, message_id = message.chat.id, message.message_id
+    shown = cache.get(chat_id, message_id)
+    if shown is None or shown[0] != text_fingerprint(shown_text, "Markdown"):
+        return
+    # Только правка: без _edit_text_safe, который при ошибке отправит новое сообщение
     try:
-        api_client = RemnawaveApiClient()
-        remnawave_user = await api_client.get_user_by_uuid(remnawave_uuid)
+        await message.edit_text(text=text, parse_mode="Markdown")
+    except Exception as e:
+        logger.debug(f"My access: background edit dropped: {e!r}")
+        cache.forget(chat_id, message_id)
+        return
+    cache.remember(chat_id, message_id, text_fingerprint(text, "Markdown"), markup_fingerprint(None))
 
-        expire_at = remnawave_user.get("expire_at", "")
-        subscriptions = remnawave_user.get("subscriptions", [])
 
-        text = t("user.subscription_info").format(expire_at=expire_at)
+@callbacks.exact("user:my_access")
+async def user_my_access(callback: CallbackQuery, user_ctx: UserContext):
+    """Информация о текущей подписке (из локальной копии, панель сверяется в фоне)."""
+    t = _
+    user_id = user_ctx.user_id
+    remnawave_uuid = user_ctx.db_user.get("remnawave_user_uuid")
 
-        if subscriptions:
-            short_uuid = subscriptions[0].get("short_uuid")
-            if short_uuid:
-                sub_info = await api_client.get_subscription_info(short_uuid)
-                subscription_link = sub_info.get("link")
-                if subscription_link:
-                    text += f"\n\n🔗 {subscription_link}"
+    if not remnawave_uuid:
+        await _edit_text_safe(callback.message, t("user.no_subscription"))
+        await callback.answer()
+        return
 
-        await callback.message.edit_text(text=text, parse_mode="Markdown")
-    except Exception as e:
-        logger.exception(f"Get subscription error: {e}")
-        await callback.message.edit_text(t("user.error"), parse_mode="Markdown")
+    cached = cached_access(user_id, remnawave_uuid)
+    if cached is None:
+        # Копии еще нет - ждем панель
+        try:
+            text = _access_text(await refresh_access(user_id, remnawave_uuid))
+        except Exception as e:
+            logger.exception(f"Get subscription error: {e!r}")
+            text = t("user.error")
+        await _edit_text_safe(callback.message, text)
+        await callback.answer()
+        return
 
+    text = _access_text(cached)
+    await _edit_text_safe(callback.message, text)
     await callback.answer()
 
+    stale = time.time() - cached["updated_at"] >= get_settings().ACCESS_REVALIDATE_AFTER
+    if stale and user_id not in _revalidations:
+        task = asyncio.create_task(
+            _revalidate_access(callback.message, user_id, remnawave_uuid, cached, text)
+        )
+        _revalidations[user_id] = task
+        task.add_done_callback(lambda _task: _revalidations.pop(user_id, None))
+
 
-@router.callback_query(lambda c: c.data == "user:settings")
-async def user_settings(callback: CallbackQuery):
+@callbacks.exact("user:settings")
+async def user_settings(callback: CallbackQuery, user_ctx: UserContext):
     """Настройки пользователя."""
     t = _
-    user_id = callback.from_user.id
-    user = BotUser.get_or_create(user_id)
+    user_id = user_ctx.user_id
+    user = user_ctx.db_user
 
-    auto_renewal = BotUser.get_auto_renewal(user_id)
+    auto_renewal = bool(user.get("auto_renewal"))
     language = user.get("language", "ru")
 
     # Генерация реферальной ссылки
-    bot_info = await callback.bot.get_me()
-    referral_link = f"https://t.me/{bot_info.username}?start={user_id}"
+    referral_link = await get_referral_link(callback.bot, user_id)
 
     text = t("user.settings").format(
         language=language,
@@ -206,83 +245,53 @@ async def user_settings(callback: CallbackQuery):
         referral_link=referral_link,
     )
 
-    from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
-
-    buttons = [
-        [
-            InlineKeyboardButton(
-                text=t("user.change_language"), callback_data="user:change_language"
-            )
-        ],
-        [
-            InlineKeyboardButton(
-                text=t("user.toggle_auto_renewal"),
-                callback_data="auto_renewal:toggle",
-            )
-        ],
-        [
-            InlineKeyboardButton(
-                text=t("user.referral"), callback_data="user:referral"
-            )
-        ],
-        [
-            InlineKeyboardButton(
-                text=t("nav.back"), callback_data="nav:main"
-            )
-        ],
-    ]
-
-    await callback.message.edit_text(
-        text=text,
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons),
-        parse_mode="Markdown",
-    )
+    await _edit_text_safe(callback.message, text, reply_markup=settings_keyboard())
     await callback.answer()
 
 
-@router.callback_query(lambda c: c.data == "user:change_language")
+@callbacks.exact("user:change_language")
 async def user_change_language(callback: CallbackQuery):
     """Смена языка."""
     t = _
-    await callback.message.edit_text(
-        text=t("user.select_language"),
-        reply_markup=language_keyboard(),
-        parse_mode="Markdown",
+    await _edit_text_safe(
+        callback.message, t("user.select_language"), reply_markup=language_keyboard()
     )
     await callback.answer()
 
 
-@router.callback_query(lambda c: c.data.startswith("lang:"))
-async def user_set_language(callback: CallbackQuery):
+@callbacks.prefix("lang")
+async def user_set_language(
+    callback: CallbackQuery, user_ctx: UserContext, callback_args: CallbackArgs
+):
     """Установить язык."""
     t = _
-    lang = callback.data.split(":")[1]
-    user_id = callback.from_user.id
+    lang = callback_args[0]
 
-    BotUser.update_language(user_id, lang)
+    BotUser.update_language(user_ctx.user_id, lang)
+    user_ctx.refresh()
 
     # Локаль будет применена автоматически через middleware при следующем запросе
     await callback.answer(t("user.language_changed"))
-    await user_settings(callback)
+    await user_settings(callback, user_ctx)
 
 
-@router.callback_query(lambda c: c.data == "auto_renewal:toggle")
-async def toggle_auto_renewal(callback: CallbackQuery):
+@callbacks.exact("auto_renewal:toggle")
+async def toggle_auto_renewal(callback: CallbackQuery, user_ctx: UserContext):
     """Включить/выключить автопродление."""
     t = _
-    user_id = callback.from_user.id
-    current = BotUser.get_auto_renewal(user_id)
-    BotUser.set_auto_renewal(user_id, not current)
+    current = bool(user_ctx.db_user.get("auto_renewal"))
+    BotUser.set_auto_renewal(user_ctx.user_id, not current)
+    user_ctx.refresh()
 
     await callback.answer(
         t("user.auto_renewal_enabled")
         if not current
         else t("user.auto_renewal_disabled")
     )
-    await user_settings(callback)
+    await user_settings(callback, user_ctx)
 
 
-@router.callback_query(lambda c: c.data == "user:referral")
+@callbacks.exact("user:referral")
 async def user_referral(callback: CallbackQuery):
     """Реферальная программа."""
     t = _
@@ -293,8 +302,7 @@ async def user_referral(callback: CallbackQuery):
     referrals_count = Referral.get_referrals_count(user_id)
     bonus_days = Referral.get_bonus_days(user_id)
 
-    bot_info = await callback.bot.get_me()
-    referral_link = f"https://t.me/{bot_info.username}?start={user_id}"
+    referral_link = await get_referral_link(callback.bot, user_id)
 
     text = t("user.referral_info").format(
         referrals_count=referrals_count,
@@ -302,41 +310,27 @@ async def user_referral(callback: CallbackQuery):
         referral_link=referral_link,
     )
 
-    from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
-
-    buttons = [
-        [
-            InlineKeyboardButton(
-                text=t("nav.back"), callback_data="user:settings"
-            )
-        ]
-    ]
-
-    await callback.message.edit_text(
-        text=text,
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons),
-        parse_mode="Markdown",
-    )
+    await _edit_text_safe(callback.message, text, reply_markup=referral_keyboard())
     await callback.answer()
 
 
-@router.callback_query(lambda c: c.data == "user:resume")
+@callbacks.exact("user:resume")
 async def user_resume(callback: CallbackQuery):
     """Возобновить доступ."""
     await user_connect(callback)
 
 
-@router.callback_query(lambda c: c.data == "user:renew")
+@callbacks.exact("user:renew")
 async def user_renew(callback: CallbackQuery):
     """Продлить доступ."""
     await user_connect(callback)
 
 
-@router.callback_query(lambda c: c.data == "user:support")
+@callbacks.exact("user:support")
 async def user_support(callback: CallbackQuery):
     """Поддержка."""
     t = _
     text = t("user.support")
-    await callback.message.edit_text(text=text, parse_mode="Markdown")
+    await _edit_text_safe(callback.message, text)
     await callback.answer()
 
@@ -0,0 +1,35 @@
+"""Кэш готовых клавиатур."""
+from functools import lru_cache
+from typing import Callable
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from pydantic import ConfigDict
+
+from src.utils.i18n import get_i18n, on_locales_reload
+
+# Количество вариантов на одну клавиатуру (локаль x параметры)
+KEYBOARD_CACHE_SIZE = 256
+
+
+class FrozenInlineKeyboardButton(InlineKeyboardButton):
+    """Кнопка, которую нельзя изменить после создания."""
+
+    model_config = ConfigDict(frozen=True)
+
+
+class FrozenInlineKeyboardMarkup(InlineKeyboardMarkup):
+    """Клавиатура, которую можно переиспользовать между апдейтами."""
+
+    model_config = ConfigDict(frozen=True)
+
+
+def current_locale() -> str:
+    """Текущая локаль апдейта (или локаль по умолчанию)."""
+    return get_i18n().current_locale
+
+
+def cached_keyboard(builder: Callable) -> Callable:
+    """Кэшировать клавиатуру по аргументам; сбрасывается при перезагрузке локалей."""
+    cached = lru_cache(maxsize=KEYBOARD_CACHE_SIZE)(builder)
+    on_locales_reload(cached.cache_clear)
+    return cached
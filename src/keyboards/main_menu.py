@@ -1,16 +1,27 @@
 """Главное меню."""
-from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
-from aiogram.utils.i18n import gettext as _
+from aiogram.types import InlineKeyboardMarkup
 
+from src.keyboards.cache import (
+    FrozenInlineKeyboardButton as InlineKeyboardButton,
+    FrozenInlineKeyboardMarkup,
+    cached_keyboard,
+    current_locale,
+)
 from src.utils.auth import is_admin
+from src.utils.i18n import get_i18n
 
 
 def main_menu_keyboard(user_id: int) -> InlineKeyboardMarkup:
     """Главное меню (админ или пользователь)."""
-    t = _
+    return _main_menu_keyboard(current_locale(), is_admin(user_id))
+
+
+@cached_keyboard
+def _main_menu_keyboard(locale: str, admin: bool) -> InlineKeyboardMarkup:
+    t = get_i18n().translator(locale)
     buttons = []
 
-    if is_admin(user_id):
+    if admin:
         # Админское меню
         buttons.append([
             InlineKeyboardButton(
@@ -71,5 +82,5 @@ def main_menu_keyboard(user_id: int) -> InlineKeyboardMarkup:
             )
         ])
 
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
+    return FrozenInlineKeyboardMarkup(inline_keyboard=buttons)
 
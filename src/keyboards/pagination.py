@@ -0,0 +1,40 @@
+"""Клавиатура постраничных списков."""
+from aiogram.types import InlineKeyboardMarkup
+
+from src.keyboards.cache import (
+    FrozenInlineKeyboardButton as InlineKeyboardButton,
+    FrozenInlineKeyboardMarkup,
+    cached_keyboard,
+    current_locale,
+)
+from src.utils.i18n import get_i18n
+
+
+def pagination_keyboard(kind: str, page: int, pages: int) -> InlineKeyboardMarkup:
+    """Переключение страниц списка (callback page:<вид>:<страница>)."""
+    return _pagination_keyboard(current_locale(), kind, page, pages)
+
+
+@cached_keyboard
+def _pagination_keyboard(locale: str, kind: str, page: int, pages: int) -> InlineKeyboardMarkup:
+    t = get_i18n().translator(locale)
+    buttons = []
+
+    if pages > 1:
+        row = []
+        if page > 0:
+            row.append(InlineKeyboardButton(text="◀️", callback_data=f"page:{kind}:{page - 1}"))
+        # Номер страницы: нажатие загружает список из панели заново
+        row.append(
+            InlineKeyboardButton(
+                text=f"🔄 {page + 1}/{pages}", callback_data=f"page:{kind}:{page}:refresh"
+            )
+        )
+        if page < pages - 1:
+            row.append(InlineKeyboardButton(text="▶️", callback_data=f"page:{kind}:{page + 1}"))
+        buttons.append(row)
+
+    buttons.append([
+        InlineKeyboardButton(text=t("nav.main"), callback_data="nav:main")
+    ])
+    return FrozenInlineKeyboardMarkup(inline_keyboard=buttons)
@@ -1,11 +1,24 @@
 """Клавиатуры для публичных пользователей."""
-from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
-from aiogram.utils.i18n import gettext as _
+from aiogram.types import InlineKeyboardMarkup
+
+from src.config import get_settings
+from src.keyboards.cache import (
+    FrozenInlineKeyboardButton as InlineKeyboardButton,
+    FrozenInlineKeyboardMarkup,
+    cached_keyboard,
+    current_locale,
+)
+from src.utils.i18n import get_i18n
 
 
 def subscription_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура выбора тарифа."""
-    t = _
+    return _subscription_keyboard(current_locale())
+
+
+@cached_keyboard
+def _subscription_keyboard(locale: str) -> InlineKeyboardMarkup:
+    t = get_i18n().translator(locale)
     buttons = [
         [
             InlineKeyboardButton(
@@ -29,12 +42,21 @@ def subscription_keyboard() -> InlineKeyboardMarkup:
         ],
         [InlineKeyboardButton(text=t("nav.back"), callback_data="user:connect")],
     ]
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
+    return FrozenInlineKeyboardMarkup(inline_keyboard=buttons)
 
 
 def payment_method_keyboard(months: int) -> InlineKeyboardMarkup:
     """Клавиатура выбора способа оплаты."""
-    t = _
+    settings = get_settings()
+    yookassa_enabled = bool(settings.YOOKASSA_SHOP_ID and settings.YOOKASSA_SECRET_KEY)
+    return _payment_method_keyboard(current_locale(), months, yookassa_enabled)
+
+
+@cached_keyboard
+def _payment_method_keyboard(
+    locale: str, months: int, yookassa_enabled: bool
+) -> InlineKeyboardMarkup:
+    t = get_i18n().translator(locale)
     buttons = [
         [
             InlineKeyboardButton(
@@ -44,9 +66,7 @@ def payment_method_keyboard(months: int) -> InlineKeyboardMarkup:
     ]
 
     # Добавить YooKassa, если настроен
-    from src.config import get_settings
-    settings = get_settings()
-    if settings.YOOKASSA_SHOP_ID and settings.YOOKASSA_SECRET_KEY:
+    if yookassa_enabled:
         buttons.append([
             InlineKeyboardButton(
                 text=t("payment.yookassa"),
@@ -58,12 +78,17 @@ def payment_method_keyboard(months: int) -> InlineKeyboardMarkup:
         InlineKeyboardButton(text=t("nav.back"), callback_data=f"purchase:{months}")
     ])
 
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
+    return FrozenInlineKeyboardMarkup(inline_keyboard=buttons)
 
 
 def yookassa_payment_keyboard(months: int) -> InlineKeyboardMarkup:
     """Клавиатура выбора способа оплаты YooKassa."""
-    t = _
+    return _yookassa_payment_keyboard(current_locale(), months)
+
+
+@cached_keyboard
+def _yookassa_payment_keyboard(locale: str, months: int) -> InlineKeyboardMarkup:
+    t = get_i18n().translator(locale)
     buttons = [
         [
             InlineKeyboardButton(
@@ -89,12 +114,17 @@ def yookassa_payment_keyboard(months: int) -> InlineKeyboardMarkup:
             )
         ],
     ]
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
+    return FrozenInlineKeyboardMarkup(inline_keyboard=buttons)
 
 
 def language_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура выбора языка."""
-    t = _
+    return _language_keyboard(current_locale())
+
+
+@cached_keyboard
+def _language_keyboard(locale: str) -> InlineKeyboardMarkup:
+    t = get_i18n().translator(locale)
     buttons = [
         [
             InlineKeyboardButton(text="🇷🇺 Русский", callback_data="lang:ru"),
@@ -102,12 +132,69 @@ def language_keyboard() -> InlineKeyboardMarkup:
         ],
         [InlineKeyboardButton(text=t("nav.back"), callback_data="user:settings")],
     ]
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
+    return FrozenInlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def settings_keyboard() -> InlineKeyboardMarkup:
+    """Клавиатура настроек пользователя."""
+    return _settings_keyboard(current_locale())
+
+
+@cached_keyboard
+def _settings_keyboard(locale: str) -> InlineKeyboardMarkup:
+    t = get_i18n().translator(locale)
+    buttons = [
+        [
+            InlineKeyboardButton(
+                text=t("user.change_language"), callback_data="user:change_language"
+            )
+        ],
+        [
+            InlineKeyboardButton(
+                text=t("user.toggle_auto_renewal"),
+                callback_data="auto_renewal:toggle",
+            )
+        ],
+        [
+            InlineKeyboardButton(
+                text=t("user.referral"), callback_data="user:referral"
+            )
+        ],
+        [
+            InlineKeyboardButton(
+                text=t("nav.back"), callback_data="nav:main"
+            )
+        ],
+    ]
+    return FrozenInlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def referral_keyboard() -> InlineKeyboardMarkup:
+    """Клавиатура реферальной программы."""
+    return _referral_keyboard(current_locale())
+
+
+@cached_keyboard
+def _referral_keyboard(locale: str) -> InlineKeyboardMarkup:
+    t = get_i18n().translator(locale)
+    buttons = [
+        [
+            InlineKeyboardButton(
+                text=t("nav.back"), callback_data="user:settings"
+            )
+        ]
+    ]
+    return FrozenInlineKeyboardMarkup(inline_keyboard=buttons)
 
 
 def renewal_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура для продления подписки."""
-    t = _
+    return _renewal_keyboard(current_locale())
+
+
+@cached_keyboard
+def _renewal_keyboard(locale: str) -> InlineKeyboardMarkup:
+    t = get_i18n().translator(locale)
     buttons = [
         [
             InlineKeyboardButton(
@@ -115,12 +202,17 @@ def renewal_keyboard() -> InlineKeyboardMarkup:
             )
         ],
     ]
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
+    return FrozenInlineKeyboardMarkup(inline_keyboard=buttons)
 
 
 def resume_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура для возобновления доступа."""
-    t = _
+    return _resume_keyboard(current_locale())
+
+
+@cached_keyboard
+def _resume_keyboard(locale: str) -> InlineKeyboardMarkup:
+    t = get_i18n().translator(locale)
     buttons = [
         [
             InlineKeyboardButton(
@@ -128,5 +220,4 @@ def resume_keyboard() -> InlineKeyboardMarkup:
             )
         ],
     ]
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
-
+    return FrozenInlineKeyboardMarkup(inline_keyboard=buttons)
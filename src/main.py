@@ -2,9 +2,13 @@
 import asyncio
 import logging
 import sys
+from typing import Optional
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.session.base import BaseSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
 
 from src.config import get_settings
@@ -15,6 +19,7 @@ from src.handlers import (
     commands,
     errors,
     hosts,
+    lists,
     navigation,
     nodes,
     payments,
@@ -25,11 +30,29 @@ from src.handlers import (
     users,
 )
 from src.services.api_client import RemnawaveApiClient
+from src.services.deletion_scheduler import get_deletion_scheduler
 from src.services.renewal_service import start_renewal_checker
 from src.services.yookassa_service import init_yookassa
-from src.utils.auth import AdminMiddleware
-from src.utils.i18n import get_i18n_middleware
+from src.utils.app_context import get_app_context
+from src.utils.callback_ack import (
+    AnsweredCallbackRequestMiddleware,
+    get_callback_ack_middleware,
+)
+from src.utils.i18n import get_i18n
+from src.utils.instrumentation import HandlerMetricsMiddleware, TelegramMetricsMiddleware
 from src.utils.logger import setup_logger
+from src.utils.loop_monitor import start_loop_monitor
+from src.utils.throttling import get_throttling_middleware
+from src.utils.tracing import TracingMiddleware
+from src.utils.update_capture import get_update_capture_middleware
+from src.utils.user_context import get_context_middleware
+from src.web.server import (
+    create_web_app,
+    run_webhook,
+    start_metrics_server,
+    start_web_server,
+)
+from src.workers import run_workers
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +69,72 @@ async def check_api_connection():
         return False
 
 
+def create_bot(session: Optional[BaseSession] = None) -> Bot:
+    """Создать экземпляр бота (session - своя сессия, например для бенчмарков)."""
+    settings = get_settings()
+    if session is None and settings.TELEGRAM_API_URL:
+        session = AiohttpSession(
+            api=TelegramAPIServer.from_base(settings.TELEGRAM_API_URL.rstrip("/"))
+        )
+    bot = Bot(
+        token=settings.BOT_TOKEN,
+        session=session,
+        default=DefaultBotProperties(parse_mode=ParseMode.MARKDOWN),
+    )
+    # Не отправлять повторный ответ на callback, на который уже ответили заранее
+    bot.session.middleware(AnsweredCallbackRequestMiddleware(get_callback_ack_middleware()))
+    bot.session.middleware(TelegramMetricsMiddleware())
+    return bot
+
+
+def create_dispatcher() -> Dispatcher:
+    """Создать диспетчер со всеми middleware и обработчиками."""
+    settings = get_settings()
+    dp = Dispatcher()
+
+    # Регистрация middleware
+    if settings.UPDATE_CAPTURE_ENABLED:
+        # Первой, чтобы записывались и апдейты, отклоненные дальше
+        dp.update.outer_middleware(get_update_capture_middleware())
+
+    if settings.TRACING_ENABLED:
+        dp.update.outer_middleware(TracingMiddleware(settings.SLOW_UPDATE_THRESHOLD))
+
+    handler_metrics = HandlerMetricsMiddleware()
+    dp.message.middleware(handler_metrics)
+    dp.callback_query.middleware(handler_metrics)
+    dp.pre_checkout_query.middleware(handler_metrics)
+
+    if settings.THROTTLE_RATE > 0:
+        # Outer: отклоняем флуд до фильтров и обращений к БД
+        throttling_middleware = get_throttling_middleware()
+        dp.message.outer_middleware(throttling_middleware)
+        dp.callback_query.outer_middleware(throttling_middleware)
+
+    context_middleware = get_context_middleware()
+    dp.message.middleware(context_middleware)
+    dp.callback_query.middleware(context_middleware)
+    dp.callback_query.middleware(get_callback_ack_middleware())
+
+    # Регистрация обработчиков
+    dp.include_router(errors.router)
+    dp.include_router(commands.router)
+    dp.include_router(navigation.router)
+    dp.include_router(user_public.router)
+    dp.include_router(purchase.router)
+    dp.include_router(payments.router)
+    dp.include_router(users.router)
+    dp.include_router(nodes.router)
+    dp.include_router(hosts.router)
+    dp.include_router(resources.router)
+    dp.include_router(billing.router)
+    dp.include_router(lists.router)
+    dp.include_router(bulk.router)
+    dp.include_router(system.router)
+
+    return dp
+
+
 async def main():
     """Главная функция."""
     # Настройка логирования
@@ -60,6 +149,10 @@ async def main():
     init_database()
     logger.info("✅ Database initialized")
 
+    # Проверка полноты переводов
+    for locale, keys in get_i18n().missing_keys().items():
+        logger.warning(f"⚠️ Locale '{locale}' is missing keys: {', '.join(keys)}")
+
     # Проверка подключения к API
     if not await check_api_connection():
         logger.error("❌ Cannot connect to API. Exiting.")
@@ -72,41 +165,50 @@ async def main():
     except Exception as e:
         logger.warning(f"⚠️ YooKassa not initialized: {e}")
 
+    # Мониторинг задержек event loop (если включен)
+    start_loop_monitor()
+
+    # Локальный сервер метрик
+    if settings.METRICS_ENABLED:
+        await start_metrics_server(settings.METRICS_PORT)
+
     # Создание бота и диспетчера
-    bot = Bot(
-        token=settings.BOT_TOKEN,
-        default=DefaultBotProperties(parse_mode=ParseMode.MARKDOWN),
-    )
-    dp = Dispatcher()
+    bot = create_bot()
+    dp = create_dispatcher()
 
-    # Регистрация middleware
-    dp.message.middleware(AdminMiddleware())
-    dp.callback_query.middleware(AdminMiddleware())
-    dp.message.middleware(get_i18n_middleware())
-    dp.callback_query.middleware(get_i18n_middleware())
+    # Данные бота запрашиваются один раз при старте
+    bot_user = await get_app_context().get_bot_user(bot)
+    logger.info(f"✅ Bot identity loaded: @{bot_user.username}")
 
-    # Регистрация обработчиков
-    dp.include_router(errors.router)
-    dp.include_router(commands.router)
-    dp.include_router(navigation.router)
-    dp.include_router(user_public.router)
-    dp.include_router(purchase.router)
-    dp.include_router(payments.router)
-    dp.include_router(users.router)
-    dp.include_router(nodes.router)
-    dp.include_router(hosts.router)
-    dp.include_router(resources.router)
-    dp.include_router(billing.router)
-    dp.include_router(bulk.router)
-    dp.include_router(system.router)
+    if settings.WORKERS > 1:
+        # Апдейты обрабатываются в отдельных процессах, фоновые задачи - на воркере 0
+        await run_workers(bot, dp)
+        return
 
     # Запуск фоновой задачи автопродления
     asyncio.create_task(start_renewal_checker(bot, interval_hours=6))
     logger.info("✅ Renewal checker started")
 
+    # Планировщик удаления сообщений (восстанавливает очередь из БД)
+    get_deletion_scheduler().start(bot)
+
+    if settings.BOT_MODE == "webhook":
+        # Запуск вебхука (aiohttp сервер)
+        await run_webhook(dp, bot)
+        return
+
+    # Служебный HTTP сервер (health, YooKassa) в режиме polling
+    runner = None
+    if settings.WEB_SERVER_ENABLED:
+        runner = await start_web_server(create_web_app(dp, bot, webhook=False))
+
     # Запуск polling
     logger.info("✅ Bot started. Polling...")
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        if runner:
+            await runner.cleanup()
 
 
 if __name__ == "__main__":
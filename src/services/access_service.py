@@ -0,0 +1,89 @@
+"""Данные экрана «Мой доступ»: локальная копия подписки из панели."""
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from src.config import get_settings
+from src.database import SubscriptionCache
+from src.services.api_client import NotFoundError, RemnawaveApiClient
+
+logger = logging.getLogger(__name__)
+
+
+def _short_uuid(remnawave_user: Dict) -> Optional[str]:
+    """short_uuid первой подписки пользователя панели."""
+    subscriptions = remnawave_user.get("subscriptions") or []
+    return subscriptions[0].get("short_uuid") if subscriptions else None
+
+
+def remember_access(
+    telegram_id: int,
+    remnawave_uuid: str,
+    remnawave_user: Dict,
+    subscription_link: Optional[str],
+):
+    """Сохранить данные, уже полученные из панели (триал, оплата).
+
+    Копия не обязательна: ошибка только пишется в лог, чтобы не прервать
+    оплату или триал после изменения подписки в панели.
+    """
+    try:
+        SubscriptionCache.save(
+            telegram_id,
+            remnawave_user_uuid=remnawave_uuid,
+            short_uuid=_short_uuid(remnawave_user),
+            expire_at=remnawave_user.get("expire_at") or "",
+            subscription_link=subscription_link,
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Subscription cache update failed for {telegram_id}: {e!r}")
+
+
+async def _fetch_access(remnawave_uuid: str, cached: Optional[Dict]) -> Dict:
+    """Запросить срок и ссылку подписки в панели."""
+    api_client = RemnawaveApiClient()
+    remnawave_user = await api_client.get_user_by_uuid(remnawave_uuid)
+    short_uuid = _short_uuid(remnawave_user)
+
+    subscription_link = None
+    if short_uuid:
+        if cached and cached.get("short_uuid") == short_uuid and cached.get("subscription_link"):
+            # Ссылка определяется short_uuid: второй запрос нужен только после его смены
+            subscription_link = cached["subscription_link"]
+        else:
+            sub_info = await api_client.get_subscription_info(short_uuid)
+            subscription_link = sub_info.get("link")
+
+    return {
+        "remnawave_user_uuid": remnawave_uuid,
+        "short_uuid": short_uuid,
+        "expire_at": remnawave_user.get("expire_at") or "",
+        "subscription_link": subscription_link,
+    }
+
+
+async def refresh_access(
+    telegram_id: int, remnawave_uuid: str, cached: Optional[Dict] = None
+) -> Dict:
+    """Получить данные из панели (не дольше ACCESS_FETCH_TIMEOUT) и сохранить копию."""
+    try:
+        access = await asyncio.wait_for(
+            _fetch_access(remnawave_uuid, cached), get_settings().ACCESS_FETCH_TIMEOUT
+        )
+    except NotFoundError:
+        # Пользователь удален из панели: копию больше не показываем
+        SubscriptionCache.delete(telegram_id)
+        raise
+    try:
+        SubscriptionCache.save(telegram_id, **access)
+    except Exception as e:
+        logger.warning(f"⚠️ Subscription cache update failed for {telegram_id}: {e!r}")
+    return access
+
+
+def cached_access(telegram_id: int, remnawave_uuid: str) -> Optional[Dict]:
+    """Локальная копия (None, если ее нет или она от другого пользователя панели)."""
+    cached = SubscriptionCache.get(telegram_id)
+    if cached and cached["remnawave_user_uuid"] == remnawave_uuid:
+        return cached
+    return None
@@ -1,9 +1,53 @@
 """Клиент Remnawave API."""
 import asyncio
+import re
+import ssl
+import time
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 
 import httpx
 from src.config import get_settings
+from src.utils.metrics import Counter, Histogram
+from src.utils.tracing import span
+
+API_REQUEST_DURATION = Histogram(
+    "remnawave_request_duration_seconds",
+    "Remnawave API request duration (one attempt)",
+    ["method", "endpoint"],
+)
+API_REQUESTS = Counter(
+    "remnawave_requests_total",
+    "Remnawave API request attempts by status",
+    ["method", "endpoint", "status"],
+)
+API_RETRIES = Counter(
+    "remnawave_retries_total",
+    "Remnawave API request retries",
+    ["method", "endpoint"],
+)
+
+_UUID_RE = re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
+
+# Сегменты, за которыми в пути идет идентификатор без формата UUID
+_ID_AFTER_SEGMENTS = {"sub", "snippets"}
+
+
+def endpoint_label(endpoint: str) -> str:
+    """Шаблон пути для метрик: без query и с {id} вместо идентификаторов."""
+    parts = endpoint.split("?", 1)[0].split("/")
+    for i, part in enumerate(parts):
+        if part.isdigit() or _UUID_RE.match(part) or (
+            i > 0 and parts[i - 1] in _ID_AFTER_SEGMENTS and part
+        ):
+            parts[i] = "{id}"
+    return "/".join(parts)
+
+
+@lru_cache(maxsize=1)
+def _ssl_context() -> ssl.SSLContext:
+    """Общий SSL контекст (загрузка сертификатов CA занимает десятки мс)."""
+    return httpx.create_ssl_context()
 
 
 class ApiClientError(Exception):
@@ -51,13 +95,22 @@ class RemnawaveApiClient:
         """Выполнить HTTP запрос с retry."""
         url = f"{self.base_url}{endpoint}"
         headers = self._get_headers()
+        label = endpoint_label(endpoint)
 
         for attempt in range(retries):
+            if attempt:
+                API_RETRIES.labels(method, label).inc()
+            status = "error"
+            started = time.perf_counter()
             try:
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    response = await client.request(
-                        method, url, headers=headers, json=json_data, params=params
-                    )
+                async with httpx.AsyncClient(
+                    timeout=self.timeout, verify=_ssl_context()
+                ) as client:
+                    with span("remnawave", method=method, endpoint=label, attempt=attempt):
+                        response = await client.request(
+                            method, url, headers=headers, json=json_data, params=params
+                        )
+                    status = str(response.status_code)
 
                     if response.status_code == 404:
                         raise NotFoundError(f"Not found: {endpoint}")
@@ -73,6 +126,7 @@ class RemnawaveApiClient:
                     return data
 
             except httpx.TimeoutException:
+                status = "timeout"
                 if attempt == retries - 1:
                     raise ApiClientError(f"Timeout: {endpoint}")
                 await asyncio.sleep(2 ** attempt)
@@ -84,11 +138,20 @@ class RemnawaveApiClient:
                     raise ApiClientError(f"HTTP error: {e.response.status_code}")
                 await asyncio.sleep(2 ** attempt)
 
+            except ApiClientError:
+                raise
+
             except Exception as e:
                 if attempt == retries - 1:
                     raise ApiClientError(f"Request failed: {str(e)}")
                 await asyncio.sleep(2 ** attempt)
 
+            finally:
+                API_REQUEST_DURATION.labels(method, label).observe(
+                    time.perf_counter() - started
+                )
+                API_REQUESTS.labels(method, label, status).inc()
+
     # Методы для работы с пользователями
     async def get_user_by_username(self, username: str) -> Optional[Dict]:
         """Получить пользователя по username."""
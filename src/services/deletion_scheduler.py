@@ -0,0 +1,157 @@
+"""Отложенное удаление сообщений: одна задача и куча таймеров."""
+import asyncio
+import heapq
+import logging
+import math
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from aiogram import Bot
+
+from src.database import PendingDeletion
+
+logger = logging.getLogger(__name__)
+
+# Лимит deleteMessages на один запрос
+DELETE_BATCH_SIZE = 100
+
+# Шаг таймера: удаления внутри одного шага выполняются одной пачкой
+TICK_SECONDS = 0.5
+
+# Сообщения старше 48 часов бот удалить не может
+MAX_MESSAGE_AGE = 48 * 3600
+
+
+class DeletionScheduler:
+    """Планировщик удаления сообщений.
+
+    Все удаления хранятся в одной куче (due_at, chat_id, message_id) и
+    обрабатываются одной задачей. Наступившие удаления группируются по чатам
+    и отправляются через ``deleteMessages``. Очередь сохраняется в БД и
+    восстанавливается при старте.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, int]] = []
+        self._scheduled: Set[Tuple[int, int]] = set()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.deleted = 0
+        self.failed = 0
+        self.batches = 0
+
+    def schedule(self, chat_id: int, message_id: int, delay: float):
+        """Запланировать удаление сообщения через delay секунд."""
+        if (chat_id, message_id) in self._scheduled:
+            return
+        due_at = math.ceil((time.time() + delay) / TICK_SECONDS) * TICK_SECONDS
+        try:
+            PendingDeletion.add(chat_id, message_id, due_at)
+        except Exception as e:
+            logger.warning(f"Failed to persist pending deletion: {e}")
+        self._push(due_at, chat_id, message_id)
+
+    def _push(self, due_at: float, chat_id: int, message_id: int):
+        """Добавить удаление в кучу и разбудить задачу, если оно раньше текущего."""
+        self._scheduled.add((chat_id, message_id))
+        heapq.heappush(self._heap, (due_at, chat_id, message_id))
+        if self._heap[0][1:] == (chat_id, message_id):
+            self._wakeup.set()
+
+    def restore(self) -> int:
+        """Загрузить незавершенные удаления из БД."""
+        oldest = time.time() - MAX_MESSAGE_AGE
+        stale = []
+        restored = 0
+        for due_at, chat_id, message_id in PendingDeletion.get_all():
+            if due_at < oldest:
+                stale.append((chat_id, message_id))
+            elif (chat_id, message_id) not in self._scheduled:
+                self._push(due_at, chat_id, message_id)
+                restored += 1
+        PendingDeletion.remove_many(stale)
+        return restored
+
+    def _pop_due(self, now: float) -> Dict[int, List[int]]:
+        """Извлечь наступившие удаления, сгруппированные по чатам."""
+        due: Dict[int, List[int]] = defaultdict(list)
+        while self._heap and self._heap[0][0] <= now:
+            _, chat_id, message_id = heapq.heappop(self._heap)
+            self._scheduled.discard((chat_id, message_id))
+            due[chat_id].append(message_id)
+        return due
+
+    async def _delete_chat_messages(self, bot: Bot, chat_id: int, message_ids: List[int]):
+        """Удалить сообщения одного чата пачками."""
+        for i in range(0, len(message_ids), DELETE_BATCH_SIZE):
+            batch = message_ids[i:i + DELETE_BATCH_SIZE]
+            self.batches += 1
+            try:
+                if len(batch) == 1:
+                    await bot.delete_message(chat_id=chat_id, message_id=batch[0])
+                else:
+                    await bot.delete_messages(chat_id=chat_id, message_ids=batch)
+                self.deleted += len(batch)
+            except Exception as e:
+                # Уже удалено пользователем или слишком старое - не повторяем
+                self.failed += len(batch)
+                logger.debug(f"Delete messages in chat {chat_id} failed: {e}")
+
+    async def run(self, bot: Bot):
+        """Основной цикл: ждать ближайшее удаление и выполнять наступившие."""
+        while True:
+            self._wakeup.clear()
+            timeout = None
+            if self._heap:
+                timeout = max(0.0, self._heap[0][0] - time.time())
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+            due = self._pop_due(time.time())
+            if not due:
+                continue
+            await asyncio.gather(
+                *(self._delete_chat_messages(bot, chat_id, ids) for chat_id, ids in due.items())
+            )
+            try:
+                PendingDeletion.remove_many(
+                    [(chat_id, message_id) for chat_id, ids in due.items() for message_id in ids]
+                )
+            except Exception as e:
+                logger.warning(f"Failed to clear pending deletions: {e}")
+
+    def start(self, bot: Bot, restore: bool = True):
+        """Запустить задачу планировщика."""
+        if self._task is not None:
+            return
+        if restore:
+            restored = self.restore()
+            if restored:
+                logger.info(f"✅ Restored {restored} pending message deletions")
+        self._task = asyncio.create_task(self.run(bot))
+
+    def stats(self) -> dict:
+        """Размер очереди и счетчики удалений."""
+        return {
+            "pending": len(self._heap),
+            "chats": len({chat_id for _, chat_id, _ in self._heap}),
+            "next_due_in": max(0.0, self._heap[0][0] - time.time()) if self._heap else None,
+            "deleted": self.deleted,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+
+_scheduler: Optional[DeletionScheduler] = None
+
+
+def get_deletion_scheduler() -> DeletionScheduler:
+    """Получить планировщик удаления сообщений (singleton)."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = DeletionScheduler()
+    return _scheduler
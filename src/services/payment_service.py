@@ -7,9 +7,15 @@ from aiogram import Bot
 
 from src.config import get_settings
 from src.database import BotUser, Payment, PromoCode
+from src.services.access_service import remember_access
 from src.services.api_client import RemnawaveApiClient
 from src.services.notification_service import notify_payment_success
 from src.services.referral_service import grant_referral_bonus
+from src.utils.app_context import get_app_context
+
+
+class PaymentAlreadyProcessed(ValueError):
+    """Платеж уже обработан или обрабатывается."""
 
 
 async def create_subscription_invoice(
@@ -123,13 +129,17 @@ async def create_yookassa_payment(
         "promo_code": promo_code or "",
     }
 
+    # Вернуть пользователя в бота после оплаты
+    bot_user = await get_app_context().get_bot_user(bot)
+    return_url = f"https://t.me/{bot_user.username}"
+
     if payment_method == "sbp":
         payment = await create_sbp_payment(
             amount=final_price,
             description=description,
             user_id=user_id,
             subscription_months=subscription_months,
-            return_url="https://t.me/your_bot",  # Замените на ваш бот
+            return_url=return_url,
             metadata=metadata,
         )
     else:
@@ -138,7 +148,7 @@ async def create_yookassa_payment(
             description=description,
             user_id=user_id,
             subscription_months=subscription_months,
-            return_url="https://t.me/your_bot",  # Замените на ваш бот
+            return_url=return_url,
             metadata=metadata,
         )
 
@@ -255,6 +265,7 @@ async def process_successful_payment(
     Payment.update_status(
         payment["id"], "completed", remnawave_uuid=remnawave_uuid
     )
+    remember_access(user_id, remnawave_uuid, remnawave_user, subscription_link)
 
     # Применить промокод
     if promo_code:
@@ -298,9 +309,6 @@ async def process_yookassa_payment(yookassa_payment_id: str, bot: Bot) -> Dict:
     if not db_payment:
         raise ValueError("Платеж не найден в БД")
 
-    if db_payment["status"] == "completed":
-        raise ValueError("Платеж уже обработан")
-
     # Парсинг payload
     try:
         payload_data = json.loads(db_payment["invoice_payload"])
@@ -312,74 +320,84 @@ async def process_yookassa_payment(yookassa_payment_id: str, bot: Bot) -> Dict:
     promo_code = payload_data.get("promo_code")
     bonus_days = payload_data.get("bonus_days", 0)
 
-    # Получить или создать пользователя в Remnawave
-    api_client = RemnawaveApiClient()
-    user = BotUser.get_or_create(user_id)
-
-    remnawave_user = None
-    if user.get("remnawave_user_uuid"):
-        try:
-            remnawave_user = await api_client.get_user_by_uuid(
-                user["remnawave_user_uuid"]
-            )
-        except Exception:
-            pass
-
-    # Создать или обновить пользователя
-    settings = get_settings()
-    username = user.get("username") or f"user_{user_id}"
-
-    if remnawave_user:
-        # Продлить подписку
-        current_expire = remnawave_user.get("expire_at")
-        if current_expire:
-            expire_dt = datetime.fromisoformat(
-                current_expire.replace("Z", "+00:00")
-            )
-        else:
-            expire_dt = datetime.now()
+    # Захватить платеж до обращения к панели: уведомление YooKassa и кнопка
+    # проверки (или повторное уведомление) не продлят подписку дважды
+    if not Payment.claim(db_payment["id"]):
+        raise PaymentAlreadyProcessed("Платеж уже обработан")
 
-        new_expire = expire_dt + timedelta(
-            days=subscription_months * 30 + bonus_days
-        )
-
-        await api_client.update_user(
-            user["remnawave_user_uuid"], expire_at=new_expire.isoformat()
-        )
-        remnawave_uuid = user["remnawave_user_uuid"]
-        # Получить обновленные данные
-        remnawave_user = await api_client.get_user_by_uuid(remnawave_uuid)
-    else:
-        # Создать нового пользователя
-        expire_dt = datetime.now() + timedelta(
-            days=subscription_months * 30 + bonus_days
-        )
-        remnawave_user = await api_client.create_user(
-            username=username,
-            expire_at=expire_dt.isoformat(),
-            telegram_id=user_id,
-            external_squad_uuid=settings.DEFAULT_EXTERNAL_SQUAD_UUID,
-            internal_squad_uuids=settings.internal_squads,
-        )
-        remnawave_uuid = remnawave_user["uuid"]
-        BotUser.set_remnawave_uuid(user_id, remnawave_uuid)
+    try:
+        # Получить или создать пользователя в Remnawave
+        api_client = RemnawaveApiClient()
+        user = BotUser.get_or_create(user_id)
 
-    # Получить ссылку на подписку
-    subscriptions = remnawave_user.get("subscriptions", [])
-    subscription_link = None
-    if subscriptions:
-        short_uuid = subscriptions[0].get("short_uuid")
-        if short_uuid:
+        remnawave_user = None
+        if user.get("remnawave_user_uuid"):
             try:
-                sub_info = await api_client.get_subscription_info(short_uuid)
-                subscription_link = sub_info.get("link")
+                remnawave_user = await api_client.get_user_by_uuid(
+                    user["remnawave_user_uuid"]
+                )
             except Exception:
                 pass
 
-    # Обновить статус платежа
-    Payment.update_status(
-        db_payment["id"], "completed", remnawave_uuid=remnawave_uuid
-    )
+        # Создать или обновить пользователя
+        settings = get_settings()
+        username = user.get("username") or f"user_{user_id}"
+
+        if remnawave_user:
+            # Продлить подписку
+            current_expire = remnawave_user.get("expire_at")
+            if current_expire:
+                expire_dt = datetime.fromisoformat(
+                    current_expire.replace("Z", "+00:00")
+                )
+            else:
+                expire_dt = datetime.now()
+
+            new_expire = expire_dt + timedelta(
+                days=subscription_months * 30 + bonus_days
+            )
+
+            await api_client.update_user(
+                user["remnawave_user_uuid"], expire_at=new_expire.isoformat()
+            )
+            remnawave_uuid = user["remnawave_user_uuid"]
+            # Получить обновленные данные
+            remnawave_user = await api_client.get_user_by_uuid(remnawave_uuid)
+        else:
+            # Создать нового пользователя
+            expire_dt = datetime.now() + timedelta(
+                days=subscription_months * 30 + bonus_days
+            )
+            remnawave_user = await api_client.create_user(
+                username=username,
+                expire_at=expire_dt.isoformat(),
+                telegram_id=user_id,
+                external_squad_uuid=settings.DEFAULT_EXTERNAL_SQUAD_UUID,
+                internal_squad_uuids=settings.internal_squads,
+            )
+            remnawave_uuid = remnawave_user["uuid"]
+            BotUser.set_remnawave_uuid(user_id, remnawave_uuid)
+
+        # Получить ссылку на подписку
+        subscriptions = remnawave_user.get("subscriptions", [])
+        subscription_link = None
+        if subscriptions:
+            short_uuid = subscriptions[0].get("short_uuid")
+            if short_uuid:
+                try:
+                    sub_info = await api_client.get_subscription_info(short_uuid)
+                    subscription_link = sub_info.get("link")
+                except Exception:
+                    pass
+
+        # Обновить статус платежа
+        Payment.update_status(
+            db_payment["id"], "completed", remnawave_uuid=remnawave_uuid
+        )
+    except Exception:
+        Payment.release(db_payment["id"])
+        raise
+    remember_access(user_id, remnawave_uuid, remnawave_user, subscription_link)
 
     # Применить промокод
     if promo_code:
@@ -7,6 +7,13 @@ from src.config import get_settings
 from src.database import BotUser, Referral
 from src.services.api_client import RemnawaveApiClient
 from src.services.notification_service import notify_referral_bonus
+from src.utils.app_context import get_app_context
+
+
+async def get_referral_link(bot: Bot, user_id: int) -> str:
+    """Построить реферальную ссылку пользователя."""
+    bot_user = await get_app_context().get_bot_user(bot)
+    return f"https://t.me/{bot_user.username}?start={user_id}"
 
 
 async def grant_referral_bonus(bot: Bot, referred_user_id: int):
@@ -1,74 +1,180 @@
 """Сервис автопродления."""
 import asyncio
+import logging
+import math
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Set
 
 from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
 
 from src.config import get_settings
 from src.database import BotUser
-from src.services.api_client import RemnawaveApiClient
+from src.services.api_client import ApiClientError, RemnawaveApiClient
 from src.services.payment_service import create_subscription_invoice
+from src.utils.i18n import get_i18n
+from src.utils.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+RENEWAL_REMINDERS = Counter(
+    "bot_renewal_reminders_total",
+    "Renewal reminders by type and result",
+    ["type", "result"],
+)
+
+# Минимальный интервал между напоминаниями (для urgent; early и expired - 24 ч)
+MIN_REMINDER_INTERVAL = timedelta(hours=12)
+# Сколько отметок о напоминаниях копить перед записью в БД
+MARK_BATCH = 100
+
+
+def classify_reminder(days_until_expiry: int, hours_since_notif: float) -> Optional[str]:
+    """Тип напоминания или None, если напоминать не нужно."""
+    # Напоминание за 3-5 дней
+    if 3 <= days_until_expiry <= 5 and hours_since_notif >= 24:
+        return "early"
+    # Напоминание за 1 день
+    if days_until_expiry == 1 and hours_since_notif >= 12:
+        return "urgent"
+    # После истечения
+    if days_until_expiry < 0 and hours_since_notif >= 24:
+        return "expired"
+    return None
+
+
+async def _fetch_one(
+    api_client: RemnawaveApiClient, user_uuid: str, semaphore: asyncio.Semaphore
+) -> Optional[str]:
+    """expire_at одного пользователя (None - нет в панели или ошибка)."""
+    async with semaphore:
+        try:
+            return (await api_client.get_user_by_uuid(user_uuid)).get("expire_at")
+        except Exception:
+            return None
+
+
+async def _fetch_page(
+    api_client: RemnawaveApiClient,
+    start: int,
+    size: int,
+    wanted: Set[str],
+    semaphore: asyncio.Semaphore,
+) -> Dict[str, Optional[str]]:
+    """expire_at нужных пользователей со страницы панели (пусто при ошибке)."""
+    async with semaphore:
+        try:
+            users = (await api_client.get_users(start=start, size=size)).get("users", [])
+        except ApiClientError as e:
+            logger.warning(f"⚠️ Renewal sweep: page {start} failed: {e}")
+            return {}
+    # Из страницы остается только нужное, чтобы не держать всю панель в памяти
+    return {user["uuid"]: user.get("expire_at") for user in users if user.get("uuid") in wanted}
+
+
+async def fetch_expiries(
+    api_client: RemnawaveApiClient, uuids: Iterable[str]
+) -> Dict[str, Optional[str]]:
+    """expire_at пользователей панели по UUID.
+
+    Если выгрузить панель постранично дешевле, чем запрашивать пользователей
+    по одному, выгружаются страницы; кого не оказалось на страницах (ошибка
+    страницы, сдвиг при добавлении пользователей) - запрашиваются по одному.
+    """
+    settings = get_settings()
+    wanted = set(uuids)
+    page_size = settings.RENEWAL_PAGE_SIZE
+    semaphore = asyncio.Semaphore(settings.RENEWAL_CONCURRENCY)
+    expiries: Dict[str, Optional[str]] = {}
 
-
-async def check_expiring_subscriptions(bot: Bot):
-    """Проверить истекающие подписки."""
+    if len(wanted) > 1:
+        try:
+            first = await api_client.get_users(start=0, size=page_size)
+        except ApiClientError as e:
+            logger.warning(f"⚠️ Renewal sweep: users list failed, fetching one by one: {e}")
+            first = {}
+        pages = math.ceil(first.get("total", 0) / page_size)
+        if first and pages <= len(wanted):
+            for user in first.get("users", []):
+                if user.get("uuid") in wanted:
+                    expiries[user["uuid"]] = user.get("expire_at")
+            for page in await asyncio.gather(*(
+                _fetch_page(api_client, number * page_size, page_size, wanted, semaphore)
+                for number in range(1, pages)
+            )):
+                expiries.update(page)
+
+    missing = [user_uuid for user_uuid in wanted if user_uuid not in expiries]
+    results = await asyncio.gather(*(
+        _fetch_one(api_client, user_uuid, semaphore) for user_uuid in missing
+    ))
+    expiries.update(zip(missing, results))
+    return expiries
+
+
+async def check_expiring_subscriptions(bot: Bot) -> Dict[str, int]:
+    """Проверить истекающие подписки; возвращает счетчики прохода."""
     api_client = RemnawaveApiClient()
     settings = get_settings()
-
-    # Получить пользователей с автопродлением
-    users_with_renewal = BotUser.get_users_with_auto_renewal()
-
-    for user in users_with_renewal:
-        user_id = user["telegram_id"]
-        remnawave_uuid = user.get("remnawave_user_uuid")
-
-        if not remnawave_uuid:
+    started = time.perf_counter()
+
+    # Пользователи, которым недавно напоминали, не получат напоминание в любом случае
+    notified_before = (datetime.now() - MIN_REMINDER_INTERVAL).isoformat()
+    candidates = BotUser.get_renewal_candidates(notified_before)
+    expiries = await fetch_expiries(
+        api_client, (user["remnawave_user_uuid"] for user in candidates)
+    )
+
+    stats = {"candidates": len(candidates), "reminders": 0, "sent": 0}
+    marked: List[int] = []
+    send_interval = 1 / settings.RENEWAL_SEND_RATE if settings.RENEWAL_SEND_RATE > 0 else 0
+    for user in candidates:
+        expire_at = expiries.get(user["remnawave_user_uuid"])
+        if not expire_at:
             continue
 
         try:
-            # Получить пользователя из Remnawave
-            remnawave_user = await api_client.get_user_by_uuid(remnawave_uuid)
-            expire_at = remnawave_user.get("expire_at")
-
-            if not expire_at:
-                continue
-
             expire_dt = datetime.fromisoformat(expire_at.replace("Z", "+00:00"))
-            now = datetime.now(expire_dt.tzinfo) if expire_dt.tzinfo else datetime.now()
-            days_until_expiry = (expire_dt - now).days
-
-            # Проверить, нужно ли отправить напоминание
-            last_notification = user.get("last_renewal_notification")
-            if last_notification:
-                last_notif_dt = datetime.fromisoformat(last_notification)
-                hours_since_notif = (now - last_notif_dt).total_seconds() / 3600
-            else:
-                hours_since_notif = 999
-
-            # Напоминание за 3-5 дней
-            if 3 <= days_until_expiry <= 5 and hours_since_notif >= 24:
-                await send_renewal_reminder(
-                    bot, user_id, days_until_expiry, "early", expire_at
-                )
-                BotUser.update_last_renewal_notification(user_id)
-
-            # Напоминание за 1 день
-            elif days_until_expiry == 1 and hours_since_notif >= 12:
-                await send_renewal_reminder(
-                    bot, user_id, days_until_expiry, "urgent", expire_at
-                )
-                BotUser.update_last_renewal_notification(user_id)
-
-            # После истечения
-            elif days_until_expiry < 0 and hours_since_notif >= 24:
-                await send_renewal_reminder(
-                    bot, user_id, days_until_expiry, "expired", expire_at
-                )
-                BotUser.update_last_renewal_notification(user_id)
+        except ValueError:
+            continue
+        now = datetime.now(expire_dt.tzinfo) if expire_dt.tzinfo else datetime.now()
+        days_until_expiry = (expire_dt - now).days
+
+        # Время напоминаний хранится в локальном времени без зоны
+        last_notification = user.get("last_renewal_notification")
+        if last_notification:
+            hours_since_notif = (
+                datetime.now() - datetime.fromisoformat(last_notification)
+            ).total_seconds() / 3600
+        else:
+            hours_since_notif = 999
+
+        kind = classify_reminder(days_until_expiry, hours_since_notif)
+        if kind is None:
+            continue
 
-        except Exception:
-            continue  # Игнорируем ошибки
+        stats["reminders"] += 1
+        if await send_renewal_reminder(
+            bot, user["telegram_id"], days_until_expiry, kind, expire_at,
+            locale=user.get("language"),
+        ):
+            stats["sent"] += 1
+        marked.append(user["telegram_id"])
+        if len(marked) >= MARK_BATCH:
+            BotUser.update_last_renewal_notifications(marked)
+            marked = []
+        if send_interval:
+            await asyncio.sleep(send_interval)
+
+    if marked:
+        BotUser.update_last_renewal_notifications(marked)
+    logger.info(
+        f"✅ Renewal sweep: {stats['candidates']} users checked, "
+        f"{stats['sent']}/{stats['reminders']} reminders sent "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    return stats
 
 
 async def send_renewal_reminder(
@@ -77,29 +183,46 @@ async def send_renewal_reminder(
     days_until_expiry: int,
     reminder_type: str,
     expire_at: str,
-):
-    """Отправить напоминание о продлении."""
+    locale: Optional[str] = None,
+) -> bool:
+    """Отправить напоминание о продлении на языке пользователя."""
     from aiogram.utils.i18n import gettext as _
     from src.keyboards.user_public import renewal_keyboard
 
-    t = _
+    i18n = get_i18n()
+    if locale not in i18n.available_locales:
+        locale = i18n.default_locale
 
-    if reminder_type == "expired":
-        text = t("renewal.expired").format(expire_at=expire_at)
-    elif reminder_type == "urgent":
-        text = t("renewal.urgent").format(days=days_until_expiry)
-    else:
-        text = t("renewal.early").format(days=days_until_expiry)
+    # Проверка идет вне апдейта: контекст i18n устанавливается здесь
+    with i18n.context(), i18n.use_locale(locale):
+        t = _
 
-    try:
-        await bot.send_message(
-            chat_id=user_id,
-            text=text,
-            reply_markup=renewal_keyboard(),
-            parse_mode="Markdown",
-        )
-    except Exception:
-        pass  # Игнорируем ошибки отправки
+        if reminder_type == "expired":
+            text = t("renewal.expired").format(expire_at=expire_at)
+        elif reminder_type == "urgent":
+            text = t("renewal.urgent").format(days=days_until_expiry)
+        else:
+            text = t("renewal.early").format(days=days_until_expiry)
+        reply_markup = renewal_keyboard()
+
+    for attempt in range(2):
+        try:
+            await bot.send_message(
+                chat_id=user_id,
+                text=text,
+                reply_markup=reply_markup,
+                parse_mode="Markdown",
+            )
+            RENEWAL_REMINDERS.labels(reminder_type, "sent").inc()
+            return True
+        except TelegramRetryAfter as e:
+            if attempt:
+                break
+            await asyncio.sleep(e.retry_after)
+        except Exception:
+            break  # Игнорируем ошибки отправки (бот заблокирован и т.п.)
+    RENEWAL_REMINDERS.labels(reminder_type, "failed").inc()
+    return False
 
 
 async def start_renewal_checker(bot: Bot, interval_hours: int = 6):
@@ -107,8 +230,7 @@ async def start_renewal_checker(bot: Bot, interval_hours: int = 6):
     while True:
         try:
             await check_expiring_subscriptions(bot)
-        except Exception:
-            pass  # Игнорируем ошибки
+        except Exception as e:
+            logger.error(f"❌ Renewal sweep failed: {e}")
 
         await asyncio.sleep(interval_hours * 3600)
-
@@ -0,0 +1,29 @@
+"""Общий контекст приложения."""
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.types import User
+
+
+class AppContext:
+    """Данные, общие для всех обработчиков процесса."""
+
+    def __init__(self):
+        self.bot_user: Optional[User] = None
+
+    async def get_bot_user(self, bot: Bot, refresh: bool = False) -> User:
+        """Получить данные бота (get_me вызывается только при необходимости)."""
+        if self.bot_user is None or refresh:
+            self.bot_user = await bot.get_me()
+        return self.bot_user
+
+
+_app_context: Optional[AppContext] = None
+
+
+def get_app_context() -> AppContext:
+    """Получить контекст приложения."""
+    global _app_context
+    if _app_context is None:
+        _app_context = AppContext()
+    return _app_context
@@ -0,0 +1,134 @@
+"""Ранний ответ на callback для медленных обработчиков.
+
+Если обработчик не ответил на callback за ``CALLBACK_ACK_DEADLINE`` секунд,
+middleware отвечает сам (пустым ответом), чтобы клиент Telegram не показывал
+загрузку и callback не истек. Повторный ответ обработчика после этого
+пропускается на уровне сессии бота.
+
+Флаг обработчика ``ack`` переопределяет поведение:
+``ack=False`` - обработчик отвечает сам, ``ack=0`` - ответить сразу,
+``ack=<секунды>`` - свой срок.
+"""
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Optional, Set
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.methods import AnswerCallbackQuery, TelegramMethod
+from aiogram.types import CallbackQuery
+
+from src.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class CallbackAckMiddleware(BaseMiddleware):
+    """Inner middleware callback_query: ответ по истечении срока."""
+
+    def __init__(self, deadline: float):
+        self.deadline = deadline
+        # callback_id -> был ли уже отправлен ответ
+        self._answered: Dict[str, bool] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.early_acks = 0
+        self.skipped_answers = 0
+
+    def _deadline_for(self, data: Dict[str, Any]) -> Optional[float]:
+        """Срок ответа с учетом флага ``ack`` обработчика (None - не отвечать)."""
+        # Для CallbackTable флаги хранятся у найденного обработчика
+        handler = data.get("callback_target") or data.get("handler")
+        flag = handler.flags.get("ack", True) if handler is not None else True
+        if flag is False:
+            return None
+        if flag is True:
+            return self.deadline
+        return float(flag)
+
+    def is_answered(self, callback_id: str) -> Optional[bool]:
+        """Статус ответа (None - callback не отслеживается)."""
+        return self._answered.get(callback_id)
+
+    def mark_answered(self, callback_id: str):
+        """Отметить, что на callback ответили."""
+        if callback_id in self._answered:
+            self._answered[callback_id] = True
+
+    def _ack_later(self, callback: CallbackQuery):
+        """Таймер: ответить, если обработчик еще не ответил."""
+        if self._answered.get(callback.id) is False:
+            task = asyncio.create_task(self._ack(callback))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _ack(self, callback: CallbackQuery):
+        """Отправить пустой ответ на callback."""
+        self.early_acks += 1
+        try:
+            await callback.answer()
+        except Exception as e:
+            logger.debug(f"Early callback answer failed: {e}")
+
+    async def __call__(
+        self,
+        handler: Callable,
+        event: CallbackQuery,
+        data: dict,
+    ):
+        """Вызвать обработчик, ответив на callback не позже срока."""
+        deadline = self._deadline_for(data)
+        if deadline is None:
+            return await handler(event, data)
+
+        self._answered[event.id] = False
+        if deadline <= 0:
+            await self._ack(event)
+            timer = None
+        else:
+            timer = asyncio.get_running_loop().call_later(deadline, self._ack_later, event)
+
+        try:
+            return await handler(event, data)
+        finally:
+            if timer is not None:
+                timer.cancel()
+            # Обработчик завершился без ответа - убрать загрузку у клиента
+            if self._answered.get(event.id) is False:
+                await self._ack(event)
+            self._answered.pop(event.id, None)
+
+    def stats(self) -> dict:
+        """Статистика ранних ответов."""
+        return {
+            "early_acks": self.early_acks,
+            "skipped_answers": self.skipped_answers,
+            "in_progress": len(self._answered),
+        }
+
+
+class AnsweredCallbackRequestMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота: не отправлять повторный ответ на тот же callback."""
+
+    def __init__(self, ack_middleware: CallbackAckMiddleware):
+        self.ack_middleware = ack_middleware
+
+    async def __call__(self, make_request: Callable, bot: Bot, method: TelegramMethod):
+        if isinstance(method, AnswerCallbackQuery):
+            callback_id = method.callback_query_id
+            if self.ack_middleware.is_answered(callback_id):
+                self.ack_middleware.skipped_answers += 1
+                logger.debug(f"Callback {callback_id} already answered, skipping")
+                return True
+            self.ack_middleware.mark_answered(callback_id)
+        return await make_request(bot, method)
+
+
+_ack_middleware: Optional[CallbackAckMiddleware] = None
+
+
+def get_callback_ack_middleware() -> CallbackAckMiddleware:
+    """Получить middleware раннего ответа на callback (singleton)."""
+    global _ack_middleware
+    if _ack_middleware is None:
+        _ack_middleware = CallbackAckMiddleware(get_settings().CALLBACK_ACK_DEADLINE)
+    return _ack_middleware
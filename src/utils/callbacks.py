@@ -0,0 +1,73 @@
+"""Таблица диспетчеризации callback_data."""
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from aiogram import Router
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import CallbackQuery
+
+CallbackArgs = Tuple[str, ...]
+
+
+class CallbackTable:
+    """Поиск обработчика callback по словарю вместо цепочки фильтров.
+
+    Точные значения (``user:connect``) ищутся одним обращением к словарю,
+    префиксы (``purchase``, ``nav:back``) - по первым сегментам данных.
+    Оставшиеся сегменты передаются обработчику как ``callback_args``.
+    """
+
+    def __init__(self, router: Router):
+        self.router = router
+        self._exact: Dict[str, HandlerObject] = {}
+        self._prefixes: Dict[str, HandlerObject] = {}
+        self._depths: List[int] = []
+        router.callback_query.register(self._dispatch, self._match)
+
+    def exact(self, data: str, **flags: Any) -> Callable:
+        """Зарегистрировать обработчик для точного значения callback_data."""
+        def decorator(callback: Callable) -> Callable:
+            self._exact[data] = HandlerObject(callback=callback, flags=flags)
+            return callback
+        return decorator
+
+    def prefix(self, prefix: str, **flags: Any) -> Callable:
+        """Зарегистрировать обработчик для префикса (сегменты через ':')."""
+        def decorator(callback: Callable) -> Callable:
+            self._prefixes[prefix] = HandlerObject(callback=callback, flags=flags)
+            depth = prefix.count(":") + 1
+            if depth not in self._depths:
+                self._depths.append(depth)
+                self._depths.sort(reverse=True)
+            return callback
+        return decorator
+
+    def resolve(self, data: str) -> Optional[Tuple[HandlerObject, CallbackArgs]]:
+        """Найти обработчик и аргументы для callback_data."""
+        target = self._exact.get(data)
+        if target is not None:
+            return target, ()
+
+        parts = data.split(":")
+        for depth in self._depths:
+            if len(parts) <= depth:
+                continue
+            target = self._prefixes.get(":".join(parts[:depth]))
+            if target is not None:
+                return target, tuple(parts[depth:])
+        return None
+
+    async def _match(self, callback: CallbackQuery) -> Union[bool, Dict[str, Any]]:
+        """Фильтр: найти обработчик в таблице."""
+        if not callback.data:
+            return False
+        resolved = self.resolve(callback.data)
+        if resolved is None:
+            return False
+        target, args = resolved
+        return {"callback_target": target, "callback_args": args}
+
+    async def _dispatch(
+        self, callback: CallbackQuery, callback_target: HandlerObject, **kwargs: Any
+    ) -> Any:
+        """Вызвать найденный обработчик."""
+        return await callback_target.call(callback, **kwargs)
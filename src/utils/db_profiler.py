@@ -0,0 +1,176 @@
+"""Профилирование запросов SQLite.
+
+Соединение с фабрикой ``ProfilingConnection`` создает курсоры, которые
+замеряют каждый запрос: текст, время, число строк. Для каждого нового
+запроса один раз сохраняется ``EXPLAIN QUERY PLAN``, чтобы видеть полные
+сканирования таблиц. Запросы дольше порога пишутся в лог вместе с планом.
+"""
+import logging
+import re
+import sqlite3
+import time
+from typing import Dict, List, Optional
+
+from src.config import get_settings
+from src.utils.tracing import current_span
+
+logger = logging.getLogger(__name__)
+
+# Сколько разных запросов хранится в статистике
+MAX_STATEMENTS = 500
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+class QueryStats:
+    """Накопленная статистика одного запроса."""
+
+    __slots__ = ("sql", "count", "total", "max", "rows", "plan", "callers")
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.plan: Optional[List[str]] = None
+        self.callers: set = set()
+
+    @property
+    def full_scan(self) -> bool:
+        """В плане есть полное сканирование таблицы."""
+        return any(
+            step.startswith("SCAN") and "USING" not in step for step in self.plan or ()
+        )
+
+
+class QueryProfiler:
+    """Статистика запросов процесса."""
+
+    def __init__(self, slow_threshold: float):
+        self.slow_threshold = slow_threshold
+        self._stats: Dict[str, QueryStats] = {}
+        self.slow_queries = 0
+
+    def _entry(self, sql: str) -> Optional[QueryStats]:
+        """Статистика запроса (None, если лимит разных запросов исчерпан)."""
+        entry = self._stats.get(sql)
+        if entry is None:
+            if len(self._stats) >= MAX_STATEMENTS:
+                return None
+            entry = self._stats[sql] = QueryStats(_WHITESPACE_RE.sub(" ", sql).strip())
+        return entry
+
+    def record(
+        self, cursor: sqlite3.Cursor, sql: str, params, duration: float, explain: bool = True
+    ):
+        """Учесть выполненный запрос (explain=False - параметров для плана нет)."""
+        entry = self._entry(sql)
+        if entry is None:
+            return None
+        entry.count += 1
+        entry.total += duration
+        if duration > entry.max:
+            entry.max = duration
+        if cursor.rowcount > 0:
+            entry.rows += cursor.rowcount
+
+        span = current_span()
+        if span is not None and span.name == "db":
+            entry.callers.add(span.attrs.get("query"))
+
+        if explain and entry.plan is None and entry.sql.upper().startswith(_EXPLAINABLE):
+            entry.plan = self._explain(cursor.connection, sql, params)
+
+        if duration >= self.slow_threshold:
+            self.slow_queries += 1
+            logger.warning(
+                f"🐢 Slow query ({duration * 1000:.1f} ms): {entry.sql}\n"
+                f"   plan: {'; '.join(entry.plan or ['-'])}"
+            )
+        return entry
+
+    @staticmethod
+    def _explain(connection: sqlite3.Connection, sql: str, params) -> List[str]:
+        """EXPLAIN QUERY PLAN запроса (обычным курсором, без профилирования)."""
+        try:
+            cursor = sqlite3.Cursor(connection)
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params or ())
+            return [row[-1] for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            return [f"explain failed: {e}"]
+
+    def top(self, limit: int = 10) -> List[QueryStats]:
+        """Запросы с наибольшим суммарным временем."""
+        return sorted(self._stats.values(), key=lambda s: s.total, reverse=True)[:limit]
+
+    def reset(self):
+        """Сбросить статистику."""
+        self._stats.clear()
+        self.slow_queries = 0
+
+
+class ProfilingCursor(sqlite3.Cursor):
+    """Курсор, замеряющий execute/executemany и считающий прочитанные строки."""
+
+    _entry: Optional[QueryStats] = None
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        result = super().execute(sql, parameters)
+        self._entry = get_query_profiler().record(
+            self, sql, parameters, time.perf_counter() - started
+        )
+        return result
+
+    def executemany(self, sql, seq_of_parameters):
+        # Параметры первой строки нужны для EXPLAIN: генератор сохраняется списком
+        if not isinstance(seq_of_parameters, (list, tuple)):
+            seq_of_parameters = list(seq_of_parameters)
+        started = time.perf_counter()
+        result = super().executemany(sql, seq_of_parameters)
+        self._entry = get_query_profiler().record(
+            self,
+            sql,
+            seq_of_parameters[0] if seq_of_parameters else None,
+            time.perf_counter() - started,
+            explain=bool(seq_of_parameters),
+        )
+        return result
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None and self._entry is not None:
+            self._entry.rows += 1
+        return row
+
+    def fetchall(self):
+        rows = super().fetchall()
+        if self._entry is not None:
+            self._entry.rows += len(rows)
+        return rows
+
+
+class ProfilingConnection(sqlite3.Connection):
+    """Соединение, по умолчанию создающее ProfilingCursor."""
+
+    def cursor(self, factory=ProfilingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+_profiler: Optional[QueryProfiler] = None
+
+
+def get_query_profiler() -> QueryProfiler:
+    """Получить профилировщик запросов (singleton)."""
+    global _profiler
+    if _profiler is None:
+        _profiler = QueryProfiler(get_settings().DB_SLOW_QUERY_MS / 1000)
+    return _profiler
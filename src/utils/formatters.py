@@ -1,6 +1,6 @@
 """Форматирование данных для отображения."""
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from aiogram.utils.i18n import gettext as _
 
@@ -18,7 +18,8 @@ def format_datetime(dt_str: str) -> str:
     """Форматировать дату/время."""
     try:
         dt = datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
-        return dt.strftime("%Y-%m-%d %H:%M:%S")
+        # То же, что strftime("%Y-%m-%d %H:%M:%S"), но быстрее
+        return dt.isoformat(" ", "seconds")[:19]
     except Exception:
         return dt_str
 
@@ -117,102 +118,115 @@ def build_subscription_summary(sub: Dict[str, Any], t) -> str:
 *{t('subscription.summary.expire_at')}:* `{expire_at}`"""
 
 
-def build_tokens_list(tokens: List[Dict], t) -> str:
-    """Построить список токенов."""
-    if not tokens:
-        return t("tokens.empty")
-
-    lines = [t("tokens.list_title")]
-    for token in tokens:
-        name = escape_markdown(token.get("name", "N/A"))
-        uuid = escape_markdown(token.get("uuid", "N/A"))
-        lines.append(f"• `{name}` - `{uuid}`")
-
-    return "\n".join(lines)
-
-
-def build_templates_list(templates: List[Dict], t) -> str:
-    """Построить список шаблонов."""
-    if not templates:
-        return t("templates.empty")
-
-    lines = [t("templates.list_title")]
-    for template in templates:
-        name = escape_markdown(template.get("name", "N/A"))
-        uuid = escape_markdown(template.get("uuid", "N/A"))
-        template_type = escape_markdown(template.get("type", "N/A"))
-        lines.append(f"• `{name}` ({template_type}) - `{uuid}`")
-
-    return "\n".join(lines)
-
-
-def build_snippets_list(snippets: List[Dict], t) -> str:
-    """Построить список сниппетов."""
-    if not snippets:
-        return t("snippets.empty")
-
-    lines = [t("snippets.list_title")]
-    for snippet in snippets:
-        name = escape_markdown(snippet.get("name", "N/A"))
-        lines.append(f"• `{name}`")
-
-    return "\n".join(lines)
-
-
-def build_config_profiles_list(profiles: List[Dict], t) -> str:
-    """Построить список профилей конфигурации."""
-    if not profiles:
-        return t("configs.empty")
-
-    lines = [t("configs.list_title")]
-    for profile in profiles:
-        name = escape_markdown(profile.get("name", "N/A"))
-        uuid = escape_markdown(profile.get("uuid", "N/A"))
-        lines.append(f"• `{name}` - `{uuid}`")
-
-    return "\n".join(lines)
-
-
-def build_billing_history(records: List[Dict], t) -> str:
-    """Построить историю биллинга."""
+# Лимит длины сообщения Telegram (в единицах UTF-16)
+MESSAGE_LIMIT = 4096
+# Запас под заголовок списка и номер страницы
+PAGE_HEADER_RESERVE = 256
+
+
+def utf16_len(text: str) -> int:
+    """Длина текста так, как ее считает Telegram (эмодзи - 2 единицы)."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _fit_line(line: str, limit: int) -> str:
+    """Обрезать слишком длинную строку, не оставляя открытых сущностей Markdown."""
+    if utf16_len(line) <= limit:
+        return line
+    line = line[:limit - 2]
+    while utf16_len(line) > limit - 2:
+        line = line[:-1]
+    # Не оставлять экранирующий обратный слэш без символа
+    if line.endswith("\\") and (len(line) - len(line.rstrip("\\"))) % 2:
+        line = line[:-1]
+    if line.replace("\\`", "").count("`") % 2:
+        line += "`"
+    return line + "…"
+
+
+def _name_uuid_line(item: Dict) -> str:
+    name = escape_markdown(item.get("name", "N/A"))
+    uuid = escape_markdown(item.get("uuid", "N/A"))
+    return f"• `{name}` - `{uuid}`"
+
+
+def _template_line(template: Dict) -> str:
+    name = escape_markdown(template.get("name", "N/A"))
+    uuid = escape_markdown(template.get("uuid", "N/A"))
+    template_type = escape_markdown(template.get("type", "N/A"))
+    return f"• `{name}` ({template_type}) - `{uuid}`"
+
+
+def _snippet_line(snippet: Dict) -> str:
+    name = escape_markdown(snippet.get("name", "N/A"))
+    return f"• `{name}`"
+
+
+def _billing_record_line(record: Dict) -> str:
+    provider_name = escape_markdown(record.get("provider_name", "N/A"))
+    amount = record.get("amount", 0)
+    billed_at = format_datetime(record.get("billed_at", ""))
+    return f"• {provider_name}: {amount} ₽ ({billed_at})"
+
+
+def _billing_node_line(item: Dict) -> str:
+    node_name = escape_markdown(item.get("node_name", "N/A"))
+    provider_name = escape_markdown(item.get("provider_name", "N/A"))
+    next_billing_at = format_datetime(item.get("next_billing_at", ""))
+    return f"• {node_name} ({provider_name}) - {next_billing_at}"
+
+
+# Списки: вид -> (ключ заголовка, ключ пустого списка, строка записи)
+LIST_FORMATS: Dict[str, Tuple[str, str, Callable[[Dict], str]]] = {
+    "tokens": ("tokens.list_title", "tokens.empty", _name_uuid_line),
+    "templates": ("templates.list_title", "templates.empty", _template_line),
+    "snippets": ("snippets.list_title", "snippets.empty", _snippet_line),
+    "configs": ("configs.list_title", "configs.empty", _name_uuid_line),
+    "billing_history": ("billing.history.title", "billing.history.empty", _billing_record_line),
+    "providers": ("providers.list_title", "providers.empty", _name_uuid_line),
+    "billing_nodes": ("billing.nodes.title", "billing.nodes.empty", _billing_node_line),
+}
+
+
+def _pack_lines(
+    lines: Iterable[str], budget: int
+) -> Iterator[Tuple[int, List[str]]]:
+    """Разложить строки по страницам: (индекс первой строки, строки страницы).
+
+    Страница разрывается только между строками, поэтому сущности Markdown
+    (`код`, *жирный*) каждой записи остаются целыми.
+    """
+    page: List[str] = []
+    start = size = 0
+    for index, line in enumerate(lines):
+        line = _fit_line(line, budget)
+        length = utf16_len(line) + 1  # + перевод строки
+        if page and size + length > budget:
+            yield start, page
+            page, start, size = [], index, 0
+        page.append(line)
+        size += length
+    if page:
+        yield start, page
+
+
+def list_page_offsets(kind: str, records: List[Dict], limit: int = MESSAGE_LIMIT) -> List[int]:
+    """Индексы первых записей страниц (запас PAGE_HEADER_RESERVE под заголовок)."""
+    render = LIST_FORMATS[kind][2]
+    offsets = [start for start, _lines in _pack_lines(map(render, records), limit - PAGE_HEADER_RESERVE)]
+    return offsets or [0]
+
+
+def render_list_page(
+    kind: str, records: List[Dict], offsets: List[int], page: int, t
+) -> str:
+    """Страница списка по готовым границам: рендерятся только ее записи."""
+    title_key, empty_key, render = LIST_FORMATS[kind]
     if not records:
-        return t("billing.history.empty")
-
-    lines = [t("billing.history.title")]
-    for record in records:
-        provider_name = escape_markdown(record.get("provider_name", "N/A"))
-        amount = record.get("amount", 0)
-        billed_at = format_datetime(record.get("billed_at", ""))
-        lines.append(f"• {provider_name}: {amount} ₽ ({billed_at})")
-
-    return "\n".join(lines)
-
-
-def build_infra_providers(providers: List[Dict], t) -> str:
-    """Построить список провайдеров."""
-    if not providers:
-        return t("providers.empty")
-
-    lines = [t("providers.list_title")]
-    for provider in providers:
-        name = escape_markdown(provider.get("name", "N/A"))
-        uuid = escape_markdown(provider.get("uuid", "N/A"))
-        lines.append(f"• `{name}` - `{uuid}`")
-
-    return "\n".join(lines)
-
-
-def build_billing_nodes(data: List[Dict], t) -> str:
-    """Построить биллинг нод."""
-    if not data:
-        return t("billing.nodes.empty")
-
-    lines = [t("billing.nodes.title")]
-    for item in data:
-        node_name = escape_markdown(item.get("node_name", "N/A"))
-        provider_name = escape_markdown(item.get("provider_name", "N/A"))
-        next_billing_at = format_datetime(item.get("next_billing_at", ""))
-        lines.append(f"• {node_name} ({provider_name}) - {next_billing_at}")
-
-    return "\n".join(lines)
-
+        return t(empty_key)
+    end = offsets[page + 1] if page + 1 < len(offsets) else len(records)
+    lines = [_fit_line(render(record), MESSAGE_LIMIT - PAGE_HEADER_RESERVE) for record in records[offsets[page]:end]]
+    title = t(title_key)
+    if len(offsets) > 1:
+        title = f"{title} ({page + 1}/{len(offsets)})"
+    return "\n".join([title, *lines])
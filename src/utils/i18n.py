@@ -1,38 +1,62 @@
 """Локализация."""
 import json
-import os
+import logging
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Callable, Dict
+from typing import Any, Callable, Dict, Generator, List, Tuple
 
-from aiogram import BaseMiddleware
-from aiogram.types import TelegramObject
 from aiogram.utils.i18n import I18n
 from gettext import GNUTranslations
 
 from src.config import get_settings
 
+logger = logging.getLogger(__name__)
+
+# Функции, вызываемые после перезагрузки локалей (сброс кэшей)
+_reload_callbacks: List[Callable[[], None]] = []
+
+
+def on_locales_reload(callback: Callable[[], None]) -> Callable[[], None]:
+    """Зарегистрировать функцию, вызываемую после перезагрузки локалей."""
+    _reload_callbacks.append(callback)
+    return callback
+
+
+def _merge_pairs(pairs: List[Tuple[str, Any]]) -> Dict[str, Any]:
+    """Собрать объект JSON, объединяя повторяющиеся секции."""
+    result: Dict[str, Any] = {}
+    for key, value in pairs:
+        existing = result.get(key)
+        if isinstance(existing, dict) and isinstance(value, dict):
+            existing.update(value)
+        else:
+            result[key] = value
+    return result
+
+
+def flatten_catalog(data: Dict[str, Any], prefix: str = "") -> Dict[str, str]:
+    """Развернуть вложенный каталог в словарь с ключами через точку."""
+    flat: Dict[str, str] = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_catalog(value, f"{name}."))
+        elif value and isinstance(value, str):
+            flat[name] = value
+    return flat
+
 
 class JsonTranslations(GNUTranslations):
     """Обертка для gettext с поддержкой JSON."""
 
-    def __init__(self, translations: Dict[str, Any]):
+    def __init__(self, translations: Dict[str, str]):
+        # Каталог уже развернут: "user.settings" -> текст
         self._catalog = translations
         self._fallback = None
 
     def gettext(self, message: str) -> str:
         """Получить перевод."""
-        # Поддержка вложенных ключей через точку
-        keys = message.split(".")
-        value = self._catalog
-        for key in keys:
-            if isinstance(value, dict):
-                value = value.get(key)
-            else:
-                break
-
-        if value and isinstance(value, str):
-            return value
-        return message
+        return self._catalog.get(message, message)
 
     def ngettext(self, msgid1: str, msgid2: str, n: int) -> str:
         """Получить перевод с учетом числа."""
@@ -47,6 +71,16 @@ class JsonI18n(I18n):
         self.default_locale = default_locale
         super().__init__(path=str(self._path), default_locale=default_locale)
 
+    @contextmanager
+    def context(self) -> Generator["JsonI18n", None, None]:
+        """Установить контекст I18n для aiogram.utils.i18n.gettext."""
+        # gettext ищет экземпляр в контексте базового класса I18n
+        token = I18n.set_current(self)
+        try:
+            yield self
+        finally:
+            I18n.reset_current(token)
+
     def find_locales(self) -> Dict[str, Any]:
         """Найти доступные локали."""
         locales = {}
@@ -63,13 +97,40 @@ class JsonI18n(I18n):
             if messages_file.exists():
                 try:
                     with open(messages_file, "r", encoding="utf-8") as f:
-                        translations = json.load(f)
-                        locales[locale] = JsonTranslations(translations)
-                except Exception:
-                    pass
+                        translations = json.load(f, object_pairs_hook=_merge_pairs)
+                    locales[locale] = JsonTranslations(flatten_catalog(translations))
+                except Exception as e:
+                    logger.warning(f"Failed to load locale {locale}: {e}")
 
         return locales
 
+    def reload(self) -> None:
+        """Перезагрузить локали и сбросить зависящие от них кэши."""
+        super().reload()
+        for callback in _reload_callbacks:
+            callback()
+
+    def translator(self, locale: str) -> Callable[[str], str]:
+        """Функция перевода для конкретной локали (каталог на момент вызова)."""
+        translations = self.locales.get(locale)
+        if translations is None:
+            # Как I18n.gettext для неизвестной локали: ключ без перевода
+            return str
+        return translations.gettext
+
+    def missing_keys(self) -> Dict[str, List[str]]:
+        """Ключи, отсутствующие в каждой локали относительно остальных."""
+        catalogs = {
+            locale: set(translations._catalog)
+            for locale, translations in self.locales.items()
+        }
+        all_keys = set().union(*catalogs.values()) if catalogs else set()
+        return {
+            locale: sorted(all_keys - keys)
+            for locale, keys in catalogs.items()
+            if all_keys - keys
+        }
+
 
 _i18n_instance: I18n = None
 
@@ -84,45 +145,3 @@ def get_i18n() -> I18n:
             path=str(locales_path), default_locale=settings.DEFAULT_LOCALE
         )
     return _i18n_instance
-
-
-class I18nMiddleware(BaseMiddleware):
-    """Middleware для локализации."""
-
-    def __init__(self, i18n: I18n):
-        self.i18n = i18n
-
-    async def __call__(
-        self,
-        handler: Callable,
-        event: TelegramObject,
-        data: dict,
-    ):
-        """Установить локаль для обработчика."""
-        # Получить язык пользователя
-        user = None
-        if hasattr(event, "from_user") and event.from_user:
-            user = event.from_user
-        elif hasattr(event, "message") and event.message and event.message.from_user:
-            user = event.message.from_user
-        elif hasattr(event, "callback_query") and event.callback_query:
-            user = event.callback_query.from_user
-
-        if user:
-            # Получить язык из БД или использовать язык пользователя
-            from src.database import BotUser
-            db_user = BotUser.get_or_create(user.id)
-            language = db_user.get("language") or user.language_code or "ru"
-        else:
-            # Использовать локаль по умолчанию
-            language = get_settings().DEFAULT_LOCALE
-
-        # Использовать локаль через контекстный менеджер
-        async with self.i18n.use_locale(language):
-            return await handler(event, data)
-
-
-def get_i18n_middleware() -> I18nMiddleware:
-    """Получить middleware для локализации."""
-    return I18nMiddleware(get_i18n())
-
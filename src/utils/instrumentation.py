@@ -0,0 +1,135 @@
+"""Метрики и span обработчиков, запросов к Telegram и фоновых компонентов."""
+import time
+from typing import Callable
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.types import TelegramObject
+
+from src.utils.metrics import Counter, Gauge, Histogram
+from src.utils.tracing import span
+
+HANDLER_DURATION = Histogram(
+    "bot_handler_duration_seconds",
+    "Handler duration including inner middlewares",
+    ["handler"],
+)
+HANDLER_ERRORS = Counter(
+    "bot_handler_errors_total",
+    "Handler exceptions",
+    ["handler"],
+)
+TELEGRAM_REQUEST_DURATION = Histogram(
+    "telegram_request_duration_seconds",
+    "Bot API request duration",
+    ["method"],
+)
+TELEGRAM_REQUESTS = Counter(
+    "telegram_requests_total",
+    "Bot API requests by result",
+    ["method", "result"],
+)
+
+
+def handler_name(data: dict) -> str:
+    """Имя обработчика события (для CallbackTable - найденный обработчик)."""
+    handler = data.get("callback_target") or data.get("handler")
+    if handler is None:
+        return "unknown"
+    return getattr(handler.callback, "__name__", "unknown")
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Inner middleware: время и ошибки каждого обработчика."""
+
+    async def __call__(
+        self,
+        handler: Callable,
+        event: TelegramObject,
+        data: dict,
+    ):
+        name = handler_name(data)
+        started = time.perf_counter()
+        try:
+            with span("handler", handler=name):
+                return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.labels(name).inc()
+            raise
+        finally:
+            HANDLER_DURATION.labels(name).observe(time.perf_counter() - started)
+
+
+class TelegramMetricsMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота: время и результат запросов к Bot API."""
+
+    async def __call__(self, make_request: Callable, bot: Bot, method: TelegramMethod):
+        name = type(method).__name__
+        result = "ok"
+        started = time.perf_counter()
+        try:
+            with span("telegram", method=name):
+                return await make_request(bot, method)
+        except TelegramRetryAfter:
+            result = "flood"
+            raise
+        except TelegramAPIError:
+            result = "api_error"
+            raise
+        except Exception:
+            result = "error"
+            raise
+        finally:
+            TELEGRAM_REQUEST_DURATION.labels(name).observe(time.perf_counter() - started)
+            TELEGRAM_REQUESTS.labels(name, result).inc()
+
+
+def _deletion_queue():
+    from src.services.deletion_scheduler import get_deletion_scheduler
+
+    return get_deletion_scheduler().stats()["pending"]
+
+
+def _throttled_events():
+    from src.utils.throttling import get_throttling_middleware
+
+    return {(kind,): count for kind, count in get_throttling_middleware().rejected.items()}
+
+
+def _early_acks():
+    from src.utils.callback_ack import get_callback_ack_middleware
+
+    return get_callback_ack_middleware().early_acks
+
+
+def _render_cache():
+    from src.utils.render_cache import get_render_cache
+
+    cache = get_render_cache()
+    return {("hit",): cache.hits, ("miss",): cache.misses}
+
+
+def _language_cache_size():
+    from src.database import _language_cache
+
+    return len(_language_cache)
+
+
+def _loop_lag():
+    from src.utils.loop_monitor import get_loop_monitor
+
+    monitor = get_loop_monitor()
+    if monitor is None:
+        return None
+    stats = monitor.stats()
+    return {(q,): stats[q] for q in ("p50", "p90", "p99", "max")}
+
+
+Gauge("bot_deletion_queue_size", "Messages waiting for scheduled deletion", function=_deletion_queue)
+Counter("bot_throttled_events_total", "Events rejected by throttling", ["kind"], function=_throttled_events)
+Counter("bot_callback_early_acks_total", "Callbacks answered by the ack middleware", function=_early_acks)
+Counter("bot_render_cache_lookups_total", "Render cache lookups", ["result"], function=_render_cache)
+Gauge("bot_language_cache_size", "Cached user languages", function=_language_cache_size)
+Gauge("bot_loop_lag_seconds", "Event loop lag over recent samples", ["quantile"], function=_loop_lag)
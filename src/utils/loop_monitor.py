@@ -0,0 +1,138 @@
+"""Мониторинг задержек event loop и поиск блокирующих вызовов.
+
+Задача-сэмплер раз в ``interval`` секунд засыпает и измеряет, насколько
+позже запланированного она проснулась (задержка планирования loop).
+Отдельный поток-сторож следит за пульсом loop и, если тот не обновлялся
+дольше ``threshold``, записывает в лог стек потока loop - то место, где
+выполняется блокирующий код. Дополнительно можно включить отладочный режим
+asyncio с ``slow_callback_duration`` (дороже, для диагностики).
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, Optional
+
+from src.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Сколько последних замеров хранится для перцентилей
+LAG_SAMPLES = 1200
+
+
+def _percentile(sorted_values: list, percent: float) -> float:
+    """Перцентиль по отсортированному списку."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))
+    return sorted_values[index]
+
+
+class LoopMonitor:
+    """Замер задержек event loop и сторож блокировок."""
+
+    def __init__(self, interval: float, threshold: float):
+        self.interval = interval
+        self.threshold = threshold
+        self._samples: deque = deque(maxlen=LAG_SAMPLES)
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self.max_lag = 0.0
+        self.stalls = 0
+
+    async def _sample(self):
+        """Измерять задержку пробуждения и обновлять пульс."""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            self._heartbeat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self._heartbeat = time.monotonic()
+            self._samples.append(lag)
+            if lag > self.max_lag:
+                self.max_lag = lag
+            if lag >= self.threshold:
+                logger.warning(f"⚠️ Event loop lag {lag * 1000:.0f} ms")
+
+    def _watchdog(self):
+        """Поток-сторож: стек потока loop при зависании дольше порога."""
+        reported_beat = None
+        while not self._stop.wait(self.threshold / 2):
+            beat = self._heartbeat
+            stalled = time.monotonic() - beat - self.interval
+            if stalled < self.threshold or beat == reported_beat:
+                continue
+            reported_beat = beat  # Одна запись на одно зависание
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            logger.warning(
+                f"⚠️ Event loop blocked for {stalled * 1000:.0f} ms, stack:\n{stack}"
+            )
+
+    def start(self, debug: bool = False):
+        """Запустить сэмплер и сторож в текущем event loop."""
+        if self._task is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        if debug:
+            # Отладочный режим asyncio пишет в лог обратные вызовы дольше порога
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.threshold
+        self._task = asyncio.create_task(self._sample())
+        threading.Thread(target=self._watchdog, name="loop-watchdog", daemon=True).start()
+        logger.info(
+            f"✅ Loop monitor started (interval {self.interval}s, threshold {self.threshold}s)"
+        )
+
+    def stop(self):
+        """Остановить мониторинг."""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> Dict[str, float]:
+        """Перцентили задержки (секунды) по последним замерам."""
+        values = sorted(self._samples)
+        return {
+            "samples": len(values),
+            "p50": _percentile(values, 50),
+            "p90": _percentile(values, 90),
+            "p99": _percentile(values, 99),
+            "max": self.max_lag,
+            "stalls": self.stalls,
+        }
+
+
+_monitor: Optional[LoopMonitor] = None
+
+
+def get_loop_monitor() -> Optional[LoopMonitor]:
+    """Получить монитор (None, если не запущен)."""
+    return _monitor
+
+
+def start_loop_monitor() -> Optional[LoopMonitor]:
+    """Запустить монитор, если он включен в настройках."""
+    global _monitor
+    settings = get_settings()
+    if not settings.LOOP_MONITOR_ENABLED:
+        return None
+    if _monitor is None:
+        _monitor = LoopMonitor(
+            interval=settings.LOOP_MONITOR_INTERVAL,
+            threshold=settings.LOOP_LAG_THRESHOLD,
+        )
+        _monitor.start(debug=settings.LOOP_DEBUG)
+    return _monitor
@@ -5,6 +5,13 @@ from aiogram import Bot
 from aiogram.types import Message
 
 from src.config import get_settings
+from src.utils.metrics import Counter
+
+ADMIN_NOTIFICATIONS = Counter(
+    "bot_admin_notifications_total",
+    "Admin notifications by result",
+    ["result"],
+)
 
 
 async def send_admin_notification(
@@ -26,6 +33,8 @@ async def send_admin_notification(
             message_params["message_thread_id"] = settings.NOTIFICATIONS_TOPIC_ID
 
         await bot.send_message(**message_params)
+        ADMIN_NOTIFICATIONS.labels("sent").inc()
     except Exception:
-        pass  # Игнорируем ошибки отправки уведомлений
+        # Ошибки отправки уведомлений не прерывают обработку, только считаются
+        ADMIN_NOTIFICATIONS.labels("failed").inc()
 
@@ -0,0 +1,82 @@
+"""Кэш отрисованных экранов: последний текст и клавиатура каждого сообщения бота."""
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from src.config import get_settings
+
+# Ключ: (chat_id, message_id); значение: (хэш текста, хэш клавиатуры)
+RenderKey = Tuple[int, int]
+Fingerprint = Tuple[Optional[int], Optional[int]]
+
+
+def text_fingerprint(text: str, parse_mode: Optional[str]) -> int:
+    """Хэш текста с учетом режима разметки."""
+    return hash((text, parse_mode))
+
+
+def markup_fingerprint(reply_markup) -> int:
+    """Хэш клавиатуры (None - без клавиатуры)."""
+    if reply_markup is None:
+        return hash(None)
+    return hash(reply_markup.model_dump_json(exclude_none=True))
+
+
+class RenderCache:
+    """LRU кэш: что сейчас показано в сообщении, чтобы не отправлять одинаковые правки."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._screens: "OrderedDict[RenderKey, Fingerprint]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, chat_id: int, message_id: int) -> Optional[Fingerprint]:
+        """Последний отрисованный экран сообщения."""
+        fingerprint = self._screens.get((chat_id, message_id))
+        if fingerprint is not None:
+            self._screens.move_to_end((chat_id, message_id))
+        return fingerprint
+
+    def is_same(
+        self, chat_id: int, message_id: int, text_fp: Optional[int], markup_fp: int
+    ) -> bool:
+        """Проверить, совпадает ли новый экран с показанным (text_fp=None - текст не меняется)."""
+        cached = self.get(chat_id, message_id)
+        same = (
+            cached is not None
+            and cached[1] == markup_fp
+            and (text_fp is None or cached[0] == text_fp)
+        )
+        if same:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return same
+
+    def remember(
+        self, chat_id: int, message_id: int, text_fp: Optional[int], markup_fp: int
+    ):
+        """Запомнить показанный экран (text_fp=None - текст прежний)."""
+        key = (chat_id, message_id)
+        if text_fp is None:
+            cached = self._screens.get(key)
+            text_fp = cached[0] if cached is not None else None
+        self._screens[key] = (text_fp, markup_fp)
+        self._screens.move_to_end(key)
+        while len(self._screens) > self.max_entries:
+            self._screens.popitem(last=False)
+
+    def forget(self, chat_id: int, message_id: int):
+        """Забыть сообщение (удалено или недоступно)."""
+        self._screens.pop((chat_id, message_id), None)
+
+
+_render_cache: Optional[RenderCache] = None
+
+
+def get_render_cache() -> RenderCache:
+    """Получить кэш отрисованных экранов (singleton)."""
+    global _render_cache
+    if _render_cache is None:
+        _render_cache = RenderCache(get_settings().RENDER_CACHE_SIZE)
+    return _render_cache
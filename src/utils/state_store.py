@@ -0,0 +1,155 @@
+"""Хранилище состояния диалогов с TTL (память или SQLite)."""
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from src.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class MemoryStateBackend:
+    """Состояние в памяти процесса: TTL на запись и общий лимит с вытеснением LRU."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        # (namespace, key) -> (expires_at, value)
+        self._data: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = OrderedDict()
+        self.evictions = 0
+
+    def get(self, namespace: str, key: Hashable) -> Any:
+        """Получить значение или _MISSING."""
+        item = self._data.get((namespace, key))
+        if item is None:
+            return _MISSING
+        if item[0] <= time.monotonic():
+            del self._data[(namespace, key)]
+            return _MISSING
+        self._data.move_to_end((namespace, key))
+        return item[1]
+
+    def set(self, namespace: str, key: Hashable, value: Any, ttl: float):
+        """Сохранить значение."""
+        self._data[(namespace, key)] = (time.monotonic() + ttl, value)
+        self._data.move_to_end((namespace, key))
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, namespace: str, key: Hashable) -> Any:
+        """Удалить значение и вернуть его или _MISSING."""
+        item = self._data.pop((namespace, key), None)
+        if item is None or item[0] <= time.monotonic():
+            return _MISSING
+        return item[1]
+
+    def clear(self, namespace: str):
+        """Удалить все значения пространства имен."""
+        for full_key in [k for k in self._data if k[0] == namespace]:
+            del self._data[full_key]
+
+
+class SqliteStateBackend:
+    """Состояние в SQLite: переживает перезапуск и доступно всем процессам."""
+
+    # Период удаления истекших записей (проверяется при записи), секунды
+    PURGE_INTERVAL = 300.0
+
+    def __init__(self):
+        self._purged_at = time.monotonic()
+
+    def get(self, namespace: str, key: Hashable) -> Any:
+        """Получить значение или _MISSING."""
+        from src.database import ConversationState
+
+        raw = ConversationState.get(namespace, key)
+        return _MISSING if raw is None else json.loads(raw)
+
+    def set(self, namespace: str, key: Hashable, value: Any, ttl: float):
+        """Сохранить значение."""
+        from src.database import ConversationState
+
+        ConversationState.set(namespace, key, json.dumps(value), time.time() + ttl)
+        if time.monotonic() - self._purged_at >= self.PURGE_INTERVAL:
+            self._purged_at = time.monotonic()
+            ConversationState.purge_expired()
+
+    def delete(self, namespace: str, key: Hashable) -> Any:
+        """Удалить значение и вернуть его или _MISSING."""
+        from src.database import ConversationState
+
+        raw = ConversationState.delete(namespace, key)
+        return _MISSING if raw is None else json.loads(raw)
+
+    def clear(self, namespace: str):
+        """Удалить все значения пространства имен."""
+        from src.database import ConversationState
+
+        ConversationState.clear(namespace)
+
+
+_backend = None
+
+
+def get_state_backend():
+    """Получить хранилище, выбранное в настройках (STATE_BACKEND)."""
+    global _backend
+    if _backend is None:
+        settings = get_settings()
+        if settings.STATE_BACKEND == "sqlite":
+            _backend = SqliteStateBackend()
+        else:
+            _backend = MemoryStateBackend(settings.STATE_MAX_ENTRIES)
+        logger.info(f"✅ Conversation state backend: {settings.STATE_BACKEND}")
+    return _backend
+
+
+class StateStore:
+    """Пространство имен состояния с интерфейсом словаря (ключ - ID пользователя или чата)."""
+
+    def __init__(self, namespace: str, ttl: Optional[float] = None):
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def _ttl(self, ttl: Optional[float]) -> float:
+        if ttl is not None:
+            return ttl
+        return self.ttl if self.ttl is not None else get_settings().STATE_TTL_SECONDS
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Получить значение."""
+        value = get_state_backend().get(self.namespace, key)
+        return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Сохранить значение (ttl в секундах, по умолчанию - из настроек)."""
+        get_state_backend().set(self.namespace, key, value, self._ttl(ttl))
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Удалить значение и вернуть его."""
+        value = get_state_backend().delete(self.namespace, key)
+        return default if value is _MISSING else value
+
+    def clear(self):
+        """Удалить все значения."""
+        get_state_backend().clear(self.namespace)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return get_state_backend().get(self.namespace, key) is not _MISSING
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = get_state_backend().get(self.namespace, key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any):
+        self.set(key, value)
+
+    def __delitem__(self, key: Hashable):
+        if get_state_backend().delete(self.namespace, key) is _MISSING:
+            raise KeyError(key)
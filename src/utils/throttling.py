@@ -0,0 +1,131 @@
+"""Ограничение частоты запросов пользователей (token bucket)."""
+import logging
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Message, TelegramObject, User
+
+from src.config import get_settings
+from src.database import BotUser
+from src.utils.auth import is_admin
+from src.utils.i18n import get_i18n
+
+logger = logging.getLogger(__name__)
+
+# Сколько пользователей отслеживается одновременно (LRU)
+MAX_TRACKED_USERS = 10000
+
+
+class TokenBucket:
+    """Корзина токенов одного пользователя."""
+
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Outer middleware: отбрасывает события пользователей, превысивших лимит."""
+
+    # Callback, которые обращаются к панели, YooKassa или создают платежи
+    EXPENSIVE_CALLBACKS = {"user:my_access", "user:trial"}
+    EXPENSIVE_CALLBACK_PREFIXES = ("yookassa:check:",)
+
+    def __init__(self, rate: float, burst: float, expensive_cost: float):
+        self.rate = rate
+        self.burst = burst
+        self.expensive_cost = expensive_cost
+        self._buckets: "OrderedDict[int, TokenBucket]" = OrderedDict()
+        self.rejected: Counter = Counter()
+
+    def _is_expensive(self, data: str) -> bool:
+        """Проверить, является ли callback дорогим."""
+        if data in self.EXPENSIVE_CALLBACKS or data.startswith(self.EXPENSIVE_CALLBACK_PREFIXES):
+            return True
+        # purchase:<months>:method:... и применение промокода создают платежи
+        return data.startswith("purchase:") and (":method:" in data or ":promo:apply:" in data)
+
+    def _event_cost(self, event: TelegramObject) -> Tuple[str, float]:
+        """Вид события (для счетчиков) и его стоимость в токенах (0 - не ограничивается)."""
+        if isinstance(event, CallbackQuery):
+            if event.data and self._is_expensive(event.data):
+                return "callback_expensive", self.expensive_cost
+            return "callback", 1.0
+        if isinstance(event, Message) and event.text is not None:
+            return "message", 1.0
+        # Служебные сообщения (successful_payment и т.п.) не ограничиваются:
+        # отброшенная оплата не продлила бы подписку
+        return "service", 0.0
+
+    def _consume(self, user_id: int, cost: float) -> bool:
+        """Списать токены; False, если их недостаточно."""
+        now = time.monotonic()
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = self._buckets[user_id] = TokenBucket(self.burst, now)
+            if len(self._buckets) > MAX_TRACKED_USERS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(user_id)
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+
+        if bucket.tokens < cost:
+            return False
+        bucket.tokens -= cost
+        return True
+
+    async def __call__(
+        self,
+        handler: Callable,
+        event: TelegramObject,
+        data: dict,
+    ):
+        """Пропустить событие, если у пользователя есть токены."""
+        user: Optional[User] = data.get("event_from_user")
+        if user is None or is_admin(user.id):
+            return await handler(event, data)
+
+        kind, cost = self._event_cost(event)
+        if not cost or self._consume(user.id, cost):
+            return await handler(event, data)
+
+        self.rejected[kind] += 1
+        logger.debug(f"Throttled {kind} from user {user.id}")
+
+        if isinstance(event, CallbackQuery):
+            # Язык только из кэша: отклоненное событие не должно доходить до БД
+            locale = (
+                BotUser.cached_language(user.id)
+                or user.language_code
+                or get_settings().DEFAULT_LOCALE
+            )
+            try:
+                await event.answer(get_i18n().gettext("common.throttled", locale=locale))
+            except Exception:
+                pass
+        return None
+
+    def stats(self) -> dict:
+        """Статистика: отслеживаемые пользователи и отклоненные события."""
+        return {"tracked_users": len(self._buckets), "rejected": dict(self.rejected)}
+
+
+_throttling_middleware: Optional[ThrottlingMiddleware] = None
+
+
+def get_throttling_middleware() -> ThrottlingMiddleware:
+    """Получить middleware ограничения частоты (singleton)."""
+    global _throttling_middleware
+    if _throttling_middleware is None:
+        settings = get_settings()
+        _throttling_middleware = ThrottlingMiddleware(
+            rate=settings.THROTTLE_RATE,
+            burst=settings.THROTTLE_BURST,
+            expensive_cost=settings.THROTTLE_EXPENSIVE_COST,
+        )
+    return _throttling_middleware
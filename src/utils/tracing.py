@@ -0,0 +1,142 @@
+"""Легковесная трассировка апдейтов.
+
+На каждый апдейт создается корневой span, вложенные span (обработчик,
+запросы к Remnawave, БД и Bot API) привязываются к нему через contextvars.
+Вне апдейта ``span()`` ничего не делает, поэтому трассировку можно держать
+включенной. Апдейты дольше ``SLOW_UPDATE_THRESHOLD`` пишутся в лог деревом
+span в JSON.
+"""
+import json
+import logging
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+logger = logging.getLogger(__name__)
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+# Общий пустой контекст для вызовов вне трассируемого апдейта
+_NOOP = nullcontext()
+
+# Ограничение числа дочерних span (например, при массовых операциях)
+MAX_CHILDREN = 200
+
+
+class Span:
+    """Участок выполнения с временем начала/окончания и вложенными span."""
+
+    __slots__ = ("name", "attrs", "start", "end", "children", "error", "dropped")
+
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.children: List["Span"] = []
+        self.error: Optional[str] = None
+        self.dropped = 0
+
+    @property
+    def duration(self) -> float:
+        """Длительность в секундах (до текущего момента, если не завершен)."""
+        return (self.end or time.perf_counter()) - self.start
+
+    def to_dict(self, origin: Optional[float] = None) -> Dict[str, Any]:
+        """Дерево span для лога (время в миллисекундах от начала корня)."""
+        origin = self.start if origin is None else origin
+        data: Dict[str, Any] = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 2),
+            "ms": round(self.duration * 1000, 2),
+        }
+        if self.attrs:
+            data["attrs"] = self.attrs
+        if self.error:
+            data["error"] = self.error
+        if self.children:
+            data["children"] = [child.to_dict(origin) for child in self.children]
+        if self.dropped:
+            data["dropped"] = self.dropped
+        return data
+
+
+class _SpanContext:
+    """Контекстный менеджер дочернего span."""
+
+    __slots__ = ("parent", "span", "token")
+
+    def __init__(self, parent: Span, name: str, attrs: Dict[str, Any]):
+        self.parent = parent
+        self.span = Span(name, attrs)
+
+    def __enter__(self) -> Span:
+        if len(self.parent.children) < MAX_CHILDREN:
+            self.parent.children.append(self.span)
+        else:
+            self.parent.dropped += 1
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.end = time.perf_counter()
+        if exc_type is not None:
+            self.span.error = exc_type.__name__
+        _current_span.reset(self.token)
+        return False
+
+
+def span(name: str, **attrs: Any):
+    """Дочерний span текущего апдейта (вне апдейта - пустой контекст)."""
+    parent = _current_span.get()
+    if parent is None:
+        return _NOOP
+    return _SpanContext(parent, name, attrs)
+
+
+def current_span() -> Optional[Span]:
+    """Текущий span (None вне трассируемого апдейта)."""
+    return _current_span.get()
+
+
+class TracingMiddleware(BaseMiddleware):
+    """Outer middleware апдейтов: корневой span и лог медленных апдейтов."""
+
+    def __init__(self, slow_threshold: float):
+        self.slow_threshold = slow_threshold
+        self.slow_updates = 0
+
+    async def __call__(
+        self,
+        handler: Callable,
+        event: TelegramObject,
+        data: dict,
+    ):
+        attrs: Dict[str, Any] = {}
+        if isinstance(event, Update):
+            attrs["update_id"] = event.update_id
+            attrs["type"] = event.event_type
+        user = data.get("event_from_user")
+        if user is not None:
+            attrs["user_id"] = user.id
+
+        root = Span("update", attrs)
+        token = _current_span.set(root)
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            root.error = type(e).__name__
+            raise
+        finally:
+            root.end = time.perf_counter()
+            _current_span.reset(token)
+            if root.duration >= self.slow_threshold:
+                self.slow_updates += 1
+                logger.warning(
+                    f"🐢 Slow update ({root.duration * 1000:.0f} ms): "
+                    f"{json.dumps(root.to_dict(), ensure_ascii=False, default=str)}"
+                )
@@ -0,0 +1,313 @@
+"""Запись входящих апдейтов для последующего воспроизведения.
+
+Outer middleware на апдейтах кладет каждый апдейт (обезличенный) с
+временем получения в очередь, отдельный поток пачками дописывает их в
+``UPDATE_CAPTURE_DIR`` в формате JSONL, сжатом gzip. Каждая пачка - отдельный
+gzip-member, поэтому файл читается целиком даже после аварийной остановки.
+При превышении ``UPDATE_CAPTURE_MAX_MB`` начинается новый файл, старше
+``UPDATE_CAPTURE_FILES`` последних файлов удаляются. Файлы других работающих
+процессов (WORKERS > 1) не удаляются: процесс чистит только свои файлы и
+файлы завершившихся процессов (PID - в имени файла).
+
+Обезличивание: ID пользователей и чатов (в любом объекте User/Chat, включая
+пересланные, новых участников и via_bot) заменяются стабильными
+псевдонимами (HMAC от соли), имена и username - заглушками, свободный
+текст и подписи - строками той же длины; команды и callback_data
+сохраняются, чтобы воспроизведение шло по тем же обработчикам.
+"""
+import atexit
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from src.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Сколько апдейтов может ждать записи; остальные отбрасываются
+MAX_QUEUE = 10000
+# Максимальный размер пачки и интервал записи
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 1.0
+
+# Поля объектов User/Chat, которые заменяются заглушками
+_NAME_FIELDS = {"first_name", "last_name", "username", "title"}
+# Поля, по которым словарь с целым id распознается как User/Chat
+_PEER_FIELDS = {"first_name", "type", "is_bot"}
+# Целые ID пользователей и чатов вне объектов User/Chat
+_ID_FIELDS = {"user_id", "user_chat_id", "chat_id"}
+# Имена отправителей без объекта User (скрытая пересылка, подписи)
+_SENDER_NAME_FIELDS = {
+    "sender_user_name", "forward_sender_name", "author_signature", "forward_signature",
+}
+# Поля, которые удаляются целиком
+_DROP_FIELDS = {
+    "phone_number", "email", "shipping_address", "order_info", "bio",
+    "contact", "location", "venue", "photo", "document", "voice", "video",
+    "video_note", "audio", "sticker", "animation",
+}
+# Свободный текст: заменяется строкой той же длины
+_TEXT_FIELDS = {"text", "caption", "query"}
+# Идентификаторы платежей
+_CHARGE_FIELDS = {"telegram_payment_charge_id", "provider_payment_charge_id", "chat_instance"}
+
+
+class Anonymizer:
+    """Стабильное обезличивание апдейтов (псевдонимы зависят от соли)."""
+
+    def __init__(self, salt: str):
+        self._key = salt.encode()
+
+    def _digest(self, value: Any) -> bytes:
+        return hmac.new(self._key, str(value).encode(), hashlib.sha256).digest()
+
+    def user_id(self, value: int) -> int:
+        """Псевдоним ID (знак сохраняется: отрицательные - группы и каналы)."""
+        pseudo = int.from_bytes(self._digest(value)[:5], "big") % 9_000_000_000 + 1_000_000_000
+        return -pseudo if value < 0 else pseudo
+
+    def token(self, value: Any) -> str:
+        """Псевдоним строкового идентификатора."""
+        return self._digest(value).hex()[:24]
+
+    @staticmethod
+    def _mask(text: str) -> str:
+        """Скрыть текст, сохранив команду и длину."""
+        if text.startswith("/"):
+            command, _, rest = text.partition(" ")
+            return command + (" " + "x" * len(rest) if rest else "")
+        return "x" * len(text)
+
+    def _payload(self, payload: str) -> str:
+        """invoice_payload: заменить user_id внутри JSON."""
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            return self.token(payload)
+        if isinstance(data, dict) and isinstance(data.get("user_id"), int):
+            data["user_id"] = self.user_id(data["user_id"])
+            return json.dumps(data)
+        return payload
+
+    @staticmethod
+    def _is_peer(value: dict) -> bool:
+        """Объект User или Chat: целый id и имя, тип чата или признак бота."""
+        return isinstance(value.get("id"), int) and not _PEER_FIELDS.isdisjoint(value)
+
+    def anonymize(self, value: Any) -> Any:
+        """Обезличенная копия значения апдейта."""
+        if isinstance(value, dict):
+            result = {}
+            is_peer = self._is_peer(value)
+            for name, item in value.items():
+                if name in _DROP_FIELDS:
+                    continue
+                if is_peer and name == "id" and isinstance(item, int):
+                    result[name] = self.user_id(item)
+                elif is_peer and name in _NAME_FIELDS and isinstance(item, str):
+                    result[name] = name
+                elif name in _ID_FIELDS and isinstance(item, int):
+                    result[name] = self.user_id(item)
+                elif name in _SENDER_NAME_FIELDS and isinstance(item, str):
+                    result[name] = name
+                elif name in _TEXT_FIELDS and isinstance(item, str):
+                    result[name] = self._mask(item)
+                elif name in _CHARGE_FIELDS and isinstance(item, str):
+                    result[name] = self.token(item)
+                elif name == "invoice_payload" and isinstance(item, str):
+                    result[name] = self._payload(item)
+                elif name in ("entities", "caption_entities"):
+                    # Смещения сущностей сохраняются, ссылки и упоминания - нет
+                    result[name] = [
+                        {k: v for k, v in entity.items() if k in ("type", "offset", "length")}
+                        for entity in item
+                    ]
+                else:
+                    result[name] = self.anonymize(item)
+            return result
+        if isinstance(value, list):
+            return [self.anonymize(item) for item in value]
+        return value
+
+
+def _file_pid(path: Path) -> Optional[int]:
+    """PID процесса-владельца из имени updates-<дата>-<время>-<pid>.jsonl.gz."""
+    try:
+        return int(path.name.split(".", 1)[0].rsplit("-", 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def _mtime(path: Path) -> float:
+    """Время изменения файла (0, если его уже удалил другой процесс)."""
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+def _process_alive(pid: int) -> bool:
+    """Процесс с таким PID работает (при сомнении - да)."""
+    if os.name == "nt":
+        return True  # os.kill на Windows завершает процесс
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class CaptureWriter:
+    """Поток записи: пачки апдейтов в gzip JSONL с ротацией файлов."""
+
+    def __init__(self, directory: str, max_bytes: int, max_files: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=MAX_QUEUE)
+        self._path: Optional[Path] = None
+        self._thread = threading.Thread(target=self._run, name="update-capture", daemon=True)
+        self.written = 0
+        self.dropped = 0
+
+    def start(self):
+        """Запустить поток записи."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, line: str):
+        """Поставить строку в очередь (без ожидания)."""
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 5.0):
+        """Дописать очередь и остановить поток."""
+        if self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                return
+            self._thread.join(timeout)
+
+    def _new_path(self) -> Path:
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        return self.directory / f"updates-{stamp}-{os.getpid()}.jsonl.gz"
+
+    def _rotate(self):
+        """Начать новый файл и удалить лишние старые (кроме файлов других работающих процессов)."""
+        self._path = self._new_path()
+        files = sorted(self.directory.glob("updates-*.jsonl.gz"), key=_mtime)
+        excess = len(files) - (self.max_files - 1) if self.max_files > 0 else 0
+        if excess <= 0:
+            return
+        own_pid = os.getpid()
+        removable = [
+            old for old in files
+            if _file_pid(old) in (own_pid, None) or not _process_alive(_file_pid(old))
+        ]
+        for old in removable[:excess]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+    def _write(self, lines: List[str]):
+        if self._path is None or (
+            self._path.exists() and self._path.stat().st_size >= self.max_bytes
+        ):
+            self._rotate()
+        data = gzip.compress("".join(lines).encode("utf-8"))
+        with open(self._path, "ab") as f:
+            f.write(data)
+        self.written += len(lines)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            line = self._queue.get()
+            if line is None:
+                break
+            # Копим пачку до BATCH_SIZE строк или FLUSH_INTERVAL секунд
+            lines = [line]
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while len(lines) < BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    line = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if line is None:
+                    stop = True
+                    break
+                lines.append(line)
+            try:
+                self._write(lines)
+            except OSError as e:
+                self.dropped += len(lines)
+                logger.warning(f"⚠️ Update capture write failed: {e}")
+
+
+class UpdateCaptureMiddleware(BaseMiddleware):
+    """Outer middleware апдейтов: запись обезличенных апдейтов."""
+
+    def __init__(self, writer: CaptureWriter, anonymizer: Anonymizer):
+        self.writer = writer
+        self.anonymizer = anonymizer
+
+    async def __call__(
+        self,
+        handler: Callable,
+        event: TelegramObject,
+        data: dict,
+    ):
+        if isinstance(event, Update):
+            try:
+                raw = event.model_dump(mode="json", exclude_none=True, by_alias=True)
+                record = {"ts": round(time.time(), 3), "update": self.anonymizer.anonymize(raw)}
+                self.writer.put(json.dumps(record, ensure_ascii=False) + "\n")
+            except Exception as e:
+                logger.warning(f"⚠️ Update capture failed: {e}")
+        return await handler(event, data)
+
+
+_middleware: Optional[UpdateCaptureMiddleware] = None
+
+
+def get_update_capture_middleware() -> UpdateCaptureMiddleware:
+    """Получить middleware записи (singleton, поток запускается при создании)."""
+    global _middleware
+    if _middleware is None:
+        settings = get_settings()
+        salt = settings.UPDATE_CAPTURE_SALT
+        if not salt:
+            salt = secrets.token_hex(16)
+            logger.warning("⚠️ UPDATE_CAPTURE_SALT is empty, pseudonyms change on restart")
+        writer = CaptureWriter(
+            settings.UPDATE_CAPTURE_DIR,
+            max_bytes=int(settings.UPDATE_CAPTURE_MAX_MB * 1024 * 1024),
+            max_files=settings.UPDATE_CAPTURE_FILES,
+        )
+        writer.start()
+        _middleware = UpdateCaptureMiddleware(writer, Anonymizer(salt))
+        logger.info(f"✅ Update capture enabled ({settings.UPDATE_CAPTURE_DIR})")
+    return _middleware
+
@@ -0,0 +1,100 @@
+"""Контекст пользователя для обработчиков."""
+from typing import Callable, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Message, TelegramObject, User
+
+from src.config import get_settings
+from src.database import BotUser
+from src.utils.auth import is_admin
+from src.utils.i18n import JsonI18n, get_i18n
+
+
+class UserContext:
+    """Данные пользователя, вычисленные один раз за апдейт."""
+
+    __slots__ = ("user_id", "username", "is_admin", "locale", "_db_user")
+
+    def __init__(self, user: User, admin: bool, locale: str):
+        self.user_id = user.id
+        self.username = user.username
+        self.is_admin = admin
+        self.locale = locale
+        self._db_user: Optional[dict] = None
+
+    @property
+    def db_user(self) -> dict:
+        """Строка bot_users (загружается/создается при первом обращении)."""
+        if self._db_user is None:
+            self._db_user = BotUser.get_or_create(self.user_id, self.username)
+        return self._db_user
+
+    def refresh(self):
+        """Сбросить загруженную строку после изменения в БД."""
+        self._db_user = None
+
+
+class ContextMiddleware(BaseMiddleware):
+    """Middleware: права администратора, локаль и UserContext."""
+
+    # Список публичных команд, которые доступны всем
+    PUBLIC_COMMANDS = {"/start"}
+
+    # Префиксы админских callback
+    ADMIN_CALLBACK_PREFIXES = (
+        "node:", "host:", "token:", "template:", "snippet:",
+        "config:", "billing:", "provider:", "bulk:", "system:",
+        "menu:section:", "user_edit:", "node_edit:", "host_edit:",
+        "subs:", "subs_list", "user_search"
+    )
+
+    def __init__(self, i18n: JsonI18n):
+        self.i18n = i18n
+
+    def _is_admin_only(self, event: TelegramObject) -> bool:
+        """Проверить, предназначено ли событие только для админов."""
+        if isinstance(event, Message):
+            if not event.text or not event.text.startswith("/"):
+                return False
+            command = event.text.split()[0].split("@")[0]
+            return command not in self.PUBLIC_COMMANDS
+        if isinstance(event, CallbackQuery):
+            return bool(event.data) and event.data.startswith(
+                self.ADMIN_CALLBACK_PREFIXES
+            )
+        return False
+
+    async def __call__(
+        self,
+        handler: Callable,
+        event: TelegramObject,
+        data: dict,
+    ):
+        """Собрать контекст пользователя и вызвать обработчик."""
+        # Пользователь уже извлечен aiogram (UserContextMiddleware)
+        user: Optional[User] = data.get("event_from_user")
+
+        if user is None:
+            with self.i18n.context(), self.i18n.use_locale(
+                get_settings().DEFAULT_LOCALE
+            ):
+                return await handler(event, data)
+
+        admin = is_admin(user.id)
+        if not admin and self._is_admin_only(event):
+            return  # Блокируем админские события для неадминов
+
+        locale = (
+            BotUser.get_language(user.id, user.username)
+            or user.language_code
+            or "ru"
+        )
+        data["user_ctx"] = UserContext(user, admin, locale)
+
+        with self.i18n.context(), self.i18n.use_locale(locale):
+            return await handler(event, data)
+
+
+def get_context_middleware() -> ContextMiddleware:
+    """Получить middleware контекста пользователя."""
+    return ContextMiddleware(get_i18n())
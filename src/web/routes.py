@@ -0,0 +1,80 @@
+"""HTTP обработчики служебного сервера."""
+import logging
+
+from aiogram import Bot
+from aiohttp import web
+
+from src.database import BotUser, Payment
+from src.services.payment_service import PaymentAlreadyProcessed, process_yookassa_payment
+from src.utils.i18n import get_i18n
+from src.utils.loop_monitor import get_loop_monitor
+from src.utils.metrics import CONTENT_TYPE, REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Ключ экземпляра бота в aiohttp приложении
+BOT_KEY = web.AppKey("bot", Bot)
+
+
+async def health(request: web.Request) -> web.Response:
+    """Проверка работоспособности процесса."""
+    response = {"status": "ok"}
+    monitor = get_loop_monitor()
+    if monitor is not None:
+        response["loop_lag"] = monitor.stats()
+    return web.json_response(response)
+
+
+async def metrics(request: web.Request) -> web.Response:
+    """Метрики процесса в формате Prometheus."""
+    return web.Response(body=REGISTRY.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+
+async def yookassa_webhook(request: web.Request) -> web.Response:
+    """Уведомление YooKassa об изменении статуса платежа."""
+    bot = request.app[BOT_KEY]
+
+    try:
+        notification = await request.json()
+    except Exception:
+        return web.Response(status=400)
+
+    if notification.get("event") != "payment.succeeded":
+        return web.Response(status=200)
+
+    payment_id = notification.get("object", {}).get("id")
+    db_payment = Payment.get_by_yookassa_payment_id(payment_id) if payment_id else None
+    if not db_payment or db_payment["status"] != "pending":
+        return web.Response(status=200)
+
+    # Статус повторно запрашивается у YooKassa внутри process_yookassa_payment,
+    # поэтому поддельное уведомление не завершит неоплаченный платеж
+    try:
+        result = await process_yookassa_payment(payment_id, bot)
+    except PaymentAlreadyProcessed:
+        # Платеж уже обрабатывается проверкой пользователя или прошлым уведомлением
+        return web.Response(status=200)
+    except ValueError as e:
+        # Платеж не оплачен или не наш: повтор уведомления ничего не изменит
+        logger.warning(f"YooKassa webhook rejected: {e}")
+        return web.Response(status=200)
+    except Exception as e:
+        # Панель или YooKassa недоступны: захват платежа снят, ответ 5xx -
+        # YooKassa повторит уведомление
+        logger.error(f"❌ YooKassa webhook processing error: {e!r}")
+        return web.Response(status=503)
+
+    user_id = db_payment["user_id"]
+    locale = BotUser.get_language(user_id) or get_i18n().default_locale
+    text = get_i18n().gettext("payment.success", locale=locale).format(
+        expire_at=result.get("expire_at")
+    )
+    if result.get("subscription_link"):
+        text += f"\n\n🔗 {result['subscription_link']}"
+
+    try:
+        await bot.send_message(chat_id=user_id, text=text, parse_mode="Markdown")
+    except Exception as e:
+        logger.warning(f"Failed to notify user {user_id} about payment: {e}")
+
+    return web.Response(status=200)
@@ -0,0 +1,169 @@
+"""HTTP сервер: вебхук Telegram, YooKassa и health."""
+import asyncio
+import logging
+import secrets
+import signal
+from typing import Any, Callable, Dict, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from src.config import get_settings
+from src.web.routes import BOT_KEY, health, metrics, yookassa_webhook
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """Обработчик вебхука с ограничением числа одновременно обрабатываемых апдейтов."""
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        workers: int,
+        shutdown_timeout: float,
+        secret_token: str,
+        **data: Any,
+    ):
+        super().__init__(
+            dispatcher=dispatcher,
+            bot=bot,
+            handle_in_background=True,
+            secret_token=secret_token,
+            **data,
+        )
+        self._semaphore = asyncio.Semaphore(workers)
+        self._shutdown_timeout = shutdown_timeout
+
+    async def _background_feed_update(self, bot: Bot, update: Dict[str, Any]) -> None:
+        """Обработать апдейт, не превышая лимит одновременных обработчиков."""
+        async with self._semaphore:
+            await super()._background_feed_update(bot, update)
+
+    async def close(self) -> None:
+        """Дождаться незавершенных апдейтов и закрыть сессию бота."""
+        pending = set(self._background_feed_update_tasks)
+        if pending:
+            logger.info(f"⏳ Waiting for {len(pending)} updates in progress...")
+            _, not_done = await asyncio.wait(pending, timeout=self._shutdown_timeout)
+            for task in not_done:
+                task.cancel()
+        await super().close()
+
+
+def _distributing_handler(
+    secret_token: str, update_sink: Callable[[Dict[str, Any]], None]
+):
+    """Вебхук, который только передает сырой апдейт дальше (многопроцессный режим)."""
+
+    async def handle(request: web.Request) -> web.Response:
+        received = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+        if not secrets.compare_digest(received.encode(), secret_token.encode()):
+            return web.Response(body="Unauthorized", status=401)
+        update_sink(await request.json())
+        return web.json_response({})
+
+    return handle
+
+
+def create_web_app(
+    dp: Dispatcher,
+    bot: Bot,
+    webhook: bool = True,
+    secret_token: str = "",
+    update_sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> web.Application:
+    """Создать aiohttp приложение с вебхуком, YooKassa и health."""
+    settings = get_settings()
+    app = web.Application()
+    app[BOT_KEY] = bot
+
+    app.router.add_get("/health", health)
+    app.router.add_post(settings.YOOKASSA_WEBHOOK_PATH, yookassa_webhook)
+
+    if webhook and update_sink is not None:
+        app.router.add_post(
+            settings.WEBHOOK_PATH, _distributing_handler(secret_token, update_sink)
+        )
+    elif webhook:
+        BoundedRequestHandler(
+            dispatcher=dp,
+            bot=bot,
+            workers=settings.WEBHOOK_WORKERS,
+            shutdown_timeout=settings.SHUTDOWN_TIMEOUT,
+            secret_token=secret_token,
+        ).register(app, path=settings.WEBHOOK_PATH)
+        setup_application(app, dp, bot=bot)
+
+    return app
+
+
+async def start_web_server(app: web.Application) -> web.AppRunner:
+    """Запустить HTTP сервер."""
+    settings = get_settings()
+    runner = web.AppRunner(app, shutdown_timeout=settings.SHUTDOWN_TIMEOUT)
+    await runner.setup()
+    site = web.TCPSite(runner, host=settings.WEB_SERVER_HOST, port=settings.WEB_SERVER_PORT)
+    await site.start()
+    logger.info(
+        f"✅ HTTP server listening on {settings.WEB_SERVER_HOST}:{settings.WEB_SERVER_PORT}"
+    )
+    return runner
+
+
+async def start_metrics_server(port: int) -> web.AppRunner:
+    """Запустить локальный HTTP сервер с /metrics."""
+    settings = get_settings()
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=settings.METRICS_HOST, port=port)
+    await site.start()
+    logger.info(f"✅ Metrics available at http://{settings.METRICS_HOST}:{port}/metrics")
+    return runner
+
+
+async def wait_for_stop_signal():
+    """Дождаться SIGINT/SIGTERM."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass  # Windows
+    await stop.wait()
+
+
+async def run_webhook(
+    dp: Dispatcher,
+    bot: Bot,
+    update_sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+):
+    """Работа через вебхук до получения сигнала остановки."""
+    settings = get_settings()
+    if not settings.WEBHOOK_URL:
+        raise ValueError("WEBHOOK_URL is required in webhook mode")
+
+    secret_token = settings.WEBHOOK_SECRET or secrets.token_urlsafe(32)
+    app = create_web_app(
+        dp, bot, webhook=True, secret_token=secret_token, update_sink=update_sink
+    )
+    runner = await start_web_server(app)
+
+    webhook_url = settings.WEBHOOK_URL.rstrip("/") + settings.WEBHOOK_PATH
+    await bot.set_webhook(
+        url=webhook_url,
+        secret_token=secret_token,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+    logger.info(f"✅ Bot started. Webhook: {webhook_url}")
+
+    try:
+        await wait_for_stop_signal()
+    finally:
+        logger.info("🛑 Shutting down webhook server...")
+        await runner.cleanup()
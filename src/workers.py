@@ -0,0 +1,230 @@
+"""Многопроцессный режим: апдейты распределяются по воркерам по user_id.
+
+Главный процесс получает апдейты (polling или вебхук) и кладет их в очередь
+воркера ``user_id % WORKERS``. Все апдейты одного пользователя попадают
+в один процесс и обрабатываются в порядке поступления, поэтому состояние
+из handlers/state.py остается согласованным. Фоновые задачи-синглтоны
+(проверка автопродления) запускаются только на воркере 0.
+"""
+import asyncio
+import logging
+import multiprocessing
+import signal
+from typing import Any, Dict, List, Optional
+
+from aiogram import Bot, Dispatcher
+
+from src.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def extract_user_id(update: Dict[str, Any]) -> Optional[int]:
+    """Извлечь ID пользователя (или чата) из сырого апдейта."""
+    for key, value in update.items():
+        if key == "update_id" or not isinstance(value, dict):
+            continue
+        user = value.get("from") or value.get("user")
+        if user:
+            return user.get("id")
+        chat = value.get("chat")
+        if chat:
+            return chat.get("id")
+    return None
+
+
+def worker_index(update: Dict[str, Any], workers: int) -> int:
+    """Номер воркера для апдейта (стабилен между перезапусками)."""
+    return (extract_user_id(update) or 0) % workers
+
+
+class UpdateDistributor:
+    """Раскладывает апдейты по очередям воркеров."""
+
+    def __init__(self, queues: List[multiprocessing.Queue]):
+        self.queues = queues
+
+    def submit(self, update: Dict[str, Any]):
+        """Отправить апдейт воркеру пользователя."""
+        self.queues[worker_index(update, len(self.queues))].put(update)
+
+
+class UserSerializer:
+    """Последовательная обработка апдейтов одного пользователя внутри воркера."""
+
+    def __init__(self):
+        # user_id -> [lock, количество ожидающих апдейтов]
+        self._locks: Dict[Optional[int], list] = {}
+
+    async def run(self, user_id: Optional[int], coro_factory):
+        """Выполнить обработку после предыдущих апдейтов пользователя."""
+        entry = self._locks.get(user_id)
+        if entry is None:
+            entry = self._locks[user_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await coro_factory()
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[user_id]
+
+
+async def _worker_main(index: int, queue: multiprocessing.Queue, run_singletons: bool):
+    """Цикл воркера: читать апдейты из очереди и передавать диспетчеру."""
+    from src.main import create_bot, create_dispatcher
+    from src.services.deletion_scheduler import get_deletion_scheduler
+    from src.services.renewal_service import start_renewal_checker
+    from src.services.yookassa_service import init_yookassa
+    from src.utils.app_context import get_app_context
+    from src.utils.loop_monitor import start_loop_monitor
+    from src.web.server import start_metrics_server
+
+    settings = get_settings()
+    try:
+        init_yookassa()
+    except Exception as e:
+        logger.warning(f"⚠️ Worker {index}: YooKassa not initialized: {e}")
+
+    start_loop_monitor()
+    if settings.METRICS_ENABLED:
+        await start_metrics_server(settings.METRICS_PORT + index + 1)
+    bot = create_bot()
+    dp = create_dispatcher()
+    await get_app_context().get_bot_user(bot)
+
+    if run_singletons:
+        asyncio.create_task(start_renewal_checker(bot, interval_hours=6))
+        logger.info(f"✅ Worker {index}: renewal checker started")
+
+    # Очередь удалений из БД восстанавливает только воркер 0
+    get_deletion_scheduler().start(bot, restore=run_singletons)
+
+    loop = asyncio.get_running_loop()
+    serializer = UserSerializer()
+    semaphore = asyncio.Semaphore(settings.WORKER_CONCURRENCY)
+    tasks = set()
+
+    async def process(update: Dict[str, Any]):
+        async with semaphore:
+            try:
+                await dp.feed_raw_update(bot, update)
+            except Exception as e:
+                logger.exception(f"Worker {index}: update processing error: {e}")
+
+    logger.info(f"✅ Worker {index} started")
+    while True:
+        update = await loop.run_in_executor(None, queue.get)
+        if update is None:
+            break
+        task = asyncio.create_task(
+            serializer.run(extract_user_id(update), lambda u=update: process(u))
+        )
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.wait(set(tasks), timeout=settings.SHUTDOWN_TIMEOUT)
+    await bot.session.close()
+    logger.info(f"👋 Worker {index} stopped")
+
+
+def run_worker(index: int, queue: multiprocessing.Queue, run_singletons: bool):
+    """Точка входа процесса-воркера."""
+    from src.utils.logger import setup_logger
+
+    setup_logger()
+    # Остановка по сигналу из главного процесса (через очередь)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(_worker_main(index, queue, run_singletons))
+
+
+async def _poll_updates(bot: Bot, dp: Dispatcher, distributor: UpdateDistributor):
+    """Long polling в главном процессе с передачей апдейтов воркерам."""
+    allowed_updates = dp.resolve_used_update_types()
+    await bot.delete_webhook(drop_pending_updates=False)
+    offset = None
+
+    while True:
+        try:
+            updates = await bot.get_updates(
+                offset=offset, timeout=30, allowed_updates=allowed_updates
+            )
+        except Exception as e:
+            logger.warning(f"get_updates failed: {e}")
+            await asyncio.sleep(5)
+            continue
+
+        for update in updates:
+            distributor.submit(
+                update.model_dump(mode="json", exclude_none=True, by_alias=True)
+            )
+            offset = update.update_id + 1
+
+
+async def run_workers(bot: Bot, dp: Dispatcher):
+    """Запустить воркеры и принимать апдейты в главном процессе."""
+    from src.web.server import create_web_app, run_webhook, start_web_server, wait_for_stop_signal
+
+    settings = get_settings()
+    context = multiprocessing.get_context("spawn")
+    queues = [context.Queue() for _ in range(settings.WORKERS)]
+    processes: List[Optional[multiprocessing.Process]] = [None] * settings.WORKERS
+
+    def start(index: int):
+        process = context.Process(
+            target=run_worker,
+            args=(index, queues[index], index == 0),
+            name=f"bot-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        processes[index] = process
+
+    async def supervise():
+        # Перезапуск упавших воркеров с той же очередью (та же группа пользователей)
+        while True:
+            await asyncio.sleep(5)
+            for index, process in enumerate(processes):
+                if process is not None and not process.is_alive():
+                    logger.error(
+                        f"❌ Worker {index} exited with code {process.exitcode}, restarting"
+                    )
+                    start(index)
+
+    for index in range(settings.WORKERS):
+        start(index)
+    logger.info(f"✅ Started {settings.WORKERS} workers")
+
+    distributor = UpdateDistributor(queues)
+    supervisor = asyncio.create_task(supervise())
+    try:
+        if settings.BOT_MODE == "webhook":
+            await run_webhook(dp, bot, update_sink=distributor.submit)
+        else:
+            # Служебный HTTP сервер (health, YooKassa) - в главном процессе, как в main()
+            runner = None
+            if settings.WEB_SERVER_ENABLED:
+                runner = await start_web_server(create_web_app(dp, bot, webhook=False))
+            logger.info("✅ Bot started. Polling (multi-worker)...")
+            poller = asyncio.create_task(_poll_updates(bot, dp, distributor))
+            try:
+                await wait_for_stop_signal()
+            finally:
+                poller.cancel()
+                if runner:
+                    await runner.cleanup()
+    finally:
+        supervisor.cancel()
+        logger.info("🛑 Stopping workers...")
+        for queue in queues:
+            queue.put(None)
+        loop = asyncio.get_running_loop()
+        for process in processes:
+            await loop.run_in_executor(
+                None, process.join, settings.SHUTDOWN_TIMEOUT
+            )
+            if process.is_alive():
+                process.terminate()
+        await bot.session.close()
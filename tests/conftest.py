@@ -0,0 +1,4 @@
+"""Окружение тестов: временная БД и заглушки обязательных настроек до импорта src."""
+from benchmarks.load import prepare_environment
+
+prepare_environment("remnabuy-test-")
@@ -0,0 +1,46 @@
+"""Ограничение частоты: служебные сообщения проходят при пустой корзине."""
+import asyncio
+from datetime import datetime
+
+from aiogram.types import Message
+
+from src.utils.throttling import ThrottlingMiddleware
+
+USER = {"id": 100500, "is_bot": False, "first_name": "Test"}
+
+
+def _message(**fields) -> Message:
+    return Message(
+        message_id=1,
+        date=datetime.now(),
+        chat={"id": USER["id"], "type": "private"},
+        from_user=USER,
+        **fields,
+    )
+
+
+def _feed(middleware: ThrottlingMiddleware, event: Message) -> bool:
+    """Дошло ли событие до обработчика."""
+    delivered = []
+
+    async def handler(event, data):
+        delivered.append(event)
+
+    asyncio.run(middleware(handler, event, {"event_from_user": event.from_user}))
+    return bool(delivered)
+
+
+def test_drained_bucket_still_delivers_successful_payment():
+    middleware = ThrottlingMiddleware(rate=0.0, burst=1.0, expensive_cost=4.0)
+    assert _feed(middleware, _message(text="/start"))
+    assert not _feed(middleware, _message(text="/start"))
+
+    payment = _message(successful_payment={
+        "currency": "XTR",
+        "total_amount": 100,
+        "invoice_payload": "{}",
+        "telegram_payment_charge_id": "charge",
+        "provider_payment_charge_id": "provider",
+    })
+    assert _feed(middleware, payment)
+    assert middleware.rejected == {"message": 1}
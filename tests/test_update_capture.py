@@ -0,0 +1,87 @@
+"""Обезличивание записанных апдейтов: реальные ID и имена не попадают в запись."""
+import json
+from datetime import datetime
+
+from aiogram.types import Update
+
+from src.utils.update_capture import Anonymizer
+
+SENDER = {"id": 100500, "is_bot": False, "first_name": "Alice", "username": "alice_real"}
+ORIGIN = {"id": 200600, "is_bot": False, "first_name": "Bob", "last_name": "Secret"}
+MEMBER = {"id": 300700, "is_bot": False, "first_name": "Carol"}
+HELPER = {"id": 400800, "is_bot": True, "first_name": "Helper", "username": "helper_bot"}
+REAL_VALUES = ("100500", "200600", "300700", "400800", "Alice", "alice_real", "Bob",
+               "Secret", "Carol", "helper_bot", "Hidden Dave")
+
+
+def _dump(update: dict) -> dict:
+    raw = Update.model_validate(update).model_dump(mode="json", exclude_none=True, by_alias=True)
+    return Anonymizer("salt").anonymize(raw)
+
+
+def _assert_no_real_values(record: dict):
+    serialized = json.dumps(record, ensure_ascii=False)
+    for value in REAL_VALUES:
+        assert value not in serialized, value
+
+
+def test_forwarded_message_hides_origin_sender():
+    now = int(datetime.now().timestamp())
+    record = _dump({
+        "update_id": 1,
+        "message": {
+            "message_id": 10,
+            "date": now,
+            "chat": {"id": SENDER["id"], "type": "private", "first_name": "Alice"},
+            "from": SENDER,
+            "forward_origin": {"type": "user", "date": now, "sender_user": ORIGIN},
+            "via_bot": HELPER,
+            "text": "/start hello",
+        },
+    })
+    _assert_no_real_values(record)
+
+    message = record["message"]
+    anonymizer = Anonymizer("salt")
+    assert message["from"]["id"] == message["chat"]["id"] == anonymizer.user_id(SENDER["id"])
+    assert message["forward_origin"]["sender_user"]["id"] == anonymizer.user_id(ORIGIN["id"])
+    assert message["text"] == "/start xxxxx"
+
+
+def test_service_messages_and_join_requests_are_anonymized():
+    now = int(datetime.now().timestamp())
+    group = {"id": -1001234567890, "type": "supergroup", "title": "Real group"}
+    members = _dump({
+        "update_id": 2,
+        "message": {
+            "message_id": 11,
+            "date": now,
+            "chat": group,
+            "from": SENDER,
+            "new_chat_members": [MEMBER],
+            "left_chat_member": ORIGIN,
+        },
+    })
+    hidden = _dump({
+        "update_id": 3,
+        "message": {
+            "message_id": 12,
+            "date": now,
+            "chat": group,
+            "from": SENDER,
+            "forward_origin": {"type": "hidden_user", "date": now, "sender_user_name": "Hidden Dave"},
+        },
+    })
+    join = _dump({
+        "update_id": 4,
+        "chat_join_request": {
+            "chat": group,
+            "from": MEMBER,
+            "user_chat_id": MEMBER["id"],
+            "date": now,
+        },
+    })
+    for record in (members, hidden, join):
+        _assert_no_real_values(record)
+        assert "Real group" not in json.dumps(record)
+    assert join["chat_join_request"]["user_chat_id"] == join["chat_join_request"]["from"]["id"]